@@ -1 +1,348 @@
+#!/usr/bin/env python3
+"""
+Local dev/preview server for the GBA RPG packages.
 
+Variants are rendered in memory through the generators (the same pipeline as
+``python -m gba_build``, minus the output tree and zip) and served from an
+LRU of rendered builds keyed by a fingerprint of the generator and
+``gba_build`` sources, the assets directory and the Tiled map, so a reload
+only rebuilds after one of them changed. Edited sources are re-imported
+before the rebuild.
+Responses carry strong ETags and ``Cache-Control: no-cache``, so the browser
+revalidates and gets a 304 for anything unchanged, except content-fingerprinted
+files, which are immutable and cached for a year; text outputs are served
+gzip-encoded from the build's pre-encoded siblings when the client accepts
+it.
+
+    python app.py                        # all built-in variants on :8000
+    python app.py gba_rpg_emerald -p 8080
+    python app.py -f skins.json --no-minify
+"""
+
+import argparse
+import dataclasses
+import hashlib
+import importlib
+import importlib.util
+import mimetypes
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from html import escape
+from urllib.parse import unquote, urlsplit
+
+# Only the package itself is bound here: a library refresh re-imports it, and
+# names imported from it would keep pointing into the stale modules.
+import gba_build
+
+LIBRARY = "gba_build"
+
+CONTENT_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+    ".js": "text/javascript; charset=utf-8",
+    ".json": "application/json",
+    ".md": "text/markdown; charset=utf-8",
+    ".png": "image/png",
+    ".bin": "application/octet-stream",
+    ".gz": "application/gzip",
+}
+
+
+def content_type(rel):
+    ext = os.path.splitext(rel)[1]
+    return CONTENT_TYPES.get(ext) or mimetypes.guess_type(rel)[0] or "application/octet-stream"
+
+
+def strong_etag(body):
+    return '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+
+
+class Representation:
+    """One encoding of an output: the body bytes and their strong ETag."""
+
+    def __init__(self, body, encoding=None):
+        self.body = body
+        self.encoding = encoding
+        self.etag = strong_etag(body)
+
+
+class Output:
+    """A servable output with its identity and optional gzip representation."""
+
+    def __init__(self, rel, data, gz=None, immutable=False):
+        self.content_type = content_type(rel)
+        fingerprint = gba_build.fingerprint
+        self.cache_control = fingerprint.IMMUTABLE if immutable else fingerprint.REVALIDATE
+        self.identity = Representation(data.encode("utf-8") if isinstance(data, str) else data)
+        self.gzip = Representation(gz, "gzip") if gz is not None else None
+
+
+def accepts_gzip(header):
+    """True if an Accept-Encoding header allows gzip (q > 0)."""
+    codings = {}
+    for part in (header or "").split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[coding] = q
+    q = codings.get("gzip", codings.get("x-gzip", codings.get("*", 0.0)))
+    return q > 0
+
+
+def etag_matches(header, etag):
+    """If-None-Match comparison (weak, as RFC 9110 prescribes for GET)."""
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in (c[2:] if c.startswith("W/") else c for c in candidates)
+
+
+class PreviewBuilder:
+    """Renders variants on demand and keeps the last few builds in an LRU."""
+
+    def __init__(self, variants, cache_size=8):
+        self.variants = {variant.name: variant for variant in variants}
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # (name, fingerprint) -> {rel: Output}
+        self._loaded = {}            # generator module -> source stamp it was loaded from
+        self._library = self._library_stamp()  # gba_build sources the loaded library came from
+        self._lock = threading.Lock()
+
+    def _source_stamp(self, generator):
+        spec = importlib.util.find_spec(generator)
+        st = os.stat(spec.origin)
+        return (spec.origin, st.st_mtime_ns, st.st_size)
+
+    def _library_stamp(self):
+        folder = os.path.dirname(importlib.util.find_spec(LIBRARY).origin)
+        stamp = []
+        for name in sorted(os.listdir(folder)):
+            if name.endswith(".py"):
+                st = os.stat(os.path.join(folder, name))
+                stamp.append((name, st.st_mtime_ns, st.st_size))
+        return tuple(stamp)
+
+    def fingerprint(self, variant):
+        """Stat-based identity of everything a rebuild would read."""
+        h = hashlib.sha256(repr(self._source_stamp(variant.generator)).encode("utf-8"))
+        h.update(repr(self._library_stamp()).encode("utf-8"))
+        h.update(repr(sorted(variant.options.items())).encode("utf-8"))
+        paths = []
+        assets_dir = variant.options.get("assets_dir")
+        if assets_dir and os.path.isdir(assets_dir):
+            for dirpath, dirnames, filenames in os.walk(assets_dir):
+                dirnames.sort()
+                paths.extend(os.path.join(dirpath, filename) for filename in sorted(filenames))
+        tiled_map = variant.options.get("map")
+        if tiled_map:
+            try:
+                paths.extend(gba_build.tiled.source_files(tiled_map))
+            except OSError:
+                pass  # the build reports the missing map
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            h.update(f"{path}\0{st.st_mtime_ns}\0{st.st_size}\n".encode("utf-8"))
+        return h.hexdigest()
+
+    def get(self, name):
+        """The rendered outputs of variant ``name``, rebuilding only if stale."""
+        variant = self.variants[name]
+        key = (name, self.fingerprint(variant))
+        with self._lock:
+            outputs = self._cache.get(key)
+            if outputs is not None:
+                self._cache.move_to_end(key)
+                return outputs
+            started = time.perf_counter()
+            self._refresh_library()
+            variant = self.variants[name]
+            self._refresh_generator(variant.generator)
+            _, files, report = gba_build.render_variant(variant)
+            renamed = report.get("fingerprinted", {})
+            logical_path = gba_build.fingerprint.logical_path
+            outputs = {rel: Output(rel, data, files.get(f"{rel}.gz"),
+                                   immutable=logical_path(renamed, rel) != rel)
+                       for rel, data in files.items()}
+            self._cache[key] = outputs
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"built {name} in {elapsed:.0f} ms", file=sys.stderr)
+            return outputs
+
+    def _refresh_library(self):
+        """Re-import ``gba_build``, and the generators using it, if its sources changed.
+
+        The modules import names from each other, so they are dropped from
+        ``sys.modules`` together and imported afresh rather than reloaded
+        one by one. The variants are then recreated from the new ``Variant``
+        class, and everything else reaches the library through the module
+        global ``gba_build``, which is rebound here.
+        """
+        global gba_build
+        stamp = self._library_stamp()
+        if stamp == self._library:
+            return
+        stale = [name for name in sys.modules
+                 if name == LIBRARY or name.startswith(LIBRARY + ".") or name in self._loaded]
+        for name in stale:
+            del sys.modules[name]
+        self._loaded.clear()
+        gba_build = importlib.import_module(LIBRARY)
+        self.variants = {name: gba_build.Variant(**dataclasses.asdict(variant))
+                         for name, variant in self.variants.items()}
+        self._library = stamp
+
+    def _refresh_generator(self, generator):
+        """Re-import ``generator`` if its source changed since it was loaded."""
+        stamp = self._source_stamp(generator)
+        module = sys.modules.get(generator)
+        if module is not None and self._loaded.get(generator) not in (None, stamp):
+            importlib.reload(module)
+        elif module is None:
+            importlib.import_module(generator)
+        self._loaded[generator] = stamp
+
+
+class PreviewHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "gba-preview/1"
+
+    def do_GET(self):
+        self._serve(head=False)
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def _serve(self, head):
+        builder = self.server.builder
+        path = unquote(urlsplit(self.path).path)
+        if path == "/":
+            return self._send_index(builder, head)
+        name, slash, rel = path.lstrip("/").partition("/")
+        if name not in builder.variants:
+            return self.send_error(HTTPStatus.NOT_FOUND)
+        if not slash:
+            return self._redirect(f"/{name}/")
+        if not rel or rel.endswith("/"):
+            rel += "index.html"
+
+        try:
+            outputs = builder.get(name)
+        except Exception:  # show the build error in the browser while iterating
+            return self._send(HTTPStatus.INTERNAL_SERVER_ERROR, "text/plain; charset=utf-8",
+                              traceback.format_exc().encode("utf-8"), head)
+        output = outputs.get(rel)
+        if output is None:
+            return self.send_error(HTTPStatus.NOT_FOUND)
+
+        rep = output.identity
+        if output.gzip is not None and accepts_gzip(self.headers.get("Accept-Encoding")):
+            rep = output.gzip
+        headers = {"ETag": rep.etag, "Cache-Control": output.cache_control}
+        if output.gzip is not None:
+            headers["Vary"] = "Accept-Encoding"
+        if etag_matches(self.headers.get("If-None-Match"), rep.etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.end_headers()
+            return
+        if rep.encoding:
+            headers["Content-Encoding"] = rep.encoding
+        self._send(HTTPStatus.OK, output.content_type, rep.body, head, headers)
+
+    def _send(self, status, ctype, body, head, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def _redirect(self, location):
+        self.send_response(HTTPStatus.MOVED_PERMANENTLY)
+        self.send_header("Location", location)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _send_index(self, builder, head):
+        items = "".join(f'<li><a href="/{escape(name)}/">{escape(name)}</a></li>'
+                        for name in sorted(builder.variants))
+        body = (f"<!doctype html><meta charset=utf-8><title>GBA RPG preview</title>"
+                f"<h1>Variants</h1><ul>{items}</ul>").encode("utf-8")
+        self._send(HTTPStatus.OK, "text/html; charset=utf-8", body, head,
+                   {"Cache-Control": "no-cache"})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve GBA RPG variants from in-memory builds.")
+    builtin = ", ".join(sorted(gba_build.BUILTIN))
+    parser.add_argument("variants", nargs="*",
+                        help=f"built-in variants to serve ({builtin}); "
+                             "default: all, unless --variants-file is given")
+    parser.add_argument("-f", "--variants-file", action="append", default=[],
+                        help="JSON file with additional variant definitions (repeatable)")
+    parser.add_argument("--assets", metavar="DIR",
+                        help="user-supplied assets for built-in variants "
+                             "(default: ./assets if present)")
+    parser.add_argument("--no-minify", action="store_true",
+                        help="serve readable, unminified scripts, styles and pages")
+    parser.add_argument("--host", default="127.0.0.1", help="address to bind (default: 127.0.0.1)")
+    parser.add_argument("-p", "--port", type=int, default=8000, help="port (default: 8000)")
+    parser.add_argument("--cache-size", type=int, default=8,
+                        help="rendered builds kept in memory (default: 8)")
+    args = parser.parse_args(argv)
+
+    assets = args.assets or ("assets" if os.path.isdir("assets") else None)
+    options = {"gzip": True, "minify": not args.no_minify}
+    if assets:
+        options["assets_dir"] = assets
+    names = args.variants or ([] if args.variants_file else sorted(gba_build.BUILTIN))
+    try:
+        variants = [gba_build.builtin_variant(name, "dist", tree=False, **options)
+                    for name in names]
+        for path in args.variants_file:
+            for variant in gba_build.load_variants_file(path, "dist"):
+                variant.options = {**options, **variant.options}
+                variants.append(variant)
+    except KeyError as e:
+        parser.error(e.args[0])
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    server = ThreadingHTTPServer((args.host, args.port), PreviewHandler)
+    server.daemon_threads = True
+    server.builder = PreviewBuilder(variants, args.cache_size)
+    served = ", ".join(sorted(server.builder.variants))
+    print(f"Serving {served} on http://{args.host}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
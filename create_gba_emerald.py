@@ -4,13 +4,23 @@ Create an upgraded GBA-style Emerald-like graphics web RPG package
 with richer procedural art, animations, and advanced rendering.
 """
 
+import argparse
+import inspect
 import os
-import zipfile
-import textwrap
+import re
+import warnings
 
-root = "/workspace/gba_rpg_emerald"
-assets = os.path.join(root, "assets")
-os.makedirs(assets, exist_ok=True)
+from gba_build import build_variant, builtin_variant, raster
+from gba_build.cache import cached, input_hash
+from gba_build.maps import EMPTY, chunk_files, collision_plane, world_files
+from gba_build.worldgen import generate_world
+from gba_build.minify import format_size_report
+from gba_build.overlay import lcd_pattern
+from gba_build.png import encode_png
+
+# Bump whenever the generated output changes in a way the content hashes
+# alone would not capture (e.g. archive layout).
+GENERATOR_VERSION = "1.1.0"
 
 # HTML file with Turkish UI
 index_html = """<!doctype html>
@@ -222,15 +232,22 @@ script_js = r"""/* GBA-Style RPG with Pokémon Emerald-like Graphics
    Advanced features:
    - 240×160 native GBA resolution with 4x upscaling
    - BGR555 15-bit color quantization for authentic GBA palette
+   - Frames composed in a BGR555 typed-array framebuffer (?renderer=canvas
+     falls back to drawImage)
+   - ?worker=1 renders in a Web Worker on an OffscreenCanvas; the page
+     only forwards input
+   - Auto-save of the player's tile and facing to localStorage
    - Rich procedural tileset with multiple variants
    - Animated water, tall grass, and environmental effects
    - Overlap layer system for depth (tree tops over player)
    - Sprite shadows and advanced lighting
    - 9-slice dialogue panels with typewriter effect
    - Smooth grid-based movement with interpolation
+   - Actors in a uniform-grid spatial index, culled to the view
+     (?crowd=N adds N wandering NPCs)
 */
 
-(() => {
+(async () => {
   // ============================================================================
   // CORE CONSTANTS & SETUP
   // ============================================================================
@@ -239,48 +256,287 @@ script_js = r"""/* GBA-Style RPG with Pokémon Emerald-like Graphics
   const TILE = 16; // Tile size
   const SCALE = 4; // Display scale
   
+  // Build-time configuration injected by the generator
+  const BUILD = /*@BUILD@*/{};
+  
+  // ============================================================================
+  // WORKER MODE
+  // ============================================================================
+  // With ?worker=1 the page hands the screen canvas to a Web Worker running
+  // this same script and only forwards key events; everything below then
+  // runs in the worker, which gets the canvas, the URL query and the saved
+  // game in an 'init' message and writes saves back through the page. The
+  // page's unload and visibility events fire only on the page, so it asks
+  // the worker to save then.
+  
+  const IN_WORKER = typeof document === 'undefined';
+  const GAME_KEYS = ['arrowup', 'arrowdown', 'arrowleft', 'arrowright',
+                     'w', 'a', 's', 'd', 'z', 'enter', 'p', 'r'];
+  const SAVE_KEY = 'gba-emerald-save-v1';
+  
+  if (!IN_WORKER && new URLSearchParams(location.search).get('worker') === '1') {
+    const canvas = document.getElementById('game');
+    if (canvas.transferControlToOffscreen && typeof Worker === 'function') {
+      startWorker(canvas);
+      return;
+    }
+  }
+  
+  function startWorker(canvas) {
+    const offscreen = canvas.transferControlToOffscreen();
+    const worker = new Worker(document.currentScript.src);
+    worker.postMessage({
+      type: 'init',
+      canvas: offscreen,
+      search: location.search,
+      storage: { [SAVE_KEY]: localStorage.getItem(SAVE_KEY) }
+    }, [offscreen]);
+    
+    worker.addEventListener('message', e => {
+      if (e.data.type !== 'storage') return;
+      if (e.data.value === null) localStorage.removeItem(e.data.key);
+      else localStorage.setItem(e.data.key, e.data.value);
+    });
+    
+    for (const type of ['keydown', 'keyup']) {
+      addEventListener(type, e => {
+        if (GAME_KEYS.includes(e.key.toLowerCase())) e.preventDefault();
+        worker.postMessage({ type: 'key', event: type, key: e.key });
+      });
+    }
+    
+    // The reply comes back as a 'storage' message. One sent on unload may
+    // not arrive; hiding the page comes first and leaves time for it.
+    onPageLeave(() => worker.postMessage({ type: 'save' }));
+  }
+  
+  // Run save on unload and whenever the page is hidden (tab switch, mobile
+  // backgrounding, where unload events are unreliable)
+  function onPageLeave(save) {
+    addEventListener('beforeunload', save);
+    document.addEventListener('visibilitychange', () => {
+      if (document.visibilityState === 'hidden') save();
+    });
+  }
+  
+  // In the worker: resolve with the 'init' message, and replay forwarded
+  // keys and save requests as events on the worker scope, where the input
+  // handlers and the game listen
+  function workerInit() {
+    return new Promise(resolve => {
+      addEventListener('message', e => {
+        if (e.data.type === 'init') resolve(e.data);
+        else if (e.data.type === 'key') {
+          dispatchEvent(Object.assign(new Event(e.data.event), { key: e.data.key }));
+        } else if (e.data.type === 'save') {
+          dispatchEvent(new Event('save'));
+        }
+      });
+    });
+  }
+  
+  const host = IN_WORKER
+    ? await workerInit()
+    : { canvas: document.getElementById('game'), search: location.search };
+  const params = new URLSearchParams(host.search);
+  
+  function createCanvas() {
+    return IN_WORKER ? new OffscreenCanvas(1, 1) : document.createElement('canvas');
+  }
+  
+  // localStorage, or in the worker a copy of the save that writes through
+  const storage = IN_WORKER ? {
+    getItem: key => host.storage[key] ?? null,
+    setItem(key, value) {
+      host.storage[key] = String(value);
+      postMessage({ type: 'storage', key, value: String(value) });
+    },
+    removeItem(key) {
+      delete host.storage[key];
+      postMessage({ type: 'storage', key, value: null });
+    }
+  } : localStorage;
+  
+  // Not every worker has requestAnimationFrame; fall back to a 60 Hz timer
+  const requestFrame = typeof requestAnimationFrame === 'function'
+    ? cb => requestAnimationFrame(cb)
+    : cb => setTimeout(() => cb(performance.now()), 1000 / 60);
+  
   // Get canvas and contexts
-  const screen = document.getElementById('game');
+  const screen = host.canvas;
   const sctx = screen.getContext('2d', { alpha: false });
   sctx.imageSmoothingEnabled = false;
   
   // Create backbuffer for GBA resolution
-  const buf = document.createElement('canvas');
+  const buf = createCanvas();
   buf.width = BASE_W;
   buf.height = BASE_H;
   const g = buf.getContext('2d', { alpha: false });
   g.imageSmoothingEnabled = false;
   
-  // Create scanline overlay for LCD effect
-  const scanlines = document.createElement('canvas');
+  // Create scanline overlay for LCD effect. The build rasterizes one period
+  // of the scanlines and sub-pixel grid (BUILD.lcd, black with per-pixel
+  // alpha); it is tiled over the screen and put in a single call.
+  const scanlines = createCanvas();
   scanlines.width = BASE_W;
   scanlines.height = BASE_H;
   const sc = scanlines.getContext('2d');
-  sc.fillStyle = 'rgba(0, 0, 0, 0.12)';
-  for (let y = 0; y < BASE_H; y += 2) {
-    sc.fillRect(0, y, BASE_W, 1);
+  const lcd = new ImageData(BASE_W, BASE_H);
+  for (let y = 0, i = 3; y < BASE_H; y++) {
+    const row = (y % BUILD.lcd.height) * BUILD.lcd.width;
+    for (let x = 0; x < BASE_W; x++, i += 4) {
+      lcd.data[i] = BUILD.lcd.alpha[row + x % BUILD.lcd.width];
+    }
   }
+  sc.putImageData(lcd, 0, 0);
   
-  // Sub-pixel LCD grid effect
-  for (let y = 0; y < BASE_H; y += 2) {
-    for (let x = 0; x < BASE_W; x += 2) {
-      sc.fillStyle = 'rgba(0, 0, 0, 0.06)';
-      sc.fillRect(x + 1, y, 1, 1);
-      sc.fillRect(x, y + 1, 1, 1);
-    }
+  // BGR555 color quantization (15-bit GBA palette) as a per-channel table
+  const QUANT = new Uint8ClampedArray(256);
+  for (let v = 0; v < 256; v++) {
+    QUANT[v] = Math.floor(v / 8) * 8; // 5 bits
   }
   
-  // BGR555 color quantization (15-bit GBA palette)
-  function quantizeBGR555(img) {
+  // Same transfer, but values QUANT already produced map to themselves, so
+  // regions mixing quantized sources with runtime blending can be re-snapped
+  const SETTLE = QUANT.map((q, v) => QUANT.includes(v) ? v : q);
+  
+  // Assets the build already snapped to BGR555
+  const PREQUANTIZED = new Set(BUILD.quantized || []);
+  
+  function quantizeBGR555(img, lut = QUANT) {
     const d = img.data;
     for (let i = 0; i < d.length; i += 4) {
-      d[i]     = Math.floor(d[i] / 8) * 8;     // R: 5 bits
-      d[i + 1] = Math.floor(d[i + 1] / 8) * 8; // G: 5 bits
-      d[i + 2] = Math.floor(d[i + 2] / 8) * 8; // B: 5 bits
+      d[i]     = lut[d[i]];     // R
+      d[i + 1] = lut[d[i + 1]]; // G
+      d[i + 2] = lut[d[i + 2]]; // B
     }
     return img;
   }
   
+  // 'frame': read back and quantize the whole backbuffer every frame.
+  // 'regions': all sources are quantized, so only rectangles with runtime
+  // blending (sprites, shadows, translucent overlay tiles, dialogue) are.
+  let quantizeMode = 'frame';
+  const blendRects = [];
+  
+  function markBlend(x, y, w, h) {
+    blendRects.push(x, y, w, h);
+  }
+  
+  function settleBlendRects() {
+    for (let i = 0; i < blendRects.length; i += 4) {
+      const x0 = Math.max(0, blendRects[i]);
+      const y0 = Math.max(0, blendRects[i + 1]);
+      const x1 = Math.min(BASE_W, blendRects[i] + blendRects[i + 2]);
+      const y1 = Math.min(BASE_H, blendRects[i + 1] + blendRects[i + 3]);
+      if (x1 <= x0 || y1 <= y0) continue;
+      const img = g.getImageData(x0, y0, x1 - x0, y1 - y0);
+      g.putImageData(quantizeBGR555(img, SETTLE), x0, y0);
+    }
+  }
+  
+  // ============================================================================
+  // FRAMEBUFFER BACKEND
+  // ============================================================================
+  
+  // 'framebuffer': the world is composed as 15-bit BGR555 words
+  // (r | g << 5 | b << 10) in a typed array, tiles, sprites and shadows are
+  // blitted as typed-array copies, and the frame is converted to RGBA once
+  // through RGBA_LUT for a single putImageData -- no per-frame readback.
+  // 'canvas': drawImage onto the backbuffer, quantized per quantizeMode.
+  let backend = 'canvas';
+  const fb = new Uint16Array(BASE_W * BASE_H);
+  const fbImage = new ImageData(BASE_W, BASE_H);
+  const fbOut = new Uint32Array(fbImage.data.buffer);
+  
+  // Channel byte -> 5-bit level; bytes QUANT produced map back to their
+  // level (as in SETTLE), anything else is truncated like QUANT does
+  const LEVEL = new Uint8Array(256);
+  for (let v = 0; v < 256; v++) LEVEL[v] = v >> 3;
+  for (let l = 0; l < 32; l++) LEVEL[QUANT[l << 3]] = l;
+  
+  // BGR555 word -> RGBA pixel (with the QUANT transfer applied)
+  const LITTLE_ENDIAN = new Uint8Array(new Uint32Array([1]).buffer)[0] === 1;
+  const RGBA_LUT = new Uint32Array(32768);
+  for (let c = 0; c < 32768; c++) {
+    const r = QUANT[(c & 31) << 3], gr = QUANT[((c >> 5) & 31) << 3], b = QUANT[(c >> 10) << 3];
+    RGBA_LUT[c] = LITTLE_ENDIAN
+      ? (0xff000000 | b << 16 | gr << 8 | r) >>> 0
+      : (r << 24 | gr << 16 | b << 8 | 0xff) >>> 0;
+  }
+  
+  // A (quantized, readable) canvas as BGR555 words plus alpha, for blit()
+  function toSurface(c) {
+    const d = c.getContext('2d').getImageData(0, 0, c.width, c.height).data;
+    const n = c.width * c.height;
+    const px = new Uint16Array(n);
+    const alpha = new Uint8Array(n);
+    let opaque = true;
+    for (let i = 0, j = 0; i < n; i++, j += 4) {
+      px[i] = LEVEL[d[j]] | LEVEL[d[j + 1]] << 5 | LEVEL[d[j + 2]] << 10;
+      alpha[i] = d[j + 3];
+      if (alpha[i] !== 255) opaque = false;
+    }
+    return { w: c.width, h: c.height, px, alpha, opaque };
+  }
+  
+  // Source-over of one BGR555 word onto another, per 5-bit channel
+  function mix555(dst, src, a) {
+    const ia = 255 - a;
+    const r = ((src & 31) * a + (dst & 31) * ia + 127) / 255 | 0;
+    const gr = ((src >> 5 & 31) * a + (dst >> 5 & 31) * ia + 127) / 255 | 0;
+    const b = ((src >> 10) * a + (dst >> 10) * ia + 127) / 255 | 0;
+    return r | gr << 5 | b << 10;
+  }
+  
+  // Copy a w×h rectangle of surface s at (sx, sy) to (dx, dy) in fb
+  function blit(s, sx, sy, w, h, dx, dy) {
+    if (dx < 0) { sx -= dx; w += dx; dx = 0; }
+    if (dy < 0) { sy -= dy; h += dy; dy = 0; }
+    if (dx + w > BASE_W) w = BASE_W - dx;
+    if (dy + h > BASE_H) h = BASE_H - dy;
+    if (w <= 0 || h <= 0) return;
+    for (let row = 0; row < h; row++) {
+      const src = (sy + row) * s.w + sx;
+      const dst = (dy + row) * BASE_W + dx;
+      if (s.opaque) {
+        fb.set(s.px.subarray(src, src + w), dst);
+        continue;
+      }
+      for (let i = 0; i < w; i++) {
+        const a = s.alpha[src + i];
+        if (a === 255) fb[dst + i] = s.px[src + i];
+        else if (a) fb[dst + i] = mix555(fb[dst + i], s.px[src + i], a);
+      }
+    }
+  }
+  
+  // Copy a w×h rectangle of surface s, pixels and alpha, into surface d
+  function copyRect(s, sx, sy, w, h, d, dx, dy) {
+    for (let row = 0; row < h; row++) {
+      const src = (sy + row) * s.w + sx;
+      const dst = (dy + row) * d.w + dx;
+      d.px.set(s.px.subarray(src, src + w), dst);
+      d.alpha.set(s.alpha.subarray(src, src + w), dst);
+    }
+  }
+  
+  // Convert fb to RGBA and put it on the backbuffer in one call, or one
+  // call per dirty rect
+  function presentFramebuffer(full = true) {
+    if (full) {
+      for (let i = 0; i < fb.length; i++) fbOut[i] = RGBA_LUT[fb[i]];
+      g.putImageData(fbImage, 0, 0);
+      return;
+    }
+    for (const [x, y, w, h] of dirtyRects) {
+      for (let row = y; row < y + h; row++) {
+        for (let i = row * BASE_W + x, end = i + w; i < end; i++) fbOut[i] = RGBA_LUT[fb[i]];
+      }
+      g.putImageData(fbImage, 0, 0, x, y, w, h);
+    }
+  }
+  
   // ============================================================================
   // EMERALD COLOR PALETTE
   // ============================================================================
@@ -336,43 +592,189 @@ script_js = r"""/* GBA-Style RPG with Pokémon Emerald-like Graphics
   const assets = { 
     tileset: null, 
     player: null, 
-    panel: null 
+    panel: null,
+    baseTiles: null,  // tileset flattened on black, highlight baked in
+    overTiles: null,  // tileset with alpha, highlight baked in
+    translucent: null // per tile id: has partially transparent pixels
   };
+  const sources = {}; // asset name -> file it was loaded from
+  let tileCols = 1;   // tiles per tileset row, set by prepareSources
+  const surfaces = {}; // framebuffer copies of baseTiles, overTiles, player, shadow
   
   function loadImage(src) {
     return new Promise((resolve, reject) => {
+      if (IN_WORKER) {
+        // No Image in workers: decode the fetched file to an ImageBitmap
+        fetch(src)
+          .then(res => res.ok ? res.blob() : Promise.reject(new Error(`${src}: ${res.status}`)))
+          .then(blob => createImageBitmap(blob))
+          .then(resolve, reject);
+        return;
+      }
       const img = new Image();
       img.onload = () => resolve(img);
       img.onerror = reject;
       img.src = src;
     });
   }
+  // Content-fingerprinted names the build gave the files the runtime loads
+  // (BUILD.assets, see gba_build/fingerprint.py); a directory maps as a
+  // whole, so 'assets/world/' resolves to where its chunk files went
+  const ASSET_URLS = BUILD.assets || {};
+  
+  function assetUrl(path) {
+    return ASSET_URLS[path] || path;
+  }
+  
+  // Sheets the build packed into atlas images (BUILD.atlas, see
+  // gba_build/atlas.py) are cut out of them by name; the atlas images load
+  // once, shared by every sprite
+  const ATLAS = BUILD.atlas || { sheets: [], sprites: {} };
+  let atlasSheets = null;
+  
+  async function loadSprite(name, src) {
+    const sprite = ATLAS.sprites[name];
+    if (!sprite) return loadImage(assetUrl(src));
+    atlasSheets = atlasSheets || Promise.all(ATLAS.sheets.map(path => loadImage(assetUrl(path))));
+    const sheet = (await atlasSheets)[sprite.sheet];
+    const c = createCanvas();
+    c.width = sprite.w;
+    c.height = sprite.h;
+    c.getContext('2d').drawImage(sheet, sprite.x, sprite.y, sprite.w, sprite.h, 0, 0, sprite.w, sprite.h);
+    return c;
+  }
+
   
   async function loadAssets() {
     try { 
-      assets.tileset = await loadImage('assets/tileset.png'); 
+      assets.tileset = await loadSprite('tileset', sources.tileset = 'assets/tileset.png'); 
     } catch { 
       assets.tileset = makeEmeraldTileset(); 
+      delete sources.tileset;
     }
     
     try { 
-      assets.player = await loadImage('assets/player.png'); 
+      assets.player = await loadSprite('player', sources.player = 'assets/player.png'); 
     } catch { 
       assets.player = makeEmeraldPlayer(); 
+      delete sources.player;
     }
     
     try { 
-      assets.panel = await loadImage('assets/panel9.png'); 
+      assets.panel = await loadSprite('panel', sources.panel = 'assets/panel9.png'); 
     } catch { 
       assets.panel = makeEmeraldPanel(); 
+      delete sources.panel;
     }
+    
+    prepareSources();
+  }
+  
+  function toCanvas(img, background) {
+    const c = createCanvas();
+    c.width = img.width;
+    c.height = img.height;
+    const ctx = c.getContext('2d');
+    if (background) {
+      ctx.fillStyle = background;
+      ctx.fillRect(0, 0, c.width, c.height);
+    }
+    ctx.drawImage(img, 0, 0);
+    return c;
+  }
+  
+  // Static tile lighting (BUILD.lighting bands: pixel rows within every
+  // tile, color, alpha). The build bakes it into the sheets listed in
+  // BUILD.lit, so only the procedural fallback is lit here, once at load.
+  const LIT = new Set(BUILD.lit || []);
+  
+  function bakeLighting(c) {
+    const ctx = c.getContext('2d');
+    for (const { rows: [top, bottom], color, alpha } of BUILD.lighting || []) {
+      ctx.globalAlpha = alpha;
+      ctx.fillStyle = color;
+      for (let y = 0; y < c.height; y += TILE) {
+        ctx.fillRect(0, y + top, c.width, bottom - top);
+      }
+    }
+    ctx.globalAlpha = 1;
+    return c;
+  }
+  
+  // Quantize a canvas in place; false if it cannot be read back (tainted)
+  function snapCanvas(c, src) {
+    try {
+      const ctx = c.getContext('2d');
+      const img = ctx.getImageData(0, 0, c.width, c.height);
+      ctx.putImageData(quantizeBGR555(img, PREQUANTIZED.has(src) ? SETTLE : QUANT), 0, 0);
+      return true;
+    } catch {
+      return false;
+    }
+  }
+  
+  // Snap every source to BGR555 once at load, so frames only need to
+  // re-quantize the regions where runtime blending happens
+  function prepareSources() {
+    const light = LIT.has(sources.tileset) ? c => c : bakeLighting;
+    assets.baseTiles = light(toCanvas(assets.tileset, '#000000'));
+    assets.overTiles = light(toCanvas(assets.tileset));
+    assets.player = toCanvas(assets.player);
+    assets.panel = toCanvas(assets.panel);
+    tileCols = Math.floor(assets.baseTiles.width / TILE);
+    invalidateChunks(); // chunks hold copies of the previous sheets
+    
+    const snapped =
+      snapCanvas(assets.baseTiles, sources.tileset) &&
+      snapCanvas(assets.overTiles, sources.tileset) &&
+      snapCanvas(assets.player, sources.player) &&
+      snapCanvas(assets.panel, sources.panel);
+    if (!snapped) return;
+    
+    const c = assets.overTiles;
+    const cols = Math.floor(c.width / TILE);
+    const d = c.getContext('2d').getImageData(0, 0, c.width, c.height).data;
+    assets.translucent = new Uint8Array(cols * Math.ceil(c.height / TILE));
+    for (let y = 0; y < c.height; y++) {
+      for (let x = 0; x < c.width; x++) {
+        const a = d[(y * c.width + x) * 4 + 3];
+        if (a > 0 && a < 255) {
+          assets.translucent[Math.floor(y / TILE) * cols + Math.floor(x / TILE)] = 1;
+        }
+      }
+    }
+    quantizeMode = 'regions';
+    
+    // Readable, quantized sources can be blitted; ?renderer=canvas opts out
+    if (params.get('renderer') !== 'canvas') {
+      surfaces.baseTiles = toSurface(assets.baseTiles);
+      surfaces.overTiles = toSurface(assets.overTiles);
+      surfaces.player = toSurface(assets.player);
+      surfaces.shadow = toSurface(makeShadow());
+      backend = 'framebuffer';
+    }
+  }
+  
+  // Actor shadow for the framebuffer: the ellipse drawShadow() fills,
+  // centred at (6, 3)
+  function makeShadow() {
+    const c = createCanvas();
+    c.width = 12;
+    c.height = 6;
+    const ctx = c.getContext('2d');
+    ctx.globalAlpha = 0.3;
+    ctx.fillStyle = '#000000';
+    ctx.beginPath();
+    ctx.ellipse(6, 3, 5, 2, 0, 0, Math.PI * 2);
+    ctx.fill();
+    return c;
   }
   
   // Create Emerald-quality tileset
   function makeEmeraldTileset() {
     const cols = 16, rows = 2;
     const w = cols * TILE, h = rows * TILE;
-    const c = document.createElement('canvas');
+    const c = createCanvas();
     c.width = w;
     c.height = h;
     const ctx = c.getContext('2d');
@@ -645,9 +1047,7 @@ script_js = r"""/* GBA-Style RPG with Pokémon Emerald-like Graphics
       g.fillRect(4, 13, 8, 2);
     });
     
-    const img = new Image();
-    img.src = c.toDataURL();
-    return img;
+    return c;
   }
   
   // Create Emerald-style player sprite
@@ -656,7 +1056,7 @@ script_js = r"""/* GBA-Style RPG with Pokémon Emerald-like Graphics
     const cols = 4; // 4 frames for smoother animation
     const rows = 4; // 4 directions
     
-    const c = document.createElement('canvas');
+    const c = createCanvas();
     c.width = fw * cols;
     c.height = fh * rows;
     const ctx = c.getContext('2d');
@@ -724,15 +1124,13 @@ script_js = r"""/* GBA-Style RPG with Pokémon Emerald-like Graphics
       }
     }
     
-    const img = new Image();
-    img.src = c.toDataURL();
-    return img;
+    return c;
   }
   
   // Create 9-slice panel for dialogue
   function makeEmeraldPanel() {
     const s = 8; // slice size
-    const c = document.createElement('canvas');
+    const c = createCanvas();
     c.width = s * 3;
     c.height = s * 3;
     const ctx = c.getContext('2d');
@@ -771,9 +1169,7 @@ script_js = r"""/* GBA-Style RPG with Pokémon Emerald-like Graphics
       }
     }
     
-    const img = new Image();
-    img.src = c.toDataURL();
-    return img;
+    return c;
   }
   
   // ============================================================================
@@ -782,7 +1178,8 @@ script_js = r"""/* GBA-Style RPG with Pokémon Emerald-like Graphics
   
   const VIEW_W = Math.floor(BASE_W / TILE);
   const VIEW_H = Math.floor(BASE_H / TILE);
-  const W = 48, H = 32;
+  // World size; replaced by the dimensions in the world index when it loads
+  let W = 48, H = 32;
   
   // Tile indices
   const T = {
@@ -797,81 +1194,244 @@ script_js = r"""/* GBA-Style RPG with Pokémon Emerald-like Graphics
   
   const SOLID = new Set([T.TRUNK, T.WATER0, T.WATER1, T.ROCK]);
   
-  // Generate base map
-  const base = Array.from({ length: H }, (_, y) => 
-    Array.from({ length: W }, (_, x) => {
-      // Border trees
-      if (x === 0 || y === 0 || x === W - 1 || y === H - 1) {
-        return T.TRUNK;
-      }
-      
-      // Water pond
-      if (x > 12 && x < 18 && y > 8 && y < 14) {
-        return T.WATER0;
-      }
-      
-      // Paths
-      if (y === 12 && x > 3 && x < W - 3) {
-        return x % 3 === 0 ? T.PATH0 : (x % 3 === 1 ? T.PATH1 : T.PATH2);
-      }
-      if (x === 20 && y > 3 && y < H - 3) {
-        return y % 3 === 0 ? T.PATH0 : (y % 3 === 1 ? T.PATH1 : T.PATH2);
-      }
-      
-      // Varied grass
-      const grassNoise = (x * 7 + y * 11) % 3;
-      return grassNoise === 0 ? T.GRASS0 : (grassNoise === 1 ? T.GRASS1 : T.GRASS2);
-    })
-  );
+  // EMPTY marks blank overlay cells
+  const EMPTY = 255;
   
-  // Overlap layer for tree tops
-  const over = Array.from({ length: H }, () => 
-    Array.from({ length: W }, () => -1)
-  );
+  // The world streams in as chunks (see gba_build/maps.py): the index gives
+  // its size and the file holding each chunk, and the chunks around the
+  // camera stay resident, at most RESIDENT_CHUNKS of them, the least
+  // recently wanted evicted first. A resident chunk holds its base and
+  // overlay layers and collision plane (1 where the base tile is SOLID) as
+  // flat row-major Uint8Arrays: base[y * w + x], and so on.
+  const RESIDENT_CHUNKS = 64;
+  const PREFETCH = 2; // extra chunks requested in the direction of travel
+  const world = {
+    size: 0,             // chunk edge in tiles
+    cols: 0, rows: 0,    // chunks across and down
+    files: null,         // chunk -> file number, from the index
+    chunks: [],          // chunk -> resident chunk
+    resident: new Map(), // chunk -> resident chunk, least recently wanted first
+    pending: new Map(),  // chunk -> fetch in flight
+    version: 0,          // bumped whenever a chunk arrives
+    lastX: 0, lastY: 0   // camera position at the previous streamWorld
+  };
   
-  // Add flowers
-  const flowerPositions = [
-    [7, 7], [8, 7], [9, 7],
-    [24, 14], [25, 14], [26, 14],
-    [30, 20], [31, 20],
-    [10, 25], [11, 25]
-  ];
+  // Compiled world from the build: one small index fetch, then a fetch per
+  // chunk whose layers are Uint8Array views straight into the response.
+  async function loadWorld() {
+    try {
+      const res = await fetch(assetUrl('assets/world/') + 'index.bin');
+      if (!res.ok) throw new Error(`world index: ${res.status}`);
+      const buf = await res.arrayBuffer();
+      const view = new DataView(buf);
+      const magic = String.fromCharCode(...new Uint8Array(buf, 0, 4));
+      if (magic !== 'GBAI' || view.getUint8(4) !== 1) throw new Error('unknown world index format');
+      W = view.getUint16(6, true);
+      H = view.getUint16(8, true);
+      setChunking(view.getUint16(10, true));
+      world.files = new Uint32Array(buf, 12, world.cols * world.rows);
+    } catch (e) {
+      generateWorld();
+    }
+    invalidateChunks();
+    // The first frame waits for the chunks around the start position
+    focusCamera();
+    await Promise.all(streamWorld());
+  }
   
-  flowerPositions.forEach(([x, y]) => {
-    if (base[y] && base[y][x] !== undefined && base[y][x] < T.PATH0) {
-      base[y][x] = T.FLOWER;
+  function setChunking(size) {
+    world.size = size;
+    world.cols = Math.ceil(W / size);
+    world.rows = Math.ceil(H / size);
+    world.chunks = new Array(world.cols * world.rows);
+    world.resident.clear();
+  }
+  
+  function decodeMap(buf) {
+    const view = new DataView(buf);
+    const magic = String.fromCharCode(...new Uint8Array(buf, 0, 4));
+    const version = view.getUint8(4);
+    if (magic !== 'GBAM' || (version !== 1 && version !== 2)) throw new Error('unknown map format');
+    const layers = view.getUint8(5);
+    const w = view.getUint16(6, true);
+    const h = view.getUint16(8, true);
+    const base = new Uint8Array(buf, 10, w * h);
+    const over = layers > 1 ? new Uint8Array(buf, 10 + w * h, w * h) : new Uint8Array(w * h).fill(EMPTY);
+    // Version 2 precomputes collision in a plane after the tile layers
+    const blocked = version === 2
+      ? new Uint8Array(buf, 10 + layers * w * h, w * h)
+      : computeCollision(base);
+    return { w, h, base, over, blocked };
+  }
+  
+  function computeCollision(base) {
+    return base.map(id => SOLID.has(id) ? 1 : 0);
+  }
+  
+  function installChunk(i, chunk) {
+    world.chunks[i] = chunk;
+    world.resident.set(i, chunk);
+    world.version++;
+  }
+  
+  function evictChunk(i) {
+    const chunk = world.chunks[i];
+    world.resident.delete(i);
+    world.chunks[i] = undefined;
+    
+    // Map chunks drawn from it go too
+    const tx = (i % world.cols) * world.size;
+    const ty = Math.floor(i / world.cols) * world.size;
+    const cols = Math.ceil(W / CHUNK);
+    for (let cy = Math.floor(ty / CHUNK); cy <= Math.floor((ty + chunk.h - 1) / CHUNK); cy++) {
+      for (let cx = Math.floor(tx / CHUNK); cx <= Math.floor((tx + chunk.w - 1) / CHUNK); cx++) {
+        chunkCache.baseTiles.delete(cy * cols + cx);
+        chunkCache.overTiles.delete(cy * cols + cx);
+      }
     }
-  });
+  }
   
-  // Add tall grass areas
-  for (let x = 30; x < 38 && x < W; x++) {
-    for (let y = 6; y < 12 && y < H; y++) {
-      if (base[y][x] < T.PATH0) {
-        base[y][x] = (x + y) % 2 ? T.TALL0 : T.TALL1;
+  async function fetchChunk(i) {
+    try {
+      const res = await fetch(`${assetUrl('assets/world/')}${world.files[i]}.bin`);
+      if (!res.ok) throw new Error(`world chunk ${i}: ${res.status}`);
+      installChunk(i, decodeMap(await res.arrayBuffer()));
+      world.pending.delete(i);
+    } catch (e) {
+      // Ask again once streamWorld next wants it, a second from now
+      setTimeout(() => world.pending.delete(i), 1000);
+    }
+  }
+  
+  // Keep the chunks in and around the view resident, looking PREFETCH
+  // chunks further ahead along the way the camera is moving, and evict the
+  // least recently wanted beyond RESIDENT_CHUNKS. Returns the fetches still
+  // in flight for wanted chunks.
+  function streamWorld() {
+    const span = world.size * TILE;
+    const dx = Math.sign(camera.x - world.lastX);
+    const dy = Math.sign(camera.y - world.lastY);
+    world.lastX = camera.x;
+    world.lastY = camera.y;
+    
+    let cx0 = Math.floor((camera.x - span / 2) / span);
+    let cy0 = Math.floor((camera.y - span / 2) / span);
+    let cx1 = Math.floor((camera.x + BASE_W + span / 2) / span);
+    let cy1 = Math.floor((camera.y + BASE_H + span / 2) / span);
+    if (dx < 0) cx0 -= PREFETCH; else if (dx > 0) cx1 += PREFETCH;
+    if (dy < 0) cy0 -= PREFETCH; else if (dy > 0) cy1 += PREFETCH;
+    
+    const waits = [];
+    for (let cy = Math.max(0, cy0); cy <= Math.min(world.rows - 1, cy1); cy++) {
+      for (let cx = Math.max(0, cx0); cx <= Math.min(world.cols - 1, cx1); cx++) {
+        const i = cy * world.cols + cx;
+        const chunk = world.chunks[i];
+        if (chunk) {
+          world.resident.delete(i);
+          world.resident.set(i, chunk);
+        } else if (world.files) {
+          if (!world.pending.has(i)) world.pending.set(i, fetchChunk(i));
+          waits.push(world.pending.get(i));
+        }
       }
     }
+    for (const i of world.resident.keys()) {
+      if (world.resident.size <= RESIDENT_CHUNKS) break;
+      evictChunk(i);
+    }
+    return waits;
+  }
+  
+  // Resident chunk holding in-bounds tile (tx, ty), if any
+  function chunkAt(tx, ty) {
+    return world.chunks[Math.floor(ty / world.size) * world.cols + Math.floor(tx / world.size)];
   }
   
-  // Add trees with overlapping tops
-  for (let x = 5; x < W - 5; x += 7) {
-    for (let y = 5; y < H - 5; y += 8) {
-      if (base[y][x] < T.PATH0) {
-        base[y][x] = T.TRUNK;
-        if (y > 0) over[y - 1][x] = T.TOP;
+  // Whether the chunks under tiles [tx0, tx1] × [ty0, ty1] are all resident
+  function isResident(tx0, ty0, tx1, ty1) {
+    for (let cy = Math.floor(ty0 / world.size); cy <= Math.floor(ty1 / world.size); cy++) {
+      for (let cx = Math.floor(tx0 / world.size); cx <= Math.floor(tx1 / world.size); cx++) {
+        if (!world.chunks[cy * world.cols + cx]) return false;
       }
     }
+    return true;
   }
   
-  // Add rocks
-  const rockPositions = [
-    [10, 5], [35, 8], [25, 25], [8, 18]
-  ];
+  // Off the map, SOLID, or not resident (yet)
+  function isBlocked(tx, ty) {
+    if (tx < 0 || ty < 0 || tx >= W || ty >= H) return true;
+    const chunk = chunkAt(tx, ty);
+    return !chunk || chunk.blocked[(ty % world.size) * chunk.w + tx % world.size] === 1;
+  }
   
-  rockPositions.forEach(([x, y]) => {
-    if (base[y] && base[y][x] !== undefined && base[y][x] < T.PATH0) {
-      base[y][x] = T.ROCK;
+  // Fallback when the world index is unavailable (e.g. opened from
+  // file://); mirrors build_world in create_gba_emerald.py. The whole
+  // (small) world becomes a single resident chunk.
+  function generateWorld() {
+    W = 48; H = 32;
+    const base = new Uint8Array(W * H);
+    const over = new Uint8Array(W * H).fill(EMPTY);
+    
+    for (let y = 0; y < H; y++) {
+      for (let x = 0; x < W; x++) {
+        let id;
+        if (x === 0 || y === 0 || x === W - 1 || y === H - 1) {
+          id = T.TRUNK;                                  // Border trees
+        } else if (x > 12 && x < 18 && y > 8 && y < 14) {
+          id = T.WATER0;                                 // Water pond
+        } else if (y === 12 && x > 3 && x < W - 3) {
+          id = T.PATH0 + x % 3;                          // Paths
+        } else if (x === 20 && y > 3 && y < H - 3) {
+          id = T.PATH0 + y % 3;
+        } else {
+          id = T.GRASS0 + (x * 7 + y * 11) % 3;          // Varied grass
+        }
+        base[y * W + x] = id;
+      }
     }
-  });
+    
+    // Only plain grass is replaced by decorations
+    const onGrass = (x, y) => x >= 0 && y >= 0 && x < W && y < H && base[y * W + x] < T.PATH0;
+    
+    // Add flowers
+    const flowerPositions = [
+      [7, 7], [8, 7], [9, 7],
+      [24, 14], [25, 14], [26, 14],
+      [30, 20], [31, 20],
+      [10, 25], [11, 25]
+    ];
+    flowerPositions.forEach(([x, y]) => {
+      if (onGrass(x, y)) base[y * W + x] = T.FLOWER;
+    });
+    
+    // Add tall grass areas
+    for (let x = 30; x < 38 && x < W; x++) {
+      for (let y = 6; y < 12 && y < H; y++) {
+        if (onGrass(x, y)) base[y * W + x] = (x + y) % 2 ? T.TALL0 : T.TALL1;
+      }
+    }
+    
+    // Add trees with overlapping tops
+    for (let x = 5; x < W - 5; x += 7) {
+      for (let y = 5; y < H - 5; y += 8) {
+        if (onGrass(x, y)) {
+          base[y * W + x] = T.TRUNK;
+          if (y > 0) over[(y - 1) * W + x] = T.TOP;
+        }
+      }
+    }
+    
+    // Add rocks
+    const rockPositions = [
+      [10, 5], [35, 8], [25, 25], [8, 18]
+    ];
+    rockPositions.forEach(([x, y]) => {
+      if (onGrass(x, y)) base[y * W + x] = T.ROCK;
+    });
+    
+    setChunking(Math.max(W, H));
+    installChunk(0, { w: W, h: H, base, over, blocked: computeCollision(base) });
+  }
   
   // ============================================================================
   // ENTITIES
@@ -885,6 +1445,10 @@ script_js = r"""/* GBA-Style RPG with Pokémon Emerald-like Graphics
       this.ty = ty;
       this.x = tx * TILE; // Pixel position
       this.y = ty * TILE;
+      this.prevX = this.x; // Position at the previous simulation tick
+      this.prevY = this.y;
+      this.drawX = this.x; // Interpolated position to draw at
+      this.drawY = this.y;
       this.w = 12;
       this.h = 18;
       this.dir = DIR.D;
@@ -917,9 +1481,7 @@ script_js = r"""/* GBA-Style RPG with Pokémon Emerald-like Graphics
     }
     
     collides(tx, ty) {
-      if (tx < 0 || ty < 0 || tx >= W || ty >= H) return true;
-      const tile = base[ty][tx];
-      return SOLID.has(tile);
+      return isBlocked(tx, ty);
     }
     
     update(dt) {
@@ -932,6 +1494,7 @@ script_js = r"""/* GBA-Style RPG with Pokémon Emerald-like Graphics
         if (this.x > targetX) this.x = Math.max(this.x - this.speed, targetX);
         if (this.y < targetY) this.y = Math.min(this.y + this.speed, targetY);
         if (this.y > targetY) this.y = Math.max(this.y - this.speed, targetY);
+        placeActor(this);
         
         // Check if reached target
         if (this.x === targetX && this.y === targetY) {
@@ -950,15 +1513,159 @@ script_js = r"""/* GBA-Style RPG with Pokémon Emerald-like Graphics
     }
   }
   
-  // Create player and NPCs
-  const player = new Actor(5, 5);
-  const npc = new Actor(12, 12);
-  npc.speed = 0;
-  npc.dialogue = [
-    "Merhaba! Pokémon Emerald tarzı grafikler!",
-    "Bu prosedürel piksel sanatı gerçek GBA kalitesinde.",
-    "Kendi sprite'larını assets/ klasörüne ekleyebilirsin!"
-  ];
+  // The cast, in tiles: the demo's, or the one an imported Tiled map places
+  // (BUILD.objects, see gba_build/tiled.py)
+  const START = BUILD.objects?.player ?? [5, 5];
+  const NPCS = BUILD.objects?.npcs ?? [{
+    x: 12, y: 12,
+    dialogue: [
+      "Merhaba! Pokémon Emerald tarzı grafikler!",
+      "Bu prosedürel piksel sanatı gerçek GBA kalitesinde.",
+      "Kendi sprite'larını assets/ klasörüne ekleyebilirsin!"
+    ]
+  }];
+  
+  // Create player and NPCs, the player where the last save left it
+  const saved = JSON.parse(storage.getItem(SAVE_KEY) || 'null');
+  const player = new Actor(saved?.tx ?? START[0], saved?.ty ?? START[1]);
+  if (saved?.dir !== undefined) player.dir = saved.dir;
+  
+  // ============================================================================
+  // SPATIAL INDEX
+  // ============================================================================
+  
+  // Actors are bucketed by the grid cell (CELL×CELL tiles) holding their
+  // pixel position, so drawing and interaction only visit the cells around
+  // the camera or the player. Each bucket is kept in depth order (pixel row,
+  // then creation order); an actor is re-bucketed only when it changes cell
+  // or row, and a frame merges the already sorted buckets it can see.
+  const CELL = 4;
+  const cells = new Map(); // cx + cy * 65536 -> actors in depth order
+  const actors = [];
+  
+  function byDepth(a, b) {
+    return a.row - b.row || a.id - b.id;
+  }
+  
+  function placeActor(a) {
+    const span = CELL * TILE;
+    const cell = Math.floor(a.x / span) + Math.floor(a.y / span) * 65536;
+    const row = Math.floor(a.y);
+    if (cell === a.cell && row === a.row) return;
+    
+    let bucket, i;
+    if (cell === a.cell) {
+      // Same cell, new row: shift it along to its new place
+      bucket = cells.get(cell);
+      i = bucket.indexOf(a);
+    } else {
+      if (a.cell !== undefined) {
+        const old = cells.get(a.cell);
+        old.splice(old.indexOf(a), 1);
+        if (!old.length) cells.delete(a.cell);
+      }
+      bucket = cells.get(cell) || [];
+      cells.set(cell, bucket);
+      i = bucket.length;
+      bucket.push(a);
+    }
+    a.cell = cell;
+    a.row = row;
+    while (i > 0 && byDepth(a, bucket[i - 1]) < 0) {
+      bucket[i] = bucket[i - 1];
+      i--;
+    }
+    while (i < bucket.length - 1 && byDepth(bucket[i + 1], a) < 0) {
+      bucket[i] = bucket[i + 1];
+      i++;
+    }
+    bucket[i] = a;
+  }
+  
+  function addActor(a) {
+    a.id = actors.length;
+    actors.push(a);
+    placeActor(a);
+    return a;
+  }
+  
+  // Actors positioned in the cells a pixel rectangle overlaps, as runs in
+  // depth order
+  function actorsNear(x0, y0, x1, y1) {
+    const span = CELL * TILE;
+    const found = [];
+    for (let cy = Math.floor(y0 / span); cy <= Math.floor(y1 / span); cy++) {
+      for (let cx = Math.floor(x0 / span); cx <= Math.floor(x1 / span); cx++) {
+        const bucket = cells.get(cx + cy * 65536);
+        if (bucket) found.push(...bucket);
+      }
+    }
+    return found;
+  }
+  
+  // Actors whose sprite and shadow (16×27 from drawY - 8) overlap the view,
+  // in depth order. Sprites are drawn at the interpolated position, at most
+  // a tick from the indexed one, hence the extra tile of margin.
+  function visibleActors() {
+    const near = actorsNear(camera.x - 16 - TILE, camera.y - 19 - TILE,
+                            camera.x + BASE_W + TILE, camera.y + BASE_H + 8 + TILE);
+    return near
+      .filter(a => a.drawX + 16 > camera.x && a.drawX < camera.x + BASE_W &&
+                   a.drawY + 19 > camera.y && a.drawY - 8 < camera.y + BASE_H)
+      .sort(byDepth); // merges the sorted runs
+  }
+  
+  for (const { x, y, dialogue } of NPCS) {
+    const npc = new Actor(x, y);
+    npc.speed = 0;
+    npc.dialogue = dialogue;
+    addActor(npc);
+  }
+  addActor(player);
+  
+  // ?crowd=N adds N wandering NPCs on walkable tiles once the world has
+  // loaded (a stress test for large populations)
+  let seed = 0x2545f491;
+  function random() {
+    seed ^= seed << 13;
+    seed ^= seed >>> 17;
+    seed ^= seed << 5;
+    return (seed >>> 0) / 4294967296;
+  }
+  
+  // Placed within the resident chunks, so streamed worlds of any size work
+  function spawnCrowd(count) {
+    let x0 = world.cols, y0 = world.rows, x1 = 0, y1 = 0;
+    for (const i of world.resident.keys()) {
+      x0 = Math.min(x0, i % world.cols);
+      x1 = Math.max(x1, i % world.cols + 1);
+      y0 = Math.min(y0, Math.floor(i / world.cols));
+      y1 = Math.max(y1, Math.floor(i / world.cols) + 1);
+    }
+    const left = x0 * world.size, top = y0 * world.size;
+    const w = Math.min(W, x1 * world.size) - left;
+    const h = Math.min(H, y1 * world.size) - top;
+    for (let n = 0, tries = 0; n < count && tries < count * 20 && w > 0; tries++) {
+      const tx = left + Math.floor(random() * w);
+      const ty = top + Math.floor(random() * h);
+      if (isBlocked(tx, ty)) continue;
+      const a = new Actor(tx, ty);
+      a.speed = 1;
+      a.wait = random() * 2000;
+      addActor(a);
+      n++;
+    }
+  }
+  
+  // Crowd NPCs take a step in a random direction every so often
+  const HEADINGS = [[0, 1], [-1, 0], [1, 0], [0, -1]];
+  function wander(a, dt) {
+    a.wait -= dt;
+    if (a.moving || a.wait > 0) return;
+    a.wait = 500 + random() * 2000;
+    const [dx, dy] = HEADINGS[Math.floor(random() * 4)];
+    a.tryMove(dx, dy);
+  }
   
   // ============================================================================
   // INPUT HANDLING
@@ -969,8 +1676,7 @@ script_js = r"""/* GBA-Style RPG with Pokémon Emerald-like Graphics
   
   addEventListener('keydown', e => {
     const k = e.key.toLowerCase();
-    if (['arrowup', 'arrowdown', 'arrowleft', 'arrowright', 
-         'w', 'a', 's', 'd', 'z', 'enter', 'p', 'r'].includes(k)) {
+    if (GAME_KEYS.includes(k)) {
       e.preventDefault();
     }
     keys.add(k);
@@ -1016,6 +1722,16 @@ script_js = r"""/* GBA-Style RPG with Pokémon Emerald-like Graphics
     });
   }
   
+  // Typewriter effect, once per simulation tick
+  function typeDialogue() {
+    if (!dlg.open) return;
+    const text = dlg.lines[dlg.page];
+    if (dlg.shown < text.length) {
+      dlg.shown = Math.min(text.length, dlg.shown + dlg.speed);
+      if (dlg.shown === text.length) dlg.hold = true;
+    }
+  }
+  
   function advanceDialogue() {
     if (!dlg.open) return;
     
@@ -1031,7 +1747,8 @@ script_js = r"""/* GBA-Style RPG with Pokémon Emerald-like Graphics
     }
   }
   
-  function facingNPC() {
+  // The actor with dialogue on (or walking to) the tile the player faces
+  function facingActor() {
     let fx = player.tx;
     let fy = player.ty;
     
@@ -1040,7 +1757,11 @@ script_js = r"""/* GBA-Style RPG with Pokémon Emerald-like Graphics
     else if (player.dir === DIR.L) fx--;
     else if (player.dir === DIR.R) fx++;
     
-    return fx === npc.tx && fy === npc.ty;
+    // Actors are indexed by pixel position, up to a tile from their target
+    for (const a of actorsNear((fx - 1) * TILE, (fy - 1) * TILE, (fx + 1) * TILE, (fy + 1) * TILE)) {
+      if (a.dialogue && a.tx === fx && a.ty === fy) return a;
+    }
+    return null;
   }
   
   // ============================================================================
@@ -1053,8 +1774,8 @@ script_js = r"""/* GBA-Style RPG with Pokémon Emerald-like Graphics
     const vw = VIEW_W * TILE;
     const vh = VIEW_H * TILE;
     
-    camera.x = Math.floor(player.x + player.w / 2 - vw / 2);
-    camera.y = Math.floor(player.y + player.h / 2 - vh / 2);
+    camera.x = Math.floor(player.drawX + player.w / 2 - vw / 2);
+    camera.y = Math.floor(player.drawY + player.h / 2 - vh / 2);
     
     camera.x = Math.max(0, Math.min(camera.x, W * TILE - vw));
     camera.y = Math.max(0, Math.min(camera.y, H * TILE - vh));
@@ -1064,83 +1785,173 @@ script_js = r"""/* GBA-Style RPG with Pokémon Emerald-like Graphics
   // RENDERING
   // ============================================================================
   
-  let waterTimer = 0;
-  let grassTimer = 0;
+  // Tile animations from the build (TILE_ANIMATIONS in
+  // create_gba_emerald.py): a map tile that is one of an entry's frames shows
+  // frames[floor(animClock / duration) % frames.length]. Resolved once per
+  // frame into tileRemap, so animated tiles cost the same as static ones.
+  const ANIMATIONS = BUILD.animations || [];
+  const ANIMATED = new Set(ANIMATIONS.flatMap(a => a.frames));
+  const tileRemap = new Uint8Array(256).map((_, id) => id);
+  let animClock = 0;
   
-  function drawTile(id, sx, sy) {
-    const cols = Math.floor(assets.tileset.width / TILE);
-    let useId = id;
-    
-    // Animate water
-    if (id === T.WATER0 || id === T.WATER1) {
-      useId = Math.floor(waterTimer / 400) % 2 ? T.WATER1 : T.WATER0;
+  // Resolve the current frames; true if any tile changed frame
+  function updateTileAnimations() {
+    let changed = false;
+    for (const { frames, duration } of ANIMATIONS) {
+      const frame = frames[Math.floor(animClock / duration) % frames.length];
+      for (const id of frames) {
+        if (tileRemap[id] !== frame) {
+          tileRemap[id] = frame;
+          changed = true;
+        }
+      }
     }
-    
-    // Animate tall grass
-    if (id === T.TALL0 || id === T.TALL1) {
-      useId = Math.floor(grassTimer / 300) % 2 ? T.TALL1 : T.TALL0;
+    return changed;
+  }
+  
+  // Tile id actually drawn for map tile id right now
+  function tileFrame(id) {
+    return tileRemap[id];
+  }
+  
+  // ---- Map chunk cache ----
+  // Both map layers are cached as CHUNK×CHUNK-tile chunks (a canvas, or a
+  // surface in framebuffer mode), built the first time they come into view
+  // with the world chunks under them resident, and dropped with those.
+  // A frame blits the few visible chunks; animated cells are redrawn in
+  // place only when their frame changes.
+  const CHUNK = 16;
+  const CHUNK_PX = CHUNK * TILE;
+  const chunkCache = { baseTiles: new Map(), overTiles: new Map() };
+  
+  function invalidateChunks() {
+    chunkCache.baseTiles.clear();
+    chunkCache.overTiles.clear();
+  }
+  
+  // Draw tile id into cell (tx, ty) of a chunk of layer sheet
+  function drawChunkCell(chunk, sheet, tx, ty, id) {
+    const tileX = (id % tileCols) * TILE;
+    const tileY = Math.floor(id / tileCols) * TILE;
+    const x = tx * TILE, y = ty * TILE;
+    
+    if (chunk.surface) {
+      copyRect(surfaces[sheet], tileX, tileY, TILE, TILE, chunk.surface, x, y);
+      return;
     }
-    
-    const tileX = (useId % cols) * TILE;
-    const tileY = Math.floor(useId / cols) * TILE;
-    
-    g.drawImage(
-      assets.tileset,
-      tileX, tileY, TILE, TILE,
-      sx, sy, TILE, TILE
-    );
-    
-    // Subtle highlight for depth
-    g.globalAlpha = 0.08;
-    g.fillStyle = '#ffffff';
-    g.fillRect(sx, sy, TILE, 2);
-    g.globalAlpha = 1;
+    chunk.ctx.clearRect(x, y, TILE, TILE);
+    chunk.ctx.drawImage(assets[sheet], tileX, tileY, TILE, TILE, x, y, TILE, TILE);
   }
   
-  function drawMap() {
-    const stx = Math.floor(camera.x / TILE);
-    const sty = Math.floor(camera.y / TILE);
-    const offX = -(camera.x % TILE);
-    const offY = -(camera.y % TILE);
-    
-    for (let ty = 0; ty <= VIEW_H; ty++) {
-      for (let tx = 0; tx <= VIEW_W; tx++) {
-        const mx = stx + tx;
-        const my = sty + ty;
-        
-        if (mx >= 0 && my >= 0 && mx < W && my < H) {
-          const id = base[my][mx];
-          drawTile(id, tx * TILE + offX, ty * TILE + offY);
+  function buildChunk(sheet, cx, cy, cw, ch) {
+    const layer = sheet === 'baseTiles' ? 'base' : 'over';
+    const chunk = {
+      w: cw * TILE,
+      h: ch * TILE,
+      empty: true,
+      animated: [],   // {tx, ty, id, frame} per animated cell
+      translucent: [] // tx, ty pairs of overlay cells needing a blend settle
+    };
+    
+    if (backend === 'framebuffer') {
+      const n = chunk.w * chunk.h;
+      chunk.surface = {
+        w: chunk.w, h: chunk.h,
+        px: new Uint16Array(n), alpha: new Uint8Array(n),
+        opaque: sheet === 'baseTiles'
+      };
+    } else {
+      chunk.canvas = createCanvas();
+      chunk.canvas.width = chunk.w;
+      chunk.canvas.height = chunk.h;
+      chunk.ctx = chunk.canvas.getContext('2d');
+    }
+    
+    for (let ty = 0; ty < ch; ty++) {
+      for (let tx = 0; tx < cw; tx++) {
+        const x = cx * CHUNK + tx, y = cy * CHUNK + ty;
+        const source = chunkAt(x, y);
+        const id = source[layer][(y % world.size) * source.w + x % world.size];
+        if (id === EMPTY) continue;
+        const frame = tileFrame(id);
+        drawChunkCell(chunk, sheet, tx, ty, frame);
+        chunk.empty = false;
+        if (ANIMATED.has(id)) chunk.animated.push({ tx, ty, id, frame });
+        if (sheet === 'overTiles' && assets.translucent && assets.translucent[id]) {
+          chunk.translucent.push(tx, ty);
         }
       }
     }
+    return chunk;
   }
   
-  function drawOverlay() {
-    const stx = Math.floor(camera.x / TILE);
-    const sty = Math.floor(camera.y / TILE);
-    const offX = -(camera.x % TILE);
-    const offY = -(camera.y % TILE);
-    
-    for (let ty = 0; ty <= VIEW_H; ty++) {
-      for (let tx = 0; tx <= VIEW_W; tx++) {
-        const mx = stx + tx;
-        const my = sty + ty;
+  // Cached chunk (cx, cy) of a layer with its animated cells up to date;
+  // null while part of it is still streaming in
+  function getChunk(sheet, cx, cy) {
+    const cache = chunkCache[sheet];
+    const key = cy * Math.ceil(W / CHUNK) + cx;
+    let chunk = cache.get(key);
+    if (!chunk) {
+      const cw = Math.min(CHUNK, W - cx * CHUNK);
+      const ch = Math.min(CHUNK, H - cy * CHUNK);
+      if (!isResident(cx * CHUNK, cy * CHUNK, cx * CHUNK + cw - 1, cy * CHUNK + ch - 1)) return null;
+      chunk = buildChunk(sheet, cx, cy, cw, ch);
+      cache.set(key, chunk);
+    }
+    for (const cell of chunk.animated) {
+      const frame = tileFrame(cell.id);
+      if (frame !== cell.frame) {
+        drawChunkCell(chunk, sheet, cell.tx, cell.ty, frame);
+        cell.frame = frame;
+        markDirty(cx * CHUNK_PX + cell.tx * TILE - camera.x, cy * CHUNK_PX + cell.ty * TILE - camera.y,
+                  TILE, TILE);
+      }
+    }
+    return chunk;
+  }
+  
+  // Blit the chunks of a layer that intersect the view
+  function drawLayer(sheet) {
+    const cx0 = Math.max(0, Math.floor(camera.x / CHUNK_PX));
+    const cy0 = Math.max(0, Math.floor(camera.y / CHUNK_PX));
+    const cx1 = Math.min(Math.ceil(W / CHUNK) - 1, Math.floor((camera.x + BASE_W - 1) / CHUNK_PX));
+    const cy1 = Math.min(Math.ceil(H / CHUNK) - 1, Math.floor((camera.y + BASE_H - 1) / CHUNK_PX));
+    
+    for (let cy = cy0; cy <= cy1; cy++) {
+      for (let cx = cx0; cx <= cx1; cx++) {
+        const chunk = getChunk(sheet, cx, cy);
+        if (!chunk || chunk.empty) continue;
+        const x = cx * CHUNK_PX - camera.x;
+        const y = cy * CHUNK_PX - camera.y;
         
-        if (mx >= 0 && my >= 0 && mx < W && my < H) {
-          const id = over[my][mx];
-          if (id >= 0) {
-            drawTile(id, tx * TILE + offX, ty * TILE + offY);
-          }
+        if (backend === 'framebuffer') {
+          blit(chunk.surface, 0, 0, chunk.w, chunk.h, x, y);
+          continue;
+        }
+        g.drawImage(chunk.canvas, x, y);
+        for (let i = 0; i < chunk.translucent.length; i += 2) {
+          markBlend(x + chunk.translucent[i] * TILE, y + chunk.translucent[i + 1] * TILE, TILE, TILE);
         }
       }
     }
   }
   
+  function drawMap() {
+    drawLayer('baseTiles');
+  }
+  
+  function drawOverlay() {
+    drawLayer('overTiles');
+  }
+  
   function drawShadow(actor) {
-    const sx = Math.floor(actor.x - camera.x) + 8;
-    const sy = Math.floor(actor.y - camera.y) + 16;
+    const sx = Math.floor(actor.drawX - camera.x) + 8;
+    const sy = Math.floor(actor.drawY - camera.y) + 16;
     
+    if (backend === 'framebuffer') {
+      blit(surfaces.shadow, 0, 0, 12, 6, sx - 6, sy - 3);
+      return;
+    }
     g.save();
     g.globalAlpha = 0.3;
     g.fillStyle = '#000000';
@@ -1152,13 +1963,20 @@ script_js = r"""/* GBA-Style RPG with Pokémon Emerald-like Graphics
   
   function drawActor(actor, sprite) {
     const fw = 16, fh = 24;
-    const sx = Math.floor(actor.x - camera.x);
-    const sy = Math.floor(actor.y - camera.y - 8);
+    const sx = Math.floor(actor.drawX - camera.x);
+    const sy = Math.floor(actor.drawY - camera.y - 8);
+    
+    // Sprite plus shadow below it
+    if (backend === 'canvas') markBlend(sx, sy, fw, fh + 3);
     
     // Draw shadow
     drawShadow(actor);
     
     // Draw sprite
+    if (backend === 'framebuffer') {
+      blit(surfaces.player, actor.frame * fw, actor.dir * fh, fw, fh, sx, sy);
+      return;
+    }
     g.drawImage(
       sprite,
       actor.frame * fw, actor.dir * fh, fw, fh,
@@ -1195,18 +2013,13 @@ script_js = r"""/* GBA-Style RPG with Pokémon Emerald-like Graphics
     const y = BASE_H - boxH - margin;
     const w = BASE_W - margin * 2;
     const h = boxH;
+    markBlend(x, y, w, h);
     
     // Draw panel
     drawPanel9(x, y, w, h);
     
-    // Typewriter effect
-    const text = dlg.lines[dlg.page];
-    if (dlg.shown < text.length) {
-      dlg.shown = Math.min(text.length, dlg.shown + dlg.speed);
-      if (dlg.shown === text.length) dlg.hold = true;
-    }
-    
     // Draw text
+    const text = dlg.lines[dlg.page];
     g.save();
     g.beginPath();
     g.rect(x + 10, y + 8, w - 20, h - 16);
@@ -1263,9 +2076,33 @@ script_js = r"""/* GBA-Style RPG with Pokémon Emerald-like Graphics
   // GAME LOOP
   // ============================================================================
   
+  // Fixed timestep: the simulation advances in STEP ms ticks (speeds and
+  // timers are tuned for 60 per second), as many per display frame as the
+  // elapsed time covers, and actors are drawn interpolated between the last
+  // two ticks. Stalls longer than MAX_LAG are not caught up.
+  const STEP = 1000 / 60;
+  const MAX_LAG = 250;
   let last = performance.now();
+  let lag = 0;
+  let saveTimer = 0;
   let paused = false;
   
+  function snapshotActors() {
+    for (const a of actors) {
+      a.prevX = a.x;
+      a.prevY = a.y;
+    }
+  }
+  
+  // alpha: fraction of a tick elapsed since the last one
+  function interpolateActors(alpha) {
+    for (const a of actors) {
+      a.drawX = a.prevX + (a.x - a.prevX) * alpha;
+      a.drawY = a.prevY + (a.y - a.prevY) * alpha;
+    }
+    focusCamera();
+  }
+  
   function update(dt) {
     // Handle pause
     if (justPressed(['p'])) {
@@ -1297,64 +2134,174 @@ script_js = r"""/* GBA-Style RPG with Pokémon Emerald-like Graphics
     
     // Interaction
     if (justPressed(['z', 'enter'])) {
-      if (facingNPC()) {
-        startDialogue(npc.dialogue);
+      const other = facingActor();
+      if (other) {
+        startDialogue(other.dialogue);
       }
     }
     
     // Reset
     if (justPressed(['r'])) {
-      player.tx = 5;
-      player.ty = 5;
-      player.x = 5 * TILE;
-      player.y = 5 * TILE;
+      storage.removeItem(SAVE_KEY);
+      player.tx = START[0];
+      player.ty = START[1];
+      player.x = player.prevX = START[0] * TILE;
+      player.y = player.prevY = START[1] * TILE;
       player.dir = DIR.D;
       player.moving = false;
+      placeActor(player);
     }
     
     // Update entities
-    player.update(dt);
-    npc.update(dt);
+    for (let i = 0; i < actors.length; i++) {
+      const a = actors[i];
+      if (a.wait !== undefined) wander(a, dt);
+      a.update(dt);
+    }
     
-    // Update timers
-    waterTimer += dt;
-    grassTimer += dt;
+    // Advance the tile animation clock
+    animClock += dt;
     
-    // Update camera
-    focusCamera();
+    // Auto-save
+    saveTimer += dt;
+    if (saveTimer > 2000) {
+      saveTimer = 0;
+      saveGame();
+    }
+  }
+  
+  function saveGame() {
+    storage.setItem(SAVE_KEY, JSON.stringify({ tx: player.tx, ty: player.ty, dir: player.dir }));
+  }
+  
+  // ---- Dirty rectangles ----
+  // The last presented frame as a key plus rectangle per item (visible
+  // actors, dialogue box). A frame whose keys all match, with no tile
+  // animation step, is skipped; while the camera holds still, only the
+  // rectangles of changed items (old and new place, or where an actor left
+  // the view) and of animated cells that changed frame are converted,
+  // scanlined and upscaled.
+  let shownView = null;
+  const dirtyRects = []; // disjoint [x, y, w, h] in backbuffer pixels
+  const DIALOGUE_RECT = [8, BASE_H - 64, BASE_W - 16, 56];
+  
+  // Add a rectangle, merged with every one it overlaps or touches
+  function markDirty(x, y, w, h) {
+    let x0 = Math.max(0, x), y0 = Math.max(0, y);
+    let x1 = Math.min(BASE_W, x + w), y1 = Math.min(BASE_H, y + h);
+    if (x1 <= x0 || y1 <= y0) return;
+    for (let i = 0; i < dirtyRects.length; i++) {
+      const [rx, ry, rw, rh] = dirtyRects[i];
+      if (rx <= x1 && x0 <= rx + rw && ry <= y1 && y0 <= ry + rh) {
+        x0 = Math.min(x0, rx);
+        y0 = Math.min(y0, ry);
+        x1 = Math.max(x1, rx + rw);
+        y1 = Math.max(y1, ry + rh);
+        dirtyRects.splice(i, 1);
+        i = -1; // the grown rectangle may reach earlier ones
+      }
+    }
+    dirtyRects.push([x0, y0, x1 - x0, y1 - y0]);
+  }
+  
+  function captureView() {
+    const shown = new Map(); // actor -> item
+    for (const a of visibleActors()) {
+      const x = Math.floor(a.drawX - camera.x);
+      const y = Math.floor(a.drawY - camera.y - 8);
+      // row: a change of depth order repaints where sprites overlap
+      shown.set(a, { key: `${x},${y},${a.frame},${a.dir},${a.row}`, rect: [x, y, 16, 27] }); // with shadow
+    }
+    const blink = dlg.hold && Math.floor(Date.now() / 400) % 2 === 0;
+    const items = [{
+      key: dlg.open ? `${dlg.page},${dlg.shown},${blink}` : '',
+      rect: DIALOGUE_RECT
+    }];
+    return { camera: `${camera.x},${camera.y}`, world: world.version, paused, actors: shown, items };
   }
   
-  function render() {
+  function markChanged(item, prev) {
+    if (prev && item.key === prev.key) return;
+    if (prev) markDirty(...prev.rect);
+    markDirty(...item.rect);
+  }
+  
+  // How to present the next frame: 'full', 'partial' (dirtyRects) or 'skip';
+  // animated: tile animations stepped, so visible animated cells will mark
+  // themselves dirty while drawing
+  function planFrame(animated) {
+    const view = captureView();
+    const prev = shownView;
+    shownView = view;
+    dirtyRects.length = 0;
+    if (!prev || view.camera !== prev.camera || view.world !== prev.world ||
+        view.paused !== prev.paused) return 'full';
+    
+    view.actors.forEach((item, a) => markChanged(item, prev.actors.get(a)));
+    prev.actors.forEach((item, a) => {
+      if (!view.actors.has(a)) markDirty(...item.rect);
+    });
+    view.items.forEach((item, i) => markChanged(item, prev.items[i]));
+    if (!dirtyRects.length && !animated) return 'skip';
+    if (paused) return 'full'; // the overlay is drawn over the whole screen
+    // drawDialogue repaints the whole box, so present all of it
+    if (dlg.open) markDirty(...DIALOGUE_RECT);
+    return 'partial';
+  }
+  
+  function render(full = true) {
     // Clear
-    g.fillStyle = '#000000';
-    g.fillRect(0, 0, BASE_W, BASE_H);
+    if (backend === 'framebuffer') {
+      fb.fill(0);
+    } else {
+      g.fillStyle = '#000000';
+      g.fillRect(0, 0, BASE_W, BASE_H);
+    }
     
     // Draw layers
     drawMap();
     
-    // Draw entities (sorted by Y)
-    const entities = [npc, player].sort((a, b) => a.y - b.y);
-    entities.forEach(e => {
+    // Draw the actors in view, in depth order
+    for (const e of visibleActors()) {
       drawActor(e, assets.player);
-    });
+    }
     
     // Draw overlay (tree tops, etc.)
     drawOverlay();
     
+    // The framebuffer holds the whole world; UI below is drawn on top of it
+    if (backend === 'framebuffer') presentFramebuffer(full);
+    
     // Draw UI
     drawDialogue();
     
     // Apply GBA post-processing
-    let img = g.getImageData(0, 0, BASE_W, BASE_H);
-    g.putImageData(quantizeBGR555(img), 0, 0);
+    if (quantizeMode === 'frame') {
+      let img = g.getImageData(0, 0, BASE_W, BASE_H);
+      g.putImageData(quantizeBGR555(img), 0, 0);
+    } else {
+      settleBlendRects();
+    }
+    blendRects.length = 0;
     
-    // Apply scanlines
-    g.drawImage(scanlines, 0, 0);
+    // Apply scanlines (a partial framebuffer frame replaced only the dirty
+    // rects; the canvas path redrew everything)
+    if (full || backend === 'canvas') {
+      g.drawImage(scanlines, 0, 0);
+    } else {
+      for (const [x, y, w, h] of dirtyRects) g.drawImage(scanlines, x, y, w, h, x, y, w, h);
+    }
     
     // Scale to display
     sctx.imageSmoothingEnabled = false;
-    sctx.clearRect(0, 0, screen.width, screen.height);
-    sctx.drawImage(buf, 0, 0, screen.width, screen.height);
+    if (full) {
+      sctx.clearRect(0, 0, screen.width, screen.height);
+      sctx.drawImage(buf, 0, 0, screen.width, screen.height);
+    } else {
+      for (const [x, y, w, h] of dirtyRects) {
+        sctx.drawImage(buf, x, y, w, h, x * SCALE, y * SCALE, w * SCALE, h * SCALE);
+      }
+    }
     
     // Draw pause overlay
     if (paused) {
@@ -1372,13 +2319,22 @@ script_js = r"""/* GBA-Style RPG with Pokémon Emerald-like Graphics
   }
   
   function loop(ts) {
-    const dt = Math.min(32, ts - last);
+    lag += Math.min(MAX_LAG, ts - last);
     last = ts;
     
-    update(dt);
-    render();
+    while (lag >= STEP) {
+      snapshotActors();
+      update(STEP);
+      typeDialogue();
+      lag -= STEP;
+    }
+    interpolateActors(lag / STEP);
+    streamWorld();
+    
+    const frame = planFrame(updateTileAnimations());
+    if (frame !== 'skip') render(frame === 'full');
     
-    requestAnimationFrame(loop);
+    requestFrame(loop);
   }
   
   // ============================================================================
@@ -1386,8 +2342,14 @@ script_js = r"""/* GBA-Style RPG with Pokémon Emerald-like Graphics
   // ============================================================================
   
   (async () => {
-    await loadAssets();
-    requestAnimationFrame(loop);
+    await Promise.all([loadAssets(), loadWorld()]);
+    spawnCrowd(Number(params.get('crowd')) || 0);
+    requestFrame(loop);
+    
+    // Save when the page unloads or is hidden; in the worker the page
+    // forwards those as 'save' events
+    if (IN_WORKER) addEventListener('save', saveGame);
+    else onPageLeave(saveGame);
   })();
 })();
 """
@@ -1401,6 +2363,12 @@ Bu sürüm, **Pokémon Emerald** kalitesinde görsel iyileştirmeler içerir:
 
 - **240×160 Native GBA Çözünürlük**: 4x nearest-neighbor ölçekleme
 - **15-bit BGR555 Renk Paleti**: Otantik GBA renk derinliği
+- **Framebuffer Renderer**: Dünya 15-bit typed-array framebuffer'da oluşturulur ve kare başına tek `putImageData` ile çizilir (düz canvas çizimi için URL'ye `?renderer=canvas` ekleyin)
+- **Akışlı Dünya**: Harita 32×32 karolik parça dosyaları ve bir indeks olarak paketlenir; yalnızca kameranın çevresindeki parçalar indirilip bellekte tutulur (sınırlı bir LRU), yürüme yönündeki parçalar önceden getirilir; böylece dünya boyutu yükleme süresini etkilemez
+- **Tiled Haritaları**: Demo haritası yerine bir [Tiled](https://www.mapeditor.org/) haritası (TMX veya JSON) için `python -m gba_build --map kasaba.tmx` ile derleyin: `over` katmanı ağaç tepelerine, `collision` katmanı ve `solid` karo özellikleri çarpışma katmanına dönüşür; `npc`/`player` nesneleri karakterleri yerleştirir (`player` nesnesi yoksa oyuncu (5, 5)'e en yakın boş karoda başlar)
+- **Kalabalıklar**: Karakterler ızgara tabanlı bir uzamsal indekste tutulur; yalnızca ekrandakiler derinliğe göre sıralanıp çizilir (5.000 dolaşan NPC için URL'ye `?crowd=5000` ekleyin)
+- **Worker Rendering**: URL'ye `?worker=1` ekleyerek oyun döngüsü ve çizim bir Web Worker'da `OffscreenCanvas` üzerinde çalışır; sayfa yalnızca tuş olaylarını iletir ve kayıtları saklar (`OffscreenCanvas` desteklenmiyorsa yok sayılır)
+- **Otomatik Kayıt**: Oyuncunun konumu ve yönü birkaç saniyede bir, sayfa kapanırken veya gizlenirken localStorage'a kaydedilir; <kbd>R</kbd> kaydı siler ve başlangıca döner
 - **Zengin Prosedürel Tileset**: 
   - Çoklu çimen varyantları
   - Detaylı toprak yollar
@@ -1429,6 +2397,8 @@ Bu sürüm, **Pokémon Emerald** kalitesinde görsel iyileştirmeler içerir:
    - Branch: `main` → `/ (root)`
 4. `https://<kullanıcı-adı>.github.io/<repo-adı>/` adresinden erişin
 
+Betik, stil ve asset dosyalarının adları içeriklerinin hash'ini taşır (bkz. `asset-manifest.json`), böylece yeni bir derleme asla eski kodu sunmaz. `_headers` dosyasını okuyan sunucular (Netlify, Cloudflare Pages) bu dosyaları kalıcı olarak önbelleğe alır; geri dönen oyuncular onları yeniden doğrulama isteği olmadan yükler. GitHub Pages `_headers` dosyasını yok sayar ve kendi kısa önbellek süresini kullanır; orada geri dönen oyuncular her dosyayı yine yeniden doğrular.
+
 ## 🎨 Özel Grafikler
 
 `assets/` klasörüne kendi PNG dosyalarınızı ekleyebilirsiniz:
@@ -1459,29 +2429,6 @@ Bu bir scaffold/template projesidir. Kendi projelerinizde özgürce kullanabilir
 # .nojekyll file
 nojekyll = "# GitHub Pages'in dosyaları olduğu gibi sunmasını sağlar.\n"
 
-# Write all files
-print(f"Creating GBA Emerald RPG package in: {root}")
-
-with open(os.path.join(root, "index.html"), "w", encoding="utf-8") as f:
-    f.write(index_html)
-    print("✓ Created index.html")
-
-with open(os.path.join(root, "style.css"), "w", encoding="utf-8") as f:
-    f.write(style_css)
-    print("✓ Created style.css")
-
-with open(os.path.join(root, "script.js"), "w", encoding="utf-8") as f:
-    f.write(script_js)
-    print("✓ Created script.js")
-
-with open(os.path.join(root, "README.md"), "w", encoding="utf-8") as f:
-    f.write(readme_md)
-    print("✓ Created README.md")
-
-with open(os.path.join(root, ".nojekyll"), "w", encoding="utf-8") as f:
-    f.write(nojekyll)
-    print("✓ Created .nojekyll")
-
 # Create assets README
 assets_readme = """# Assets Klasörü
 
@@ -1491,27 +2438,344 @@ assets_readme = """# Assets Klasörü
 - `player.png` - Karakter sprite sheet (16×24 per frame, 4 sütun × 4 satır)
 - `panel9.png` - 9-slice diyalog paneli (24×24, her dilim 8×8)
 
+`tileset.png` derleme sırasında prosedürel tileset'ten önceden oluşturulur.
+Derleme bu dosyaları tek bir `atlas0.png` sayfasında birleştirir ve oyun
+onu yükler; kendi dosyalarınızı derlemeye `--assets KLASÖR` ile verin.
+`world/` derlenmiş dünya haritasıdır:
+`index.bin` ve parça başına bir dosya (taban ve üst katman, karo başına bir
+bayt, ardından çarpışma katmanı).
+
 Bu dosyalar yoksa oyun prosedürel grafikler kullanır.
 """
 
-with open(os.path.join(assets, "README.md"), "w", encoding="utf-8") as f:
-    f.write(assets_readme)
-    print("✓ Created assets/README.md")
-
-# Create ZIP file
-zip_path = "/workspace/gba_rpg_emerald.zip"
-with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as z:
-    for folder, _, files in os.walk(root):
-        for name in files:
-            full = os.path.join(folder, name)
-            rel = os.path.relpath(full, root)
-            z.write(full, arcname=os.path.join("gba_rpg_emerald", rel))
+
+
+# ============================================================================
+# BUILD-TIME ASSET BAKING
+# ============================================================================
+
+# Emerald palette, read from the PAL table in script_js so the baked sheet and
+# the runtime fallback can never drift apart.
+PAL = dict(re.findall(r"(\w+): '(#[0-9A-Fa-f]{6})'",
+                      script_js[script_js.index("const PAL = {"):script_js.index("};", script_js.index("const PAL = {"))]))
+
+TILE = 16
+TILESET_COLS, TILESET_ROWS = 16, 2
+
+
+def draw_tileset():
+    """Rasterize the Emerald tileset; mirrors makeEmeraldTileset in script_js."""
+    c = raster.Canvas(TILESET_COLS * TILE, TILESET_ROWS * TILE)
+
+    def tile(ix, iy):
+        return c.view(ix * TILE, iy * TILE, TILE, TILE)
+
+    # Tiles 0-2: Grass variants with Emerald-style detail
+    for i in range(3):
+        g = tile(i, 0)
+        grad = raster.LinearGradient(0, 0, 0, TILE)
+        grad.add_color_stop(0, PAL["GRASS_LIGHT"])
+        grad.add_color_stop(1, PAL["GRASS_BASE"])
+        g.fill_rect(0, 0, TILE, TILE, grad)
+        for k in range(12):
+            g.fill_rect((k * 7 + i * 3) % TILE, (k * 11 + i * 5) % TILE, 1, 2, PAL["GRASS_BRIGHT"])
+        for x in range(1 + i % 2, TILE, 4):
+            g.fill_rect(x, 0, 1, TILE, PAL["GRASS_DARK"])
+        g.fill_rect((i * 5) % TILE, (i * 7) % TILE, 1, 1, PAL["GRASS_BRIGHT"])
+
+    # Tiles 3-5: Path variants with texture
+    for i in range(3, 6):
+        g = tile(i, 0)
+        g.fill_rect(0, 0, TILE, TILE, PAL["PATH_BASE"])
+        edge = raster.LinearGradient(0, 0, 0, TILE)
+        edge.add_color_stop(0, PAL["PATH_LIGHT"])
+        edge.add_color_stop(0.2, "transparent")
+        edge.add_color_stop(0.8, "transparent")
+        edge.add_color_stop(1, PAL["PATH_DARK"])
+        g.fill_rect(0, 0, TILE, TILE, edge)
+        for k in range(6):
+            g.fill_rect((k * 5 + i) % TILE, (k * 7 + i * 2) % TILE, 2, 1, PAL["PATH_DARK"])
+        for k in range(3):
+            g.fill_rect((k * 7 + i * 3) % TILE, (k * 5 + i) % TILE, 1, 1, PAL["PATH_BRIGHT"])
+
+    # Tile 6: Tree trunk
+    g = tile(6, 0)
+    trunk = raster.LinearGradient(6, 0, 10, 0)
+    trunk.add_color_stop(0, PAL["TREE_BARK"])
+    trunk.add_color_stop(0.5, PAL["TREE_TRUNK"])
+    trunk.add_color_stop(1, PAL["TREE_BARK"])
+    g.fill_rect(5, 6, 6, 10, trunk)
+    g.fill_rect(6, 8, 1, 3, PAL["TREE_TRUNK"])
+    g.fill_rect(9, 10, 1, 2, PAL["TREE_TRUNK"])
+    g.fill_rect(7, 13, 2, 1, PAL["TREE_TRUNK"])
+    g.fill_rect(4, 14, 8, 2, PAL["TREE_BARK"])
+
+    # Tile 7: Tree top (overlap layer)
+    g = tile(7, 0)
+    canopy = raster.RadialGradient(8, 8, 2, 8, 8, 8)
+    canopy.add_color_stop(0, PAL["TREE_BRIGHT"])
+    canopy.add_color_stop(0.5, PAL["TREE_BASE"])
+    canopy.add_color_stop(1, PAL["TREE_SHADOW"])
+    g.fill_path(raster.Path().arc(8, 8, 7), canopy)
+    for x, y, w, h in [(4, 5, 3, 2), (9, 6, 3, 2), (6, 9, 2, 2)]:
+        g.fill_rect(x, y, w, h, PAL["TREE_LIGHT"])
+    g.fill_rect(5, 5, 1, 1, PAL["TREE_BRIGHT"])
+    g.fill_rect(10, 6, 1, 1, PAL["TREE_BRIGHT"])
+    g.fill_rect(5, 11, 6, 1, PAL["TREE_DARK"])
+
+    # Tiles 8-9: Water animation frames (second frame has shifted waves)
+    for ix, wave_y, foam in [(8, 4, [(3, 3), (12, 4), (7, 10)]),
+                             (9, 6, [(5, 5), (10, 3), (14, 11)])]:
+        g = tile(ix, 0)
+        water = raster.LinearGradient(0, 0, 0, TILE)
+        water.add_color_stop(0, PAL["WATER_LIGHT"])
+        water.add_color_stop(0.5, PAL["WATER_BASE"])
+        water.add_color_stop(1, PAL["WATER_DEEP"])
+        g.fill_rect(0, 0, TILE, TILE, water)
+        wave = (raster.Path()
+                .move_to(0, wave_y)
+                .quadratic_curve_to(8, wave_y - 2, 16, wave_y)
+                .line_to(16, wave_y + 2)
+                .quadratic_curve_to(8, wave_y, 0, wave_y + 2)
+                .close())
+        g.fill_path(wave, PAL["WATER_BRIGHT"])
+        for x, y in foam:
+            g.fill_rect(x, y, 1, 1, PAL["WATER_FOAM"])
+
+    # Tiles 10-11: Tall grass animation (second frame has swayed blades)
+    for ix, first_blade in [(10, 1), (11, 2)]:
+        g = tile(ix, 0)
+        g.fill_rect(0, 0, TILE, TILE, PAL["GRASS_SHADOW"])
+        for x in range(first_blade, TILE, 3):
+            blade = raster.LinearGradient(x, TILE, x, 0)
+            blade.add_color_stop(0, PAL["GRASS_DARK"])
+            blade.add_color_stop(0.5, PAL["GRASS_BASE"])
+            blade.add_color_stop(1, PAL["GRASS_LIGHT"])
+            g.fill_rect(x, 0, 1, TILE, blade)
+
+    # Tile 12: Flowers
+    g = tile(12, 0)
+    g.fill_rect(0, 0, TILE, TILE, PAL["GRASS_BASE"])
+    g.fill_rect(3, 4, 3, 3, PAL["FLOWER_RED"])
+    g.fill_rect(4, 5, 1, 1, PAL["FLOWER_PINK"])
+    g.fill_rect(10, 8, 3, 3, PAL["FLOWER_YELLOW"])
+    g.fill_rect(11, 9, 1, 1, PAL["FLOWER_WHITE"])
+    g.fill_rect(6, 11, 2, 2, PAL["FLOWER_WHITE"])
+    for x, y, h in [(4, 7, 3), (11, 11, 2), (6, 13, 2)]:
+        g.fill_rect(x, y, 1, h, PAL["GRASS_DARK"])
+
+    # Tile 16: Rock
+    g = tile(0, 1)
+    rock = raster.RadialGradient(8, 8, 2, 8, 8, 6)
+    rock.add_color_stop(0, "#A0A0A0")
+    rock.add_color_stop(0.5, "#808080")
+    rock.add_color_stop(1, "#606060")
+    outline = raster.Path().move_to(4, 10)
+    for x, y in [(6, 6), (10, 6), (12, 10), (10, 13), (6, 13)]:
+        outline.line_to(x, y)
+    g.fill_path(outline.close(), rock)
+    g.fill_rect(7, 7, 2, 2, "#B0B0B0")
+    g.fill_rect(4, 13, 8, 2, "rgba(0, 0, 0, 0.3)")
+
+    return c
+
+
+def bake_tileset():
+    """Return assets/tileset.png bytes, from the build cache when the inputs match."""
+    key = input_hash(
+        "emerald-tileset", raster.RASTER_VERSION, PAL,
+        [TILE, TILESET_COLS, TILESET_ROWS], inspect.getsource(draw_tileset))
+
+    def produce():
+        c = draw_tileset()
+        return encode_png(c.width, c.height, c.to_rgba8().tobytes())
+
+    return cached("tileset", key, produce)
+
+
+
+# Tile ids, read from the T table in script_js like PAL above.
+T = {name: int(tid) for name, tid in re.findall(
+    r"(\w+): (\d+)", script_js[script_js.index("const T = {"):script_js.index("};", script_js.index("const T = {"))])}
+
+# Solid tile ids, read from the SOLID set in script_js
+_solid_at = script_js.index("const SOLID = ")
+SOLID = frozenset(T[name] for name in re.findall(
+    r"T\.(\w+)", script_js[_solid_at:script_js.index(";", _solid_at)]))
+
+WORLD_W, WORLD_H = 48, 32
+
+# Tile roles for seeded worlds (gba_build/worldgen.py)
+WORLDGEN_TILES = {
+    "grass": [T["GRASS0"], T["GRASS1"], T["GRASS2"]],
+    "path": [T["PATH0"], T["PATH1"], T["PATH2"]],
+    "water": [T["WATER0"]],
+    "tall": [T["TALL0"], T["TALL1"]],
+    "tree": T["TRUNK"],
+    "tree_top": T["TOP"],
+    "flower": T["FLOWER"],
+    "rock": T["ROCK"],
+}
+# Kept clear in seeded worlds: the player's start and the NPC
+WORLD_CLEARING = (1, 1, 17, 15)
+
+# Tiled maps (gba_build/tiled.py) compile to the base and over layers
+MAP_IMPORT = {"tile": TILE, "solid": sorted(SOLID), "overlay": True}
+
+
+def build_world(world=None):
+    """Return the chunked assets/world/ files (base and over layers plus collision).
+
+    By default this is the demo map, mirroring generateWorld in script_js.
+    ``world`` (a variant's ``options["world"]``) asks for a seeded world
+    instead: ``width``, ``height``, ``seed`` and any worldgen parameters.
+    """
+    if world:
+        world = dict(world)
+        return chunk_files(*generate_world(
+            world.pop("width", WORLD_W), world.pop("height", WORLD_H), WORLDGEN_TILES, SOLID,
+            clearing=WORLD_CLEARING, **world))
+    w, h = WORLD_W, WORLD_H
+    base = bytearray(w * h)
+    over = bytearray([EMPTY]) * (w * h)
+
+    for y in range(h):
+        for x in range(w):
+            if x in (0, w - 1) or y in (0, h - 1):
+                tid = T["TRUNK"]
+            elif 12 < x < 18 and 8 < y < 14:
+                tid = T["WATER0"]
+            elif y == 12 and 3 < x < w - 3:
+                tid = T["PATH0"] + x % 3
+            elif x == 20 and 3 < y < h - 3:
+                tid = T["PATH0"] + y % 3
+            else:
+                tid = T["GRASS0"] + (x * 7 + y * 11) % 3
+            base[y * w + x] = tid
+
+    def on_grass(x, y):
+        return 0 <= x < w and 0 <= y < h and base[y * w + x] < T["PATH0"]
+
+    for x, y in [(7, 7), (8, 7), (9, 7), (24, 14), (25, 14), (26, 14),
+                 (30, 20), (31, 20), (10, 25), (11, 25)]:
+        if on_grass(x, y):
+            base[y * w + x] = T["FLOWER"]
+
+    for x in range(30, min(38, w)):
+        for y in range(6, min(12, h)):
+            if on_grass(x, y):
+                base[y * w + x] = T["TALL0"] if (x + y) % 2 else T["TALL1"]
+
+    for x in range(5, w - 5, 7):
+        for y in range(5, h - 5, 8):
+            if on_grass(x, y):
+                base[y * w + x] = T["TRUNK"]
+                if y > 0:
+                    over[(y - 1) * w + x] = T["TOP"]
+
+    for x, y in [(10, 5), (35, 8), (25, 25), (8, 18)]:
+        if on_grass(x, y):
+            base[y * w + x] = T["ROCK"]
+
+    return world_files(w, h, [base, over], collision_plane(base, SOLID))
+
+
+# Per-channel transfer of quantizeBGR555, applied to PNG assets at build time
+COLOR_TRANSFER = {}
+
+# Sheets loadAssets loads by name, packed into an atlas by the build when present
+ATLAS_SPRITES = {
+    "tileset": "assets/tileset.png",
+    "player": "assets/player.png",
+    "panel": "assets/panel9.png",
+}
+
+# Highlight along the top 2 rows of every tile, baked into the tileset by the
+# build's lighting stage (and by bakeLighting for the procedural fallback)
+TILE_LIGHTING = {
+    "tile": TILE,
+    "bands": [{"rows": [0, 2], "color": "#ffffff", "alpha": 0.08}],
+}
+
+# Tile animations: every map tile that is one of the frames cycles through
+# them, one frame per duration (ms). The frames are ordinary tileset tiles.
+TILE_ANIMATIONS = (
+    (("WATER0", "WATER1"), 400),
+    (("TALL0", "TALL1"), 300),
+)
+
+# One 2x2 period of the LCD overlay, as (x, y, w, h, alpha) black fills: the
+# scanline on even rows, then the sub-pixel grid
+LCD_FILLS = ((0, 0, 2, 1, 0.12), (1, 0, 1, 1, 0.06), (0, 1, 1, 1, 0.06))
+
+# Generator part of the runtime BUILD config
+BUILD_CONFIG = {
+    "lcd": lcd_pattern(2, 2, LCD_FILLS),
+    "lighting": TILE_LIGHTING["bands"],
+    "animations": [{"frames": [T[name] for name in frames], "duration": duration}
+                   for frames, duration in TILE_ANIMATIONS],
+}
+
+
+def render(variant):
+    """Return the package contents for ``variant`` (relative path -> text/bytes)."""
+    files = {
+        "index.html": index_html,
+        "style.css": style_css,
+        "script.js": script_js,
+        "README.md": readme_md,
+        ".nojekyll": nojekyll,
+        "assets/README.md": assets_readme,
+        **build_world(variant.options.get("world")),
+    }
+    # Ship a pre-rendered tileset so loadAssets takes the image path and the
+    # page skips makeEmeraldTileset; without numpy the runtime fallback is used.
+    if variant.options.get("bake_tileset", True):
+        if raster.HAVE_NUMPY:
+            files["assets/tileset.png"] = bake_tileset()
+        else:
+            warnings.warn("numpy not installed; tileset.png is not baked")
+    return files
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--out", default="/workspace",
+                        help="directory for the package folder and zip (default: /workspace)")
+    parser.add_argument("--archive-only", action="store_true",
+                        help="write only the zip, streamed from memory, without the package folder")
+    parser.add_argument("--no-minify", action="store_true",
+                        help="ship script.js, style.css and index.html unminified")
+    args = parser.parse_args(argv)
+
+    options = {"minify": False} if args.no_minify else {}
+    variant = builtin_variant("gba_rpg_emerald", args.out, tree=not args.archive_only, **options)
+    print(f"Creating GBA Emerald RPG package in: {variant.root}")
+
+    # Only outputs whose content changed since the last build are written,
+    # and the zip is rebuilt (straight from memory) only when some member changed.
+    result = build_variant(variant)
+    if variant.tree:
+        for rel, changed in result.results:
+            print(f"✓ Created {rel}" if changed else f"· Unchanged {rel}")
+    if result.report.get("minified") and not result.up_to_date:
+        print("\nKüçültme:")
+        for line in format_size_report(result.report["minified"]):
+            print(f"  {line}")
+
+    if result.up_to_date:
+        print(f"\n✅ GBA Emerald RPG paketi güncel, yeniden oluşturulmadı.")
+    else:
+        for rel in result.archived or []:
             print(f"  Added to zip: {rel}")
+        print(f"\n✅ GBA Emerald RPG paketi başarıyla oluşturuldu!")
+    print(f"📦 Dosya: {variant.archive}")
+    print(f"📏 Boyut: {os.path.getsize(variant.archive):,} bytes")
+    print("\n🎮 Kullanım:")
+    print("1. ZIP dosyasını çıkart")
+    print("2. index.html'i tarayıcıda aç")
+    print("3. Veya GitHub Pages'e deploy et")
+
 
-print(f"\n✅ GBA Emerald RPG paketi başarıyla oluşturuldu!")
-print(f"📦 Dosya: {zip_path}")
-print(f"📏 Boyut: {os.path.getsize(zip_path):,} bytes")
-print("\n🎮 Kullanım:")
-print("1. ZIP dosyasını çıkart")
-print("2. index.html'i tarayıcıda aç")
-print("3. Veya GitHub Pages'e deploy et")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Shared build library for the GBA-style RPG package generators.
+
+``build_variant`` turns a ``Variant`` (generator module, output root, archive
+path, options) into an output tree and/or a reproducible zip archive;
+``python -m gba_build`` builds many variants concurrently.
+"""
+
+from .manifest import MANIFEST_NAME, BuildManifest, content_hash, write_outputs
+from .archive import files_digest, write_archive, build_archive
+from .core import (
+    BUILD_CONFIG_MARKER, Variant, BuildResult, load_generator, render_variant,
+    inject_build_config, build_variant, build_variants,
+)
+from .variants import BUILTIN, builtin_variant, load_variants_file
+
+__all__ = [
+    "MANIFEST_NAME",
+    "BuildManifest",
+    "content_hash",
+    "write_outputs",
+    "files_digest",
+    "write_archive",
+    "build_archive",
+    "BUILD_CONFIG_MARKER",
+    "Variant",
+    "BuildResult",
+    "load_generator",
+    "render_variant",
+    "inject_build_config",
+    "build_variant",
+    "build_variants",
+    "BUILTIN",
+    "builtin_variant",
+    "load_variants_file",
+]
@@ -0,0 +1,79 @@
+"""
+Direct-to-archive packaging.
+
+Members are streamed from the in-memory outputs with ``writestr`` instead of
+re-walking and re-reading the tree from disk. Entries are sorted and carry a
+fixed timestamp and mode, so the same outputs always produce a byte-identical
+zip. The archive comment records a digest of the members and the generator
+version; an existing archive whose comment matches is left alone.
+"""
+
+import hashlib
+import os
+import zipfile
+
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+ARCHIVE_TAG = b"gba_build:"
+
+
+def _as_bytes(data):
+    return data.encode("utf-8") if isinstance(data, str) else data
+
+
+def files_digest(files, version):
+    """Digest identifying an archive of ``files`` built by ``version``."""
+    h = hashlib.sha256(version.encode("utf-8"))
+    for rel in sorted(files):
+        h.update(b"\n")
+        h.update(rel.encode("utf-8"))
+        h.update(b"\0")
+        h.update(hashlib.sha256(_as_bytes(files[rel])).digest())
+    return h.hexdigest()
+
+
+def archive_current(zip_path, digest):
+    """True if ``zip_path`` exists and was built from outputs with ``digest``."""
+    try:
+        with zipfile.ZipFile(zip_path) as z:
+            return z.comment == ARCHIVE_TAG + digest.encode("ascii")
+    except (OSError, zipfile.BadZipFile):
+        return False
+
+
+def write_archive(files, zip_path, prefix, digest):
+    """Write ``files`` into a reproducible zip at ``zip_path``.
+
+    The zip is written to a temporary file and renamed into place, so readers
+    never observe a partially written archive. Returns the archived relative
+    paths in archive order.
+    """
+    members = sorted(files)
+    tmp_path = f"{zip_path}.{os.getpid()}.tmp"
+    try:
+        with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as z:
+            for rel in members:
+                info = zipfile.ZipInfo(f"{prefix}/{rel}", date_time=ZIP_EPOCH)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.create_system = 3  # unix, so external_attr means the same everywhere
+                info.external_attr = 0o644 << 16
+                z.writestr(info, _as_bytes(files[rel]))
+            z.comment = ARCHIVE_TAG + digest.encode("ascii")
+        os.replace(tmp_path, zip_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return members
+
+
+def build_archive(files, zip_path, prefix, version):
+    """Archive ``files`` under ``prefix`` unless ``zip_path`` is already current.
+
+    Returns the archived relative paths, or ``None`` if the existing archive
+    was up to date.
+    """
+    digest = files_digest(files, version)
+    if archive_current(zip_path, digest):
+        return None
+    os.makedirs(os.path.dirname(os.path.abspath(zip_path)), exist_ok=True)
+    return write_archive(files, zip_path, prefix, digest)
@@ -0,0 +1,21 @@
+"""
+User-supplied assets: files dropped into an assets directory are shipped
+under ``assets/`` in the package, replacing baked files of the same name.
+"""
+
+import os
+
+
+def collect_assets(assets_dir):
+    """Return ``{"assets/<rel>": bytes}`` for every file under ``assets_dir``."""
+    files = {}
+    for folder, dirs, names in os.walk(assets_dir):
+        dirs.sort()
+        for name in sorted(names):
+            if name.startswith("."):
+                continue
+            full = os.path.join(folder, name)
+            rel = os.path.relpath(full, assets_dir).replace(os.sep, "/")
+            with open(full, "rb") as f:
+                files[f"assets/{rel}"] = f.read()
+    return files
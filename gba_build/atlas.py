@@ -0,0 +1,126 @@
+"""
+Sprite atlas: the runtime's image sheets packed into one or a few
+power-of-two PNGs, so loading them costs one request per atlas sheet instead
+of one per image. A generator names the sheets its runtime loads in
+``ATLAS_SPRITES``::
+
+    ATLAS_SPRITES = {"tileset": "assets/tileset.png", "player": "assets/player.png"}
+
+Those present in the package (baked or user-supplied) are shelf-packed into
+``assets/atlas<n>.png`` and removed; the stage runs after lighting and
+quantization, so the packed pixels are final. The manifest, which becomes
+``BUILD.atlas``, lists the sheets and, per sprite name, its source
+rectangle plus the path it was packed from::
+
+    {"sheets": ["assets/atlas0.png"],
+     "sprites": {"tileset": {"src": "assets/tileset.png", "sheet": 0,
+                             "x": 0, "y": 0, "w": 256, "h": 32}}}
+"""
+
+import warnings
+
+from .cache import cached, input_hash
+from .png import decode_png, encode_png, png_header
+
+MAX_SIZE = 1024
+ATLAS_PATH = "assets/atlas{}.png"
+
+
+def pack_atlas(files, sprites, max_size=MAX_SIZE):
+    """Pack the ``sprites`` (name -> path) present in ``files`` in place.
+
+    Results are cached by input hash. A sheet in a format the decoder cannot
+    read stays a separate file, with a warning. Returns the manifest, or
+    ``None`` when none of the sprites is present.
+    """
+    present = {}
+    sizes = {}
+    for name, rel in sprites.items():
+        if rel not in files:
+            continue
+        try:
+            sizes[name] = png_header(files[rel])[:2]
+        except ValueError as e:
+            warnings.warn(f"{rel}: {e}; left out of the atlas", stacklevel=2)
+            continue
+        present[name] = rel
+    if not present:
+        return None
+    names = sorted(present)
+    sizes = [sizes[name] for name in names]
+    sheets, places = pack_rects(sizes, max_size)
+
+    manifest = {"sheets": [], "sprites": {}}
+    for sheet, (width, height) in enumerate(sheets):
+        members = [(files[present[name]], places[i][1:]) for i, name in enumerate(names)
+                   if places[i][0] == sheet]
+        rel = ATLAS_PATH.format(sheet)
+        files[rel] = cached("atlas", input_hash("atlas", width, height, *(
+            part for data, at in members for part in (data, at))),
+            lambda: compose_sheet(width, height, members))
+        manifest["sheets"].append(rel)
+    for i, name in enumerate(names):
+        sheet, x, y = places[i]
+        w, h = sizes[i]
+        manifest["sprites"][name] = {"src": present[name], "sheet": sheet,
+                                     "x": x, "y": y, "w": w, "h": h}
+        del files[present[name]]
+    return manifest
+
+
+def compose_sheet(width, height, members):
+    """Encode a ``width`` x ``height`` PNG with each ``(png bytes, (x, y))`` copied in."""
+    rgba = bytearray(width * height * 4)
+    for data, (x, y) in members:
+        w, h, pixels = decode_png(data)
+        for row in range(h):
+            at = ((y + row) * width + x) * 4
+            rgba[at:at + w * 4] = pixels[row * w * 4:(row + 1) * w * 4]
+    return encode_png(width, height, rgba)
+
+
+def pack_rects(sizes, max_size=MAX_SIZE):
+    """Shelf-pack ``(w, h)`` rectangles into power-of-two sheets.
+
+    Each sheet is the smallest power-of-two size (squarer first) holding all
+    the rectangles left, or ``max_size`` square holding as many as fit.
+    Returns ``(sheets, places)``: each sheet's ``(width, height)`` and, per
+    rectangle, ``(sheet, x, y)``.
+    """
+    for w, h in sizes:
+        if w > max_size or h > max_size:
+            raise ValueError(f"a {w}x{h} sprite does not fit a {max_size}x{max_size} atlas")
+    # Tallest first keeps shelves tight
+    left = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0], i))
+    sheets, places = [], [None] * len(sizes)
+    while left:
+        for width, height in _pot_sizes(max_size):
+            placed = _shelf(sizes, left, width, height)
+            if len(placed) == len(left):
+                break
+        for i, (x, y) in placed.items():
+            places[i] = (len(sheets), x, y)
+        sheets.append((width, height))
+        left = [i for i in left if i not in placed]
+    return sheets, places
+
+
+def _pot_sizes(max_size):
+    sides = [1 << n for n in range(max_size.bit_length()) if 1 << n <= max_size]
+    return sorted(((w, h) for w in sides for h in sides),
+                  key=lambda wh: (wh[0] * wh[1], max(wh) // min(wh), -wh[0]))
+
+
+def _shelf(sizes, order, width, height):
+    placed = {}
+    x = y = shelf = 0
+    for i in order:
+        w, h = sizes[i]
+        if x + w > width:
+            x, y, shelf = 0, y + shelf, 0
+        if w > width or y + h > height:
+            continue
+        placed[i] = (x, y)
+        x += w
+        shelf = max(shelf, h)
+    return placed
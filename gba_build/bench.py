@@ -0,0 +1,261 @@
+"""
+Build benchmark: per-stage timings and artifact sizes, checked against budgets.
+
+Each selected variant is built ``--iterations`` times from scratch into a
+private temporary directory (fresh output tree, fresh archive, and a private
+artifact cache so the user's cache state does not skew results). Per run, the
+generator module is re-executed (``load``: the module-level string assembly),
+then the pipeline stages reported by ``build_variant`` are recorded
+(``render``, ``quantize``, ``minify``, ``tree`` writes, ``archive``, ...).
+The result is JSON: for every variant, min/median/max milliseconds per stage
+and the size of every output, the tree and the archive. ``--gzip`` and
+``--no-minify``, when given, override the options of every variant,
+variants-file ones included; otherwise each variant builds with its own.
+
+Regressions are reported, and the exit status is 1, when
+
+* a budget from ``--budgets FILE`` is exceeded: stage medians in ms and sizes
+  in bytes, per variant or for ``"*"``, e.g.
+  ``{"variants": {"*": {"stages": {"total": 500}, "sizes": {"archive": 40000}}}}``
+  (size keys are ``tree``, ``archive`` or an output path such as ``script.js``,
+  without its content fingerprint);
+* with ``--baseline FILE`` (an earlier result), a stage median or a size grew
+  by more than ``--tolerance`` (default 10%, or the budgets file's
+  ``"tolerance"``).
+
+    python -m gba_build.bench -n 10 -o bench.json
+    python -m gba_build.bench --baseline bench.json --budgets budgets.json
+"""
+
+import argparse
+import contextlib
+import dataclasses
+import importlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from .core import build_variant
+from .fingerprint import ASSET_MANIFEST, logical_path
+from .manifest import MANIFEST_NAME
+from .variants import BUILTIN, builtin_variant, load_variants_file
+
+BENCH_FORMAT = 1
+DEFAULT_TOLERANCE = 0.10
+
+
+def _summary(samples):
+    ms = [s * 1000 for s in samples]
+    return {"min": round(min(ms), 3), "median": round(statistics.median(ms), 3),
+            "max": round(max(ms), 3)}
+
+
+def _tree_sizes(root):
+    # Keyed by logical path, so fingerprinted outputs compare across builds
+    try:
+        with open(os.path.join(root, ASSET_MANIFEST), "r", encoding="utf-8") as f:
+            renamed = json.load(f)
+    except OSError:
+        renamed = {}
+    sizes = {}
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            rel = os.path.relpath(path, root).replace(os.sep, "/")
+            if rel != MANIFEST_NAME:
+                sizes[logical_path(renamed, rel)] = os.path.getsize(path)
+    return dict(sorted(sizes.items()))
+
+
+@contextlib.contextmanager
+def _cache_dir(path):
+    saved = os.environ.get("GBA_BUILD_CACHE")
+    os.environ["GBA_BUILD_CACHE"] = path
+    try:
+        yield
+    finally:
+        if saved is None:
+            os.environ.pop("GBA_BUILD_CACHE", None)
+        else:
+            os.environ["GBA_BUILD_CACHE"] = saved
+
+
+def bench_variant(variant, iterations, workdir, cold=False):
+    """Build ``variant`` ``iterations`` times under ``workdir``; returns its JSON entry.
+
+    The artifact cache lives in ``workdir`` for the duration of the call.
+    """
+    cache = os.path.join(workdir, "cache")
+    with _cache_dir(cache):
+        return _bench_runs(variant, iterations, workdir, cache, cold)
+
+
+def _bench_runs(variant, iterations, workdir, cache, cold):
+    samples = {}
+    sizes = {}
+    for i in range(iterations):
+        if cold:
+            shutil.rmtree(cache, ignore_errors=True)
+        run_dir = os.path.join(workdir, f"run{i}")
+        run = dataclasses.replace(
+            variant,
+            root=os.path.join(run_dir, variant.name),
+            archive=os.path.join(run_dir, f"{variant.name}.zip"),
+            tree=True,
+        )
+
+        started = time.perf_counter()
+        module = sys.modules.get(variant.generator)
+        if module is None:
+            importlib.import_module(variant.generator)
+        else:
+            importlib.reload(module)
+        timings = {"load": time.perf_counter() - started}
+        timings.update(build_variant(run).report["timings"])
+        timings["total"] = time.perf_counter() - started
+        for stage, seconds in timings.items():
+            samples.setdefault(stage, []).append(seconds)
+
+        files = _tree_sizes(run.root)
+        sizes = {"files": files, "tree": sum(files.values()),
+                 "archive": os.path.getsize(run.archive)}
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+    return {"stages": {stage: _summary(s) for stage, s in samples.items()}, "sizes": sizes}
+
+
+def run_benchmark(variants, iterations=5, cold=False):
+    """Benchmark ``variants``; returns the result document (see module docstring)."""
+    workdir = tempfile.mkdtemp(prefix="gba_build-bench.")
+    try:
+        results = {v.name: bench_variant(v, iterations, os.path.join(workdir, v.name), cold)
+                   for v in variants}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "format": BENCH_FORMAT,
+        "iterations": iterations,
+        "cold_cache": cold,
+        "python": platform.python_version(),
+        "variants": results,
+    }
+
+
+def _size(entry, key):
+    sizes = entry["sizes"]
+    return sizes[key] if key in ("tree", "archive") else sizes["files"].get(key)
+
+
+def check_budgets(result, budgets):
+    """Regressions of ``result`` against absolute ``budgets``; list of strings."""
+    regressions = []
+    rules = budgets.get("variants", {})
+    for name, entry in result["variants"].items():
+        for rule in (rules.get("*", {}), rules.get(name, {})):
+            for stage, limit in rule.get("stages", {}).items():
+                stat = entry["stages"].get(stage)
+                if stat is not None and stat["median"] > limit:
+                    regressions.append(
+                        f"{name}: stage {stage} took {stat['median']:.1f} ms, budget {limit} ms")
+            for key, limit in rule.get("sizes", {}).items():
+                size = _size(entry, key)
+                if size is not None and size > limit:
+                    regressions.append(f"{name}: {key} is {size:,} bytes, budget {limit:,}")
+    return regressions
+
+
+def check_baseline(result, baseline, tolerance):
+    """Regressions of ``result`` relative to an earlier ``baseline`` result."""
+    regressions = []
+    for name, entry in result["variants"].items():
+        before = baseline.get("variants", {}).get(name)
+        if before is None:
+            continue
+        for stage, stat in entry["stages"].items():
+            old = before["stages"].get(stage)
+            if old and stat["median"] > old["median"] * (1 + tolerance):
+                regressions.append(f"{name}: stage {stage} {old['median']:.1f} -> "
+                                   f"{stat['median']:.1f} ms (> {tolerance:.0%})")
+        keys = ["tree", "archive"] + sorted(entry["sizes"]["files"])
+        for key in keys:
+            new, old = _size(entry, key), _size(before, key)
+            if new is not None and old is not None and new > old * (1 + tolerance):
+                regressions.append(f"{name}: {key} {old:,} -> {new:,} bytes (> {tolerance:.0%})")
+    return regressions
+
+
+def _load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m gba_build.bench",
+        description="Benchmark the package build stages and check them against budgets.",
+    )
+    parser.add_argument("variants", nargs="*",
+                        help=f"built-in variants to benchmark ({', '.join(sorted(BUILTIN))}); "
+                             "default: all, unless --variants-file is given")
+    parser.add_argument("-f", "--variants-file", action="append", default=[],
+                        help="JSON file with additional variant definitions (repeatable)")
+    parser.add_argument("-n", "--iterations", type=int, default=5,
+                        help="builds per variant (default: 5)")
+    parser.add_argument("--cold", action="store_true",
+                        help="empty the artifact cache before every build")
+    parser.add_argument("--gzip", action="store_true", help="include the .gz precompression stage")
+    parser.add_argument("--no-minify", action="store_true", help="skip the minify stage")
+    parser.add_argument("--budgets", metavar="FILE", help="JSON budgets to enforce")
+    parser.add_argument("--baseline", metavar="FILE", help="earlier result to compare against")
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help=f"allowed growth over the baseline (default: {DEFAULT_TOLERANCE:.0%})")
+    parser.add_argument("-o", "--output", metavar="FILE", help="write the JSON result here")
+    args = parser.parse_args(argv)
+    if args.iterations < 1:
+        parser.error("--iterations must be at least 1")
+
+    options = {}
+    if args.no_minify:
+        options["minify"] = False
+    if args.gzip:
+        options["gzip"] = True
+    names = args.variants or ([] if args.variants_file else sorted(BUILTIN))
+    try:
+        variants = [builtin_variant(name, "dist", **options) for name in names]
+        for path in args.variants_file:
+            variants.extend(dataclasses.replace(v, options={**v.options, **options})
+                            for v in load_variants_file(path, "dist"))
+        budgets = _load_json(args.budgets) if args.budgets else {}
+        baseline = _load_json(args.baseline) if args.baseline else None
+    except KeyError as e:
+        parser.error(e.args[0])
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    result = run_benchmark(variants, args.iterations, args.cold)
+    tolerance = args.tolerance
+    if tolerance is None:
+        tolerance = budgets.get("tolerance", DEFAULT_TOLERANCE)
+    regressions = check_budgets(result, budgets)
+    if baseline is not None:
+        regressions += check_baseline(result, baseline, tolerance)
+    result["regressions"] = regressions
+
+    text = json.dumps(result, indent=2) + "\n"
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+    for line in regressions:
+        print(f"✗ {line}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
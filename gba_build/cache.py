@@ -0,0 +1,49 @@
+"""
+Content-addressed cache for expensive build artifacts (baked images, ...).
+
+Entries are keyed by a hash of everything that went into producing them, so a
+hit is always valid and nothing ever needs invalidating. The cache lives in
+``$GBA_BUILD_CACHE`` or ``~/.cache/gba_build``; a cache that cannot be
+written to only costs the speedup.
+"""
+
+import hashlib
+import json
+import os
+
+
+def cache_dir():
+    return os.environ.get("GBA_BUILD_CACHE") or os.path.join(
+        os.path.expanduser("~"), ".cache", "gba_build")
+
+
+def input_hash(*parts):
+    """Hash JSON-serializable ``parts`` (str and bytes are hashed verbatim)."""
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        elif not isinstance(part, (bytes, bytearray)):
+            part = json.dumps(part, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        h.update(hashlib.sha256(part).digest())
+    return h.hexdigest()
+
+
+def cached(namespace, key, produce):
+    """Return the bytes cached under ``namespace/key``, producing them on a miss."""
+    path = os.path.join(cache_dir(), namespace, key[:2], key)
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        pass
+    data = produce()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+    return data
@@ -0,0 +1,109 @@
+"""
+Command line entry point: build any number of variants in parallel.
+
+    python -m gba_build                          # all built-in variants into dist/
+    python -m gba_build gba_rpg_emerald -o out   # one variant
+    python -m gba_build -f skins.json -j 8       # variants from a JSON file
+    python -m gba_build --archive-only           # zips only, no output trees
+    python -m gba_build --gzip                   # plus .gz siblings for static hosts
+    python -m gba_build --world 4096x4096 --seed 7   # a seeded world instead of the demo map
+    python -m gba_build --map maps/town.tmx      # a Tiled map instead of the demo map
+"""
+
+import argparse
+import sys
+
+from .core import build_variants
+from .minify import format_size_report
+from .variants import BUILTIN, builtin_variant, load_variants_file
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m gba_build",
+        description="Build GBA RPG package variants concurrently.",
+    )
+    parser.add_argument("variants", nargs="*",
+                        help=f"built-in variants to build ({', '.join(sorted(BUILTIN))}); "
+                             "default: all, unless --variants-file is given")
+    parser.add_argument("-o", "--out", default="dist",
+                        help="directory for output trees and archives (default: dist)")
+    parser.add_argument("-f", "--variants-file", action="append", default=[],
+                        help="JSON file with additional variant definitions (repeatable)")
+    parser.add_argument("--archive-only", action="store_true",
+                        help="stream built-in variants straight into their zip, "
+                             "skip the output tree")
+    parser.add_argument("--assets", metavar="DIR",
+                        help="directory of user-supplied assets for built-in variants")
+    parser.add_argument("--no-minify", action="store_true",
+                        help="ship built-in variants' scripts, styles and pages unminified")
+    parser.add_argument("--no-fingerprint", action="store_true",
+                        help="keep built-in variants' file names instead of content-hashed ones")
+    parser.add_argument("--gzip", action="store_true",
+                        help="also emit pre-encoded .gz siblings and precompressed.json")
+    world = parser.add_mutually_exclusive_group()
+    world.add_argument("--world", metavar="WIDTHxHEIGHT",
+                       help="give built-in variants a seeded procedural world of this size "
+                            "instead of the demo map (needs numpy)")
+    world.add_argument("--map", metavar="PATH",
+                       help="give built-in variants this Tiled map (.tmx, .tmj or .json), "
+                            "its NPCs and player start instead of the demo map")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed for --world (default: 0)")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="worker processes (default: one per core)")
+    args = parser.parse_args(argv)
+
+    names = args.variants or ([] if args.variants_file else sorted(BUILTIN))
+    try:
+        options = {"assets_dir": args.assets} if args.assets else {}
+        if args.no_minify:
+            options["minify"] = False
+        if args.no_fingerprint:
+            options["fingerprint"] = False
+        if args.gzip:
+            options["gzip"] = True
+        if args.world:
+            options["world"] = _world_option(args.world, args.seed)
+        if args.map:
+            options["map"] = args.map
+        variants = [builtin_variant(name, args.out, tree=not args.archive_only, **options)
+                    for name in names]
+        for path in args.variants_file:
+            variants.extend(load_variants_file(path, args.out))
+    except KeyError as e:
+        parser.error(e.args[0])
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    failed = 0
+    try:
+        for variant, result, error in build_variants(variants, args.jobs):
+            if error:
+                failed += 1
+                print(f"✗ {variant.name}: {error}", file=sys.stderr)
+            elif result.up_to_date:
+                print(f"· {variant.name}: up to date")
+            else:
+                archived = "" if result.archived is None else ", archive rebuilt"
+                print(f"✓ {variant.name}: {len(result.changed)} file(s) written{archived}")
+                for stage, label in (("minified", "minify"), ("precompressed", "gzip")):
+                    if result.report.get(stage):
+                        print(f"  {label}:")
+                        for line in format_size_report(result.report[stage]):
+                            print(f"    {line}")
+    except ValueError as e:
+        parser.error(str(e))
+    return 1 if failed else 0
+
+
+def _world_option(size, seed):
+    try:
+        width, height = (int(n) for n in size.lower().split("x"))
+    except ValueError:
+        raise ValueError(f"--world expects WIDTHxHEIGHT, got {size!r}") from None
+    return {"width": width, "height": height, "seed": seed}
+
+
+if __name__ == "__main__":
+    sys.exit(main())
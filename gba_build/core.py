@@ -0,0 +1,288 @@
+"""
+Build API: a variant definition in, an output tree plus zip archive out.
+
+A generator is any importable module exposing ``GENERATOR_VERSION`` and
+``render(variant)``, which returns the package contents as a mapping of
+relative path -> str/bytes. Optional attributes tune the shared stages
+(see ``render_variant``):
+
+- ``MAP_IMPORT``: how Tiled maps compile for its runtime;
+- ``TILE_LIGHTING``: static lighting baked into tile sheets;
+- ``COLOR_TRANSFER``: asset quantization;
+- ``ATLAS_SPRITES``: image sheets packed into an atlas;
+- ``BUILD_CONFIG``: a JSON-able dict merged into the runtime ``BUILD``
+  object of the scripts.
+
+``build_variant`` renders the variant, and if anything differs from the
+manifest of the existing tree, stages the new tree in a private temporary
+directory next to the target and renames it into place, so concurrent
+builds of different variants never see each other's half-written files.
+The archive is streamed straight from the rendered outputs; with
+``tree=False`` no output tree is written at all.
+"""
+
+import importlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from .archive import build_archive
+from .atlas import pack_atlas
+from .assets import collect_assets
+from .fingerprint import fingerprint_assets, fingerprint_pages
+from .lighting import light_sheets
+from .manifest import BuildManifest, write_outputs
+from .minify import minify_files
+from .precompress import precompress_files
+from .quantize import quantize_assets, transfer_lut
+from .tiled import import_tiled
+
+# Placeholder in generated scripts that receives the build configuration
+# (``const BUILD = /*@BUILD@*/{};``); left as-is it is an empty object.
+BUILD_CONFIG_MARKER = "/*@BUILD@*/{}"
+
+
+@dataclass
+class Variant:
+    """One buildable package: which generator, where to put it, and its options."""
+
+    name: str
+    generator: str
+    root: str
+    archive: str = None
+    prefix: str = None
+    options: dict = field(default_factory=dict)
+    tree: bool = True
+
+    def __post_init__(self):
+        if self.prefix is None:
+            self.prefix = self.name
+
+
+@dataclass
+class BuildResult:
+    """What ``build_variant`` did for one variant."""
+
+    variant: Variant
+    results: list
+    archived: list = None
+    report: dict = field(default_factory=dict)
+
+    @property
+    def changed(self):
+        return [rel for rel, changed in self.results if changed]
+
+    @property
+    def up_to_date(self):
+        return not self.changed and self.archived is None
+
+
+def load_generator(name):
+    """Import a generator module and check it implements the generator protocol."""
+    module = importlib.import_module(name)
+    for attr in ("GENERATOR_VERSION", "render"):
+        if not hasattr(module, attr):
+            raise TypeError(f"generator {name!r} does not define {attr}")
+    return module
+
+
+def render_variant(variant):
+    """Render ``variant`` in memory; returns ``(generator_module, files, report)``.
+
+    After the generator's own ``render``, the shared stages run in order.
+    Each is skipped when what it reads is missing or when the option in
+    parentheses is false; only ``gzip`` is off by default.
+
+    1. map: ``options["map"]``, a Tiled map, replaces the world per
+       ``MAP_IMPORT``; its objects become ``BUILD.objects``.
+    2. assets: ``options["assets_dir"]`` is merged in.
+    3. lighting: ``TILE_LIGHTING`` is baked into the tile sheets.
+    4. quantize: PNG assets go through ``COLOR_TRANSFER``
+       (``options["quantize"]``).
+    5. atlas: ``ATLAS_SPRITES`` are packed into sheets (``options["atlas"]``).
+    6. fingerprint: runtime assets get content-hashed names
+       (``options["fingerprint"]``).
+    7. config: ``BUILD_CONFIG`` plus what the stages add is injected into
+       the scripts.
+    8. minify: scripts, styles and pages (``options["minify"]``).
+    9. fingerprint pages: the scripts and styles the pages load are renamed
+       (``options["fingerprint"]``).
+    10. gzip: a pre-encoded ``.gz`` sibling per text output
+        (``options["gzip"]``).
+
+    ``report["timings"]`` maps each stage that ran to its wall time in
+    seconds; ``report["minified"]``, ``report["fingerprinted"]`` (logical ->
+    fingerprinted name) and ``report["precompressed"]`` record what the
+    stages did.
+    """
+    module = load_generator(variant.generator)
+    config = dict(getattr(module, "BUILD_CONFIG", {}))
+    report = {"timings": {}}
+    timings = report["timings"]
+
+    with _stage(timings, "render"):
+        files = dict(module.render(variant))
+
+    tiled_map = variant.options.get("map")
+    if tiled_map:
+        importer = getattr(module, "MAP_IMPORT", None)
+        if importer is None:
+            raise ValueError(f"generator {variant.generator!r} does not import maps")
+        with _stage(timings, "map"):
+            config["objects"] = import_tiled(files, tiled_map, **importer)
+
+    assets_dir = variant.options.get("assets_dir")
+    if assets_dir:
+        with _stage(timings, "assets"):
+            files.update(collect_assets(assets_dir))
+
+    lighting = getattr(module, "TILE_LIGHTING", None)
+    if lighting is not None:
+        with _stage(timings, "lighting"):
+            config["lit"] = light_sheets(files, **lighting)
+
+    transfer = getattr(module, "COLOR_TRANSFER", None)
+    if transfer is not None and variant.options.get("quantize", True):
+        with _stage(timings, "quantize"):
+            config["quantized"] = quantize_assets(files, transfer_lut(**transfer))
+
+    sprites = getattr(module, "ATLAS_SPRITES", None)
+    if sprites is not None and variant.options.get("atlas", True):
+        with _stage(timings, "atlas"):
+            atlas = pack_atlas(files, sprites)
+            if atlas:
+                config["atlas"] = atlas
+
+    fingerprint = variant.options.get("fingerprint", True)
+    if fingerprint:
+        with _stage(timings, "fingerprint"):
+            config["assets"] = fingerprint_assets(files)
+
+    with _stage(timings, "config"):
+        inject_build_config(files, config)
+
+    # Last, so the BUILD marker comment is gone before comments are stripped.
+    if variant.options.get("minify", True):
+        with _stage(timings, "minify"):
+            report["minified"] = minify_files(files)
+    if fingerprint:
+        with _stage(timings, "fingerprint"):
+            report["fingerprinted"] = fingerprint_pages(files, config["assets"])
+    if variant.options.get("gzip", False):
+        with _stage(timings, "gzip"):
+            report["precompressed"] = precompress_files(files)
+    return module, files, report
+
+
+@contextmanager
+def _stage(timings, name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - started
+
+
+def inject_build_config(files, config):
+    """Replace ``BUILD_CONFIG_MARKER`` in every script with ``config`` as JSON."""
+    literal = json.dumps(config, sort_keys=True, separators=(",", ":"))
+    for rel, data in files.items():
+        if rel.endswith(".js") and isinstance(data, str) and BUILD_CONFIG_MARKER in data:
+            files[rel] = data.replace(BUILD_CONFIG_MARKER, literal, 1)
+
+
+def build_variant(variant):
+    """Build ``variant`` into its root and/or archive, skipping unchanged work.
+
+    The tree and archive writes are timed into ``report["timings"]`` as the
+    ``"tree"`` and ``"archive"`` stages.
+    """
+    if not variant.tree and variant.archive is None:
+        raise ValueError(f"variant {variant.name!r} has neither an output tree nor an archive")
+    module, files, report = render_variant(variant)
+    version = module.GENERATOR_VERSION
+
+    results = [(rel, False) for rel in files]
+    if variant.tree:
+        with _stage(report["timings"], "tree"):
+            results = _build_tree(variant, files, version)
+    archived = None
+    if variant.archive is not None:
+        with _stage(report["timings"], "archive"):
+            archived = build_archive(files, os.path.abspath(variant.archive), variant.prefix,
+                                     version)
+    return BuildResult(variant, results, archived, report)
+
+
+def _build_tree(variant, files, version):
+    root = os.path.abspath(variant.root)
+    previous = BuildManifest.load(root, variant.generator, version)
+    if previous.up_to_date(root, files):
+        return [(rel, False) for rel in files]
+
+    parent = os.path.dirname(root)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=f".{os.path.basename(root)}.", dir=parent)
+    try:
+        os.chmod(staging, 0o755)  # mkdtemp creates 0700; the tree is published as-is
+        _, results = write_outputs(staging, files, variant.generator, version, previous_root=root)
+        _swap_into_place(staging, root)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return results
+
+
+def build_variants(variants, jobs=None):
+    """Build several variants concurrently, one worker process per variant.
+
+    Yields ``(variant, result, error)`` as builds finish; exactly one of
+    ``result`` and ``error`` is set. Variants must not share a root or an
+    archive path.
+    """
+    _check_distinct(variants)
+    if len(variants) <= 1 or jobs == 1:
+        for variant in variants:
+            yield _build_one(variant)
+        return
+    workers = min(len(variants), jobs or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_build_one, variant) for variant in variants]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def _build_one(variant):
+    try:
+        return variant, build_variant(variant), None
+    except Exception as e:  # reported per variant by the caller
+        return variant, None, f"{type(e).__name__}: {e}"
+
+
+def _check_distinct(variants):
+    seen = {}
+    for variant in variants:
+        targets = [os.path.abspath(variant.root)] if variant.tree else []
+        if variant.archive:
+            targets.append(os.path.abspath(variant.archive))
+        for target in targets:
+            if target in seen:
+                raise ValueError(
+                    f"variants {seen[target]!r} and {variant.name!r} both write {target}")
+            seen[target] = variant.name
+
+
+def _swap_into_place(staging, root):
+    """Rename ``staging`` to ``root``, replacing any previous tree."""
+    if not os.path.exists(root):
+        os.rename(staging, root)
+        return
+    retired = tempfile.mkdtemp(prefix=f".{os.path.basename(root)}.old.", dir=os.path.dirname(root))
+    os.rename(root, os.path.join(retired, "tree"))
+    os.rename(staging, root)
+    shutil.rmtree(retired, ignore_errors=True)
@@ -0,0 +1,133 @@
+"""
+Content-fingerprinted filenames, so everything but the page can be cached
+for good: a file's name changes whenever its content does, and a returning
+player's browser loads unchanged files from its cache without asking the
+server again.
+
+Two steps bracket the config and minify stages:
+
+- ``fingerprint_assets`` renames what the runtime fetches (``assets/*.png``
+  and such) to ``name.<hash>.ext``. The world directory, whose chunk files
+  the runtime names itself, is renamed as a unit to ``assets/world.<hash>/``
+  from a hash over all of its files. The mapping becomes ``BUILD.assets``,
+  which the scripts resolve paths through.
+- ``fingerprint_pages`` then renames the scripts and styles the pages load,
+  now final, and rewrites the ``src``/``href`` references in the pages.
+
+The complete logical -> fingerprinted mapping is written to
+``asset-manifest.json`` (directories with a trailing slash), and a
+``_headers`` file marks fingerprinted paths immutable for a year while the
+pages are always revalidated. ``index.html`` keeps its name, since it is
+the entry point.
+
+Only hosts that read ``_headers`` (Netlify, Cloudflare Pages) apply that
+policy; it is the deployment target for zero-revalidation loads. GitHub
+Pages ignores the file and sends its own short ``max-age`` for every
+path, so there the hashed names only guarantee that a new build never
+mixes with stale scripts or assets; returning players still revalidate.
+"""
+
+import hashlib
+import json
+import posixpath
+import re
+
+from .manifest import content_hash
+from .maps import WORLD_DIR
+
+ASSET_MANIFEST = "asset-manifest.json"
+HEADERS_FILE = "_headers"
+HASH_LENGTH = 10
+
+# What the runtime fetches by path, and directories it fetches from by name
+ASSET_SUFFIXES = frozenset((".png", ".bin"))
+ASSET_DIRS = (WORLD_DIR,)
+PAGE_SUFFIXES = frozenset((".html",))
+PAGE_ASSET_SUFFIXES = frozenset((".js", ".css"))
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+_ATTRIBUTE = re.compile(r'\b(src|href)=("|\')([^"\']+)\2')
+
+
+def fingerprinted_name(rel, data):
+    """``rel`` with the hash of ``data`` before its extension."""
+    stem, ext = posixpath.splitext(rel)
+    return f"{stem}.{content_hash(data)[:HASH_LENGTH]}{ext}"
+
+
+def fingerprint_assets(files):
+    """Rename the runtime-fetched files in ``files`` in place; returns the mapping."""
+    mapping = {}
+    for folder in ASSET_DIRS:
+        prefix = folder + "/"
+        members = sorted(rel for rel in files if rel.startswith(prefix))
+        if not members:
+            continue
+        h = hashlib.sha256()
+        for rel in members:
+            h.update(f"{rel}\0{content_hash(files[rel])}\n".encode("utf-8"))
+        renamed = f"{folder}.{h.hexdigest()[:HASH_LENGTH]}/"
+        mapping[prefix] = renamed
+        for rel in members:
+            files[renamed + rel[len(prefix):]] = files.pop(rel)
+    for rel in sorted(files):
+        if (rel.startswith("assets/") and posixpath.splitext(rel)[1] in ASSET_SUFFIXES
+                and not any(rel.startswith(target) for target in mapping.values())):
+            mapping[rel] = _rename(files, rel)
+    return mapping
+
+
+def fingerprint_pages(files, mapping):
+    """Rename the scripts and styles the pages reference, rewriting the pages.
+
+    Adds them to ``mapping``, writes ``ASSET_MANIFEST`` and ``HEADERS_FILE``
+    and returns the complete mapping.
+    """
+    mapping = dict(mapping)
+    pages = sorted(rel for rel in files if posixpath.splitext(rel)[1] in PAGE_SUFFIXES)
+    for page in pages:
+        for _, _, ref in _ATTRIBUTE.findall(files[page]):
+            rel = posixpath.normpath(posixpath.join(posixpath.dirname(page), ref))
+            if (rel in files and rel not in mapping
+                    and posixpath.splitext(rel)[1] in PAGE_ASSET_SUFFIXES):
+                mapping[rel] = _rename(files, rel)
+    for page in pages:
+        base = posixpath.dirname(page)
+
+        def rewrite(match):
+            rel = posixpath.normpath(posixpath.join(base, match.group(3)))
+            if rel not in mapping:
+                return match.group(0)
+            ref = posixpath.relpath(mapping[rel], base or ".")
+            return f"{match.group(1)}={match.group(2)}{ref}{match.group(2)}"
+
+        files[page] = _ATTRIBUTE.sub(rewrite, files[page])
+
+    files[ASSET_MANIFEST] = json.dumps(mapping, indent=2, sort_keys=True) + "\n"
+    rules = [f"/{target}{'*' if target.endswith('/') else ''}\n  Cache-Control: {IMMUTABLE}\n"
+             for target in sorted(mapping.values())]
+    rules += [f"/{page}\n  Cache-Control: {REVALIDATE}\n" for page in pages]
+    if "index.html" in pages:
+        rules.append(f"/\n  Cache-Control: {REVALIDATE}\n")
+    files[HEADERS_FILE] = "".join(rules)
+    return mapping
+
+
+def logical_path(mapping, rel):
+    """Inverse of ``mapping`` for one output path (``.gz`` siblings included)."""
+    suffix = ".gz" if rel.endswith(".gz") else ""
+    rel = rel[:len(rel) - len(suffix)]
+    for logical, target in mapping.items():
+        if target == rel:
+            return logical + suffix
+        if target.endswith("/") and rel.startswith(target):
+            return logical + rel[len(target):] + suffix
+    return rel + suffix
+
+
+def _rename(files, rel):
+    renamed = fingerprinted_name(rel, files[rel])
+    files[renamed] = files.pop(rel)
+    return renamed
@@ -0,0 +1,77 @@
+"""
+Build-time static lighting for tile sheets.
+
+Effects that never change, such as a highlight along the top of every tile
+or shading along its bottom edge, are composited into the sheet PNGs once at
+build time, so the runtime can draw each tile as a single state-free blit.
+A generator describes them in ``TILE_LIGHTING``::
+
+    TILE_LIGHTING = {
+        "tile": 16,
+        "bands": [{"rows": [0, 2], "color": "#ffffff", "alpha": 0.08}],
+    }
+
+Each band is a horizontal strip of every tile (``rows`` is the half-open
+pixel range within the tile) filled with ``color`` at ``alpha``, source-over,
+in order. ``sheets`` (default ``["assets/tileset.png"]``) names the PNGs to
+light. The stage runs before quantization, so lit sheets still end up on the
+BGR555 palette.
+"""
+
+import warnings
+
+from .cache import cached, input_hash
+from .png import decode_png, encode_png
+from .raster import parse_color
+
+DEFAULT_SHEETS = ("assets/tileset.png",)
+
+
+def light_rgba(rgba, width, height, tile, bands):
+    """Composite ``bands`` into every tile of ``rgba`` (straight alpha) in place."""
+    for band in bands:
+        r, g, b, _ = parse_color(band["color"])
+        a = band["alpha"]
+        src = (r * 255 * a, g * 255 * a, b * 255 * a)
+        top, bottom = band["rows"]
+        if not 0 <= top <= bottom <= tile:
+            raise ValueError(f"band rows {band['rows']} are outside a {tile}-pixel tile")
+        for tile_y in range(0, height, tile):
+            for y in range(tile_y + top, min(tile_y + bottom, height)):
+                for i in range(y * width * 4, (y + 1) * width * 4, 4):
+                    dst_a = rgba[i + 3] / 255 * (1 - a)
+                    out_a = a + dst_a
+                    if out_a == 0:
+                        continue
+                    for c in range(3):
+                        rgba[i + c] = round((src[c] + rgba[i + c] * dst_a) / out_a)
+                    rgba[i + 3] = round(out_a * 255)
+    return rgba
+
+
+def light_png(data, tile, bands):
+    """Return ``data`` (PNG bytes) re-encoded with ``bands`` composited into every tile."""
+    width, height, rgba = decode_png(data)
+    return encode_png(width, height, light_rgba(rgba, width, height, tile, bands))
+
+
+def light_sheets(files, tile, bands, sheets=DEFAULT_SHEETS):
+    """Light the ``sheets`` present in ``files`` in place.
+
+    Results are cached by input hash. A sheet that cannot be decoded is left
+    unlit, with a warning. Returns the sorted list of lit paths, which the
+    runtime uses to skip its own fallback lighting.
+    """
+    done = []
+    for rel in sorted(sheets):
+        data = files.get(rel)
+        if data is None:
+            continue
+        try:
+            files[rel] = cached("lit", input_hash("lighting", data, tile, bands),
+                                lambda: light_png(data, tile, bands))
+        except ValueError as e:
+            warnings.warn(f"{rel}: {e}; left unlit", stacklevel=2)
+            continue
+        done.append(rel)
+    return done
@@ -0,0 +1,142 @@
+"""
+Build manifest: per-output content hashes plus the generator version.
+
+The manifest lives next to the outputs it describes (``.build-manifest.json``
+in the package root). On each run the generators hash their in-memory outputs,
+compare against the manifest and only rewrite the files that actually changed.
+The zip archive carries its own identity (see ``archive.py``), so it needs no
+entry here.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+MANIFEST_NAME = ".build-manifest.json"
+MANIFEST_FORMAT = 2
+
+
+def content_hash(data):
+    """Return the hex SHA-256 of ``data`` (str is encoded as UTF-8)."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def _as_bytes(data):
+    return data.encode("utf-8") if isinstance(data, str) else data
+
+
+class BuildManifest:
+    """Hashes of the outputs last written to a package root."""
+
+    def __init__(self, generator, version, outputs=None):
+        self.generator = generator
+        self.version = version
+        self.outputs = dict(outputs or {})
+
+    @classmethod
+    def load(cls, root, generator, version):
+        """Load the manifest in ``root``.
+
+        A missing or unreadable manifest, or one written by a different
+        generator or generator version, yields an empty manifest so that
+        every output is treated as changed.
+        """
+        path = os.path.join(root, MANIFEST_NAME)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(generator, version)
+        if (data.get("format") != MANIFEST_FORMAT
+                or data.get("generator") != generator
+                or data.get("version") != version):
+            return cls(generator, version)
+        return cls(generator, version, data.get("outputs"))
+
+    def save(self, root):
+        data = {
+            "format": MANIFEST_FORMAT,
+            "generator": self.generator,
+            "version": self.version,
+            "outputs": dict(sorted(self.outputs.items())),
+        }
+        with open(os.path.join(root, MANIFEST_NAME), "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+            f.write("\n")
+
+    def is_current(self, root, rel, digest, size):
+        """True if ``rel`` was last written with ``digest`` and is still on disk."""
+        entry = self.outputs.get(rel)
+        if not entry or entry.get("sha256") != digest or entry.get("size") != size:
+            return False
+        try:
+            return os.stat(os.path.join(root, rel)).st_size == size
+        except OSError:
+            return False
+
+    def up_to_date(self, root, files):
+        """True if ``root`` already holds exactly ``files`` as recorded."""
+        if set(self.outputs) != set(files):
+            return False
+        for rel, data in files.items():
+            payload = _as_bytes(data)
+            if not self.is_current(root, rel, content_hash(payload), len(payload)):
+                return False
+        return True
+
+
+def write_outputs(root, files, generator, version, previous_root=None):
+    """Write ``files`` (relative path -> str/bytes) under ``root``.
+
+    The manifest of ``previous_root`` (default: ``root`` itself) is the
+    baseline. Unchanged outputs are left untouched when building in place,
+    or hard-linked from ``previous_root`` when staging into a fresh tree;
+    outputs recorded by the baseline but no longer produced are dropped.
+    Returns ``(manifest, results)`` where ``results`` is a list of
+    ``(rel, changed)`` pairs in the order given.
+    """
+    baseline_root = previous_root or root
+    manifest = BuildManifest.load(baseline_root, generator, version)
+    previous = dict(manifest.outputs)
+    results = []
+    dirty = baseline_root != root
+
+    for rel, data in files.items():
+        payload = _as_bytes(data)
+        digest = content_hash(payload)
+        path = os.path.join(root, rel)
+        if manifest.is_current(baseline_root, rel, digest, len(payload)):
+            if baseline_root != root:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                _link_or_copy(os.path.join(baseline_root, rel), path)
+            results.append((rel, False))
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(payload)
+        manifest.outputs[rel] = {"sha256": digest, "size": len(payload)}
+        results.append((rel, True))
+        dirty = True
+
+    for rel in set(previous) - set(files):
+        if baseline_root == root:
+            try:
+                os.remove(os.path.join(root, rel))
+            except FileNotFoundError:
+                pass
+        del manifest.outputs[rel]
+        dirty = True
+
+    if dirty or not os.path.exists(os.path.join(root, MANIFEST_NAME)):
+        manifest.save(root)
+    return manifest, results
+
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
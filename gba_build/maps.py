@@ -0,0 +1,151 @@
+"""
+Packed binary world maps.
+
+Layout (little-endian)::
+
+    magic   4s  b"GBAM"
+    version u8  2
+    layers  u8  number of tile layers
+    width   u16 tiles
+    height  u16 tiles
+    then ``layers`` planes of ``width * height`` bytes, row-major,
+    then one collision plane of ``width * height`` bytes
+
+One byte per tile per layer; ``EMPTY`` (255) marks cells a sparse layer
+(e.g. the tree-top overlay) leaves blank. The collision plane is precomputed
+walkability, ``BLOCKED`` (1) or ``WALKABLE`` (0) per tile, so movement
+checks are a single index and it can feed pathfinding as-is. Version 1 maps
+have no collision plane. The runtime wraps each plane in a Uint8Array view
+of the fetched buffer, so loading costs one fetch and no parsing.
+
+Worlds ship chunked so the runtime can stream them: ``split_map`` cuts a
+world into ``chunk`` x ``chunk``-tile pieces, each an ordinary map of the
+format above (cut short at the right and bottom edges), plus an index::
+
+    magic   4s  b"GBAI"
+    version u8  1
+    layers  u8  number of tile layers per chunk
+    width   u16 world width in tiles
+    height  u16 world height in tiles
+    chunk   u16 chunk edge in tiles
+    then one u32 chunk file number per chunk, row-major
+
+Identical chunks (open sea, say) share a file number, and so one file.
+``world_files`` lays the result out as ``assets/world/index.bin`` plus
+``assets/world/<number>.bin``.
+"""
+
+import struct
+
+MAP_MAGIC = b"GBAM"
+MAP_VERSION = 2
+EMPTY = 255
+WALKABLE, BLOCKED = 0, 1
+
+INDEX_MAGIC = b"GBAI"
+INDEX_VERSION = 1
+CHUNK_SIZE = 32
+WORLD_DIR = "assets/world"
+
+_HEADER = struct.Struct("<4sBBHH")
+HEADER_SIZE = _HEADER.size
+_INDEX_HEADER = struct.Struct("<4sBBHHH")
+
+
+def collision_plane(layer, solid):
+    """Walkability of ``layer``: ``BLOCKED`` where the tile id is in ``solid``."""
+    return bytes(BLOCKED if tid in solid else WALKABLE for tid in layer)
+
+
+def encode_map(width, height, layers, collision):
+    """Pack ``layers`` and the ``collision`` plane (each ``width * height`` bytes)."""
+    for layer in layers:
+        if len(layer) != width * height:
+            raise ValueError(f"layer has {len(layer)} cells, expected {width * height}")
+        if width * height and max(layer) > 255:
+            raise ValueError("tile ids must fit in one byte")
+    if len(collision) != width * height:
+        raise ValueError(f"collision plane has {len(collision)} cells, expected {width * height}")
+    if width * height and max(collision) > BLOCKED:
+        raise ValueError("collision cells must be WALKABLE or BLOCKED")
+    header = _HEADER.pack(MAP_MAGIC, MAP_VERSION, len(layers), width, height)
+    return header + b"".join(bytes(layer) for layer in layers) + bytes(collision)
+
+
+def decode_map(data):
+    """Inverse of ``encode_map``; returns ``(width, height, [layer bytes, ...], collision)``.
+
+    ``collision`` is ``None`` for version-1 maps.
+    """
+    magic, version, count, width, height = _HEADER.unpack_from(data)
+    if magic != MAP_MAGIC or version not in (1, MAP_VERSION):
+        raise ValueError("not a version-1 or -2 GBAM map")
+    size = width * height
+    planes = [bytes(data[HEADER_SIZE + i * size:HEADER_SIZE + (i + 1) * size])
+              for i in range(count + (version >= 2))]
+    collision = planes.pop() if version >= 2 else None
+    return width, height, planes, collision
+
+
+def split_map(width, height, layers, collision, chunk=CHUNK_SIZE):
+    """Cut a world into chunk maps; returns ``(index bytes, [chunk map bytes, ...])``."""
+    planes = [bytes(plane) for plane in layers] + [bytes(collision)]
+    for plane in planes:
+        if len(plane) != width * height:
+            raise ValueError(f"plane has {len(plane)} cells, expected {width * height}")
+    cols, rows = -(-width // chunk), -(-height // chunk)
+    maps = []
+    for cy in range(rows):
+        for cx in range(cols):
+            x0, y0 = cx * chunk, cy * chunk
+            w, h = min(chunk, width - x0), min(chunk, height - y0)
+            cut = [b"".join(plane[(y0 + y) * width + x0:(y0 + y) * width + x0 + w]
+                            for y in range(h))
+                   for plane in planes]
+            maps.append(encode_map(w, h, cut[:-1], cut[-1]))
+    return pack_chunks(width, height, len(layers), chunk, maps)
+
+
+def pack_chunks(width, height, layers, chunk, maps):
+    """Index already encoded chunk ``maps`` (row-major); returns what ``split_map`` does.
+
+    Identical chunk maps are stored once.
+    """
+    if not 0 < chunk <= 0xFFFF:
+        raise ValueError(f"chunk size {chunk} does not fit the index")
+    count = -(-width // chunk) * -(-height // chunk)
+    if len(maps) != count:
+        raise ValueError(f"{len(maps)} chunk maps, expected {count}")
+    files, numbers, index = [], {}, []
+    for data in maps:
+        if data not in numbers:
+            numbers[data] = len(files)
+            files.append(data)
+        index.append(numbers[data])
+    header = _INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, layers, width, height, chunk)
+    return header + struct.pack(f"<{count}I", *index), files
+
+
+def decode_index(data):
+    """Inverse of the index half of ``split_map``.
+
+    Returns ``(width, height, layers, chunk, [chunk file number, ...])``.
+    """
+    magic, version, layers, width, height, chunk = _INDEX_HEADER.unpack_from(data)
+    if magic != INDEX_MAGIC or version != INDEX_VERSION:
+        raise ValueError("not a version-1 GBAI world index")
+    count = -(-width // chunk) * -(-height // chunk)
+    files = struct.unpack_from(f"<{count}I", data, _INDEX_HEADER.size)
+    return width, height, layers, chunk, list(files)
+
+
+def world_files(width, height, layers, collision, chunk=CHUNK_SIZE, root=WORLD_DIR):
+    """``split_map`` as package files: ``<root>/index.bin`` and ``<root>/<number>.bin``."""
+    return chunk_files(*split_map(width, height, layers, collision, chunk), root=root)
+
+
+def chunk_files(index, chunks, root=WORLD_DIR):
+    """Name an ``(index, chunks)`` pair as package files under ``root``."""
+    files = {f"{root}/index.bin": index}
+    files.update((f"{root}/{number}.bin", data) for number, data in enumerate(chunks))
+    return files
@@ -0,0 +1,542 @@
+"""
+Pure-Python minifiers for the generated script.js, style.css and index.html.
+
+These are deliberately conservative, written for the code our generators
+emit rather than for arbitrary web sources:
+
+* ``minify_js`` tokenizes the script (strings, template literals, regex
+  literals and comments are recognised), drops comments and whitespace, and
+  keeps a line break wherever automatic semicolon insertion could depend on
+  it. Identifiers declared inside a function body -- which, for an IIFE-wrapped
+  script, is everything -- are renamed to short names. Renaming is one
+  consistent, injective mapping over the whole file and never touches
+  property positions (``a.name``, object keys, class members), so shadowing
+  and scoping are preserved without a full scope analysis. Names declared at
+  the top level and well-known browser globals are never renamed.
+* ``minify_css`` strips comments and the whitespace around punctuation.
+* ``minify_html`` strips comments and collapses whitespace, dropping it
+  entirely next to block-level tags; ``pre``/``textarea``/``script``/``style``
+  contents are kept verbatim.
+"""
+
+import os
+import re
+
+# -- JavaScript -------------------------------------------------------------
+
+_KEYWORDS = frozenset("""
+    await break case catch class const continue debugger default delete do else
+    enum export extends false finally for function if import in instanceof let
+    new null return super switch this throw true try typeof var void while with
+    yield async of get set static arguments eval undefined NaN Infinity
+""".split())
+
+# Globals a script may reference by bare name; a local with one of these
+# names is left alone in case some other function means the global.
+_GLOBALS = frozenset("""
+    window self globalThis document navigator location history screen console
+    localStorage sessionStorage performance fetch Image ImageData ImageBitmap
+    OffscreenCanvas HTMLCanvasElement CanvasRenderingContext2D createImageBitmap
+    requestAnimationFrame cancelAnimationFrame setTimeout clearTimeout
+    setInterval clearInterval queueMicrotask structuredClone addEventListener
+    removeEventListener dispatchEvent postMessage onmessage close Worker Blob URL
+    URLSearchParams Response Request Headers AbortController TextEncoder
+    TextDecoder DataView ArrayBuffer SharedArrayBuffer Uint8Array
+    Uint8ClampedArray Uint16Array Uint32Array Int8Array Int16Array Int32Array
+    Float32Array Float64Array BigInt Math JSON Object Array String Number
+    Boolean Symbol Map Set WeakMap WeakSet Promise Proxy Reflect Date RegExp
+    Error TypeError RangeError parseInt parseFloat isNaN isFinite alert confirm
+    prompt atob btoa crypto innerWidth innerHeight devicePixelRatio matchMedia
+    getComputedStyle name status event origin top parent frames open print
+    KeyboardEvent MouseEvent Event CustomEvent Audio AudioContext
+""".split())
+
+_PUNCTUATORS = sorted("""
+    >>>= ... === !== **= <<= >>= >>> &&= ||= ??= => == != <= >= && || ?? ?.
+    ++ -- += -= *= /= %= &= |= ^= ** << >> { } ( ) [ ] ; , < > + - * / % & |
+    ^ ! ~ ? : = . @ #
+""".split(), key=len, reverse=True)
+
+_IDENT = r"[A-Za-z_$\u0080-\uffff][\w$\u0080-\uffff]*"
+
+_TOKEN_RE = re.compile(r"""
+    (?P<ws>[ \t\f\v\u00a0\ufeff]+)
+  | (?P<nl>\r\n|[\n\r\u2028\u2029])
+  | (?P<comment>//[^\n\r]*|/\*.*?\*/)
+  | (?P<number>0[xX][0-9a-fA-F_]+n?|0[bB][01_]+n?|0[oO][0-7_]+n?
+               |(?:\d[\d_]*(?:\.[\d_]*)?|\.\d[\d_]*)(?:[eE][+-]?\d+)?n?)
+  | (?P<word>""" + _IDENT + r""")
+  | (?P<string>'(?:[^'\\\n\r]|\\.|\\\r?\n)*'|"(?:[^"\\\n\r]|\\.|\\\r?\n)*")
+  | (?P<punct>""" + "|".join(re.escape(p) for p in _PUNCTUATORS) + r""")
+""", re.VERBOSE | re.DOTALL)
+
+_TEMPLATE_RE = re.compile(r"(?:[^`\\$]|\\.|\$(?!\{))*(`|\$\{)", re.DOTALL)
+_REGEX_RE = re.compile(r"/(?:[^/\\\[\n\r]|\\.|\[(?:[^\]\\\n\r]|\\.)*\])+/[A-Za-z]*")
+
+# After these a "/" starts a regex literal rather than a division.
+_REGEX_AFTER_WORDS = frozenset(
+    "return typeof instanceof in of new delete void throw case do else yield await".split())
+
+# Keywords after which a line break is significant ("return\nx" is "return; x").
+_RESTRICTED = frozenset("return break continue throw yield".split())
+# Words that cannot end a statement, so a following line break never matters.
+_NON_TERMINAL_WORDS = frozenset("""
+    typeof instanceof in of new delete void else do case extends const let var
+    function class if for while switch catch try finally with await export import
+""".split())
+
+
+class _Token:
+    __slots__ = ("kind", "text", "nl")
+
+    def __init__(self, kind, text, nl):
+        self.kind = kind  # word, number, string, template, regex, punct
+        self.text = text
+        self.nl = nl      # a line break preceded this token
+
+    def __repr__(self):
+        return f"_Token({self.kind!r}, {self.text!r})"
+
+
+def _tokenize(src):
+    tokens = []
+    templates = []  # brace depth at which each open ${ ... } resumes its template
+    depth = 0
+    nl = False
+    pos = 0
+    while pos < len(src):
+        ch = src[pos]
+        if ch == "`" or (ch == "}" and templates and templates[-1] == depth):
+            if ch == "}":
+                templates.pop()
+            m = _TEMPLATE_RE.match(src, pos + 1)
+            if not m:
+                raise ValueError(f"unterminated template literal at offset {pos}")
+            if m.group(1) == "${":
+                templates.append(depth)
+            tokens.append(_Token("template", src[pos:m.end()], nl))
+            nl = False
+            pos = m.end()
+            continue
+        if ch == "/" and _regex_allowed(tokens) and src[pos + 1:pos + 2] not in ("/", "*"):
+            m = _REGEX_RE.match(src, pos)
+            if m:
+                tokens.append(_Token("regex", m.group(), nl))
+                nl = False
+                pos = m.end()
+                continue
+        m = _TOKEN_RE.match(src, pos)
+        if not m:
+            raise ValueError(f"cannot tokenize {src[pos:pos + 20]!r} at offset {pos}")
+        kind, text = m.lastgroup, m.group()
+        pos = m.end()
+        if kind == "nl" or (kind == "comment" and ("\n" in text or "\r" in text)):
+            nl = True
+            continue
+        if kind in ("ws", "comment"):
+            continue
+        if kind == "punct":
+            if text == "?." and src[pos:pos + 1].isdigit():  # a ?.5 : b
+                text, pos = "?", pos - 1
+            depth += text == "{"
+            depth -= text == "}"
+        tokens.append(_Token(kind, text, nl))
+        nl = False
+    if templates:
+        raise ValueError("unterminated template literal")
+    return tokens
+
+
+def _regex_allowed(tokens):
+    if not tokens:
+        return True
+    prev = tokens[-1]
+    if prev.kind == "word":
+        return prev.text in _REGEX_AFTER_WORDS
+    if prev.kind == "punct":
+        return prev.text not in (")", "]", "}")
+    if prev.kind == "template":
+        return prev.text.endswith("${")
+    return False
+
+
+def _is_name(tok):
+    return tok is not None and tok.kind == "word" and tok.text not in _KEYWORDS
+
+
+# Contexts pushed for each opening bracket.
+_BLOCK, _OBJECT, _CLASS, _PAREN, _BRACKET, _TEMPLATE = range(6)
+
+
+class _Analysis:
+    """One pass over the tokens: bracket contexts, property positions, declarations."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        n = len(tokens)
+        self.property = [False] * n   # word is a property name (never renamed)
+        self.shorthand = [False] * n  # word is a { name } shorthand (key and value)
+        self.top_level = set()        # names declared outside any function body
+        self.declared = set()
+        self._matches = self._match_brackets()
+        self._bodies = set()          # indices of "{" that open a function body
+        self._ternary_colons = set()
+        self._scan()
+
+    def _text(self, i):
+        if 0 <= i < len(self.tokens) and self.tokens[i].kind in ("punct", "word"):
+            return self.tokens[i].text
+        return None
+
+    def _match_brackets(self):
+        pairs = {"(": ")", "[": "]", "{": "}"}
+        matches, open_ = {}, []
+        for i, tok in enumerate(self.tokens):
+            if tok.kind != "punct":
+                continue
+            if tok.text in pairs:
+                open_.append(i)
+            elif tok.text in (")", "]", "}"):
+                if not open_ or pairs[self.tokens[open_[-1]].text] != tok.text:
+                    raise ValueError(f"unbalanced {tok.text!r} in script")
+                matches[open_.pop()] = i
+        if open_:
+            raise ValueError("unbalanced brackets in script")
+        return matches
+
+    def _scan(self):
+        toks = self.tokens
+        stack = []  # [context, open ternaries, is function body] per open bracket
+        pending_class = False
+        for i, tok in enumerate(toks):
+            prev, nxt = self._text(i - 1), self._text(i + 1)
+            top = stack[-1][0] if stack else _BLOCK
+
+            if tok.kind == "template":
+                if not tok.text.startswith("`"):
+                    stack.pop()
+                if tok.text.endswith("${"):
+                    stack.append([_TEMPLATE, 0, False])
+                continue
+
+            if tok.kind == "word":
+                if prev in (".", "?."):
+                    self.property[i] = True
+                elif top == _OBJECT and prev in ("{", ",") and nxt == ":":
+                    self.property[i] = True
+                elif top in (_OBJECT, _CLASS) and nxt == "(" and prev in (
+                        "{", ",", "}", ";", "*", "get", "set", "async", "static"):
+                    self.property[i] = True
+                elif top == _CLASS and nxt in ("=", ";") and prev in ("{", "}", ";", "static"):
+                    self.property[i] = True
+                elif top == _OBJECT and prev in ("{", ",") and nxt in (",", "}", "="):
+                    self.shorthand[i] = True
+
+                if tok.text in ("const", "let", "var"):
+                    self._declaration(i + 1, stack)
+                elif tok.text in ("function", "class") and _is_name(
+                        toks[i + 1] if i + 1 < len(toks) else None):
+                    self._declare(toks[i + 1].text, stack)
+                elif _is_name(tok) and nxt == "=>":
+                    self._declare(tok.text, stack, inner=True)
+                    if self._text(i + 2) == "{":
+                        self._bodies.add(i + 2)
+                if tok.text == "class":
+                    pending_class = True
+                continue
+
+            if tok.kind != "punct":
+                continue
+            text = tok.text
+            if text == "{":
+                if pending_class:
+                    kind, pending_class = _CLASS, False
+                elif prev is None or prev in (
+                        ")", "=>", ";", "{", "}", "else", "try", "finally", "do"):
+                    kind = _BLOCK
+                elif prev == ":" and top == _BLOCK and i - 1 not in self._ternary_colons:
+                    kind = _BLOCK  # case clause or label
+                else:
+                    kind = _OBJECT
+                stack.append([kind, 0, i in self._bodies])
+            elif text in ("(", "["):
+                if text == "(" and self._is_param_list(i):
+                    self._params(i, self._matches[i], stack)
+                stack.append([_PAREN if text == "(" else _BRACKET, 0, False])
+            elif text in ("}", ")", "]"):
+                stack.pop()
+            elif text == "?" and stack:
+                stack[-1][1] += 1
+            elif text == ":" and stack and stack[-1][1] > 0:
+                stack[-1][1] -= 1
+                self._ternary_colons.add(i)
+
+    def _is_param_list(self, i):
+        """True if the "(" at ``i`` opens a parameter list."""
+        end = self._matches[i]
+        after, before = self._text(end + 1), self._text(i - 1)
+        if after == "=>" or before == "function" or self._text(i - 2) == "function":
+            return True
+        return (after == "{" and _is_name(self.tokens[i - 1] if i > 0 else None)
+                and before not in ("if", "for", "while", "switch", "with")) or (
+                    after == "{" and before == "catch")
+
+    def _params(self, start, end, stack):
+        for j in range(start + 1, end):
+            if self._binding_position(j, ("(", ",", "...", "{", "[", ":"),
+                                      (",", ")", "=", "}", "]")):
+                self._declare(self.tokens[j].text, stack, inner=True)
+        after = end + 2 if self._text(end + 1) == "=>" else end + 1
+        if self._text(after) == "{":
+            self._bodies.add(after)
+
+    def _declaration(self, i, stack):
+        """Declare the names bound by a const/let/var starting at token ``i``."""
+        depth = 0
+        expect_binding = True
+        j = i
+        while j < len(self.tokens):
+            tok = self.tokens[j]
+            text = tok.text if tok.kind == "punct" else None
+            if depth == 0 and expect_binding:
+                if _is_name(tok):
+                    self._declare(tok.text, stack)
+                elif text in ("{", "["):
+                    end = self._matches[j]
+                    for k in range(j + 1, end):
+                        if self._binding_position(k, ("{", ",", "[", "...", ":"),
+                                                  (",", "}", "]", "=")):
+                            self._declare(self.tokens[k].text, stack)
+                    j = end
+                expect_binding = False
+            elif text in ("(", "[", "{"):
+                depth += 1
+            elif text in (")", "]", "}"):
+                if depth == 0:
+                    return
+                depth -= 1
+            elif depth == 0:
+                if text == ",":
+                    expect_binding = True
+                elif text == ";" or tok.text in ("in", "of"):
+                    return
+                elif tok.nl and _ends_statement(self.tokens[j - 1]):
+                    return  # statement ended by a line break
+            j += 1
+
+    def _binding_position(self, j, before, after):
+        prev, nxt = self._text(j - 1), self._text(j + 1)
+        return (_is_name(self.tokens[j]) and prev in before and nxt in after
+                and not (prev in ("{", ",") and nxt == ":"))
+
+    def _declare(self, name, stack, inner=False):
+        if name in _KEYWORDS:
+            return
+        in_function = inner or any(frame[2] for frame in stack)
+        (self.declared if in_function else self.top_level).add(name)
+
+
+def _short_names(taken):
+    first = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_$"
+    rest = first + "0123456789"
+    length = 1
+    while True:
+        for index in range(len(first) * len(rest) ** (length - 1)):
+            name = first[index % len(first)]
+            index //= len(first)
+            for _ in range(length - 1):
+                name += rest[index % len(rest)]
+                index //= len(rest)
+            if name not in taken:
+                yield name
+        length += 1
+
+
+def _rename_map(tokens, analysis):
+    renamable = analysis.declared - analysis.top_level - _GLOBALS - _KEYWORDS
+    counts = {}
+    for i, tok in enumerate(tokens):
+        if tok.kind == "word" and tok.text in renamable and not analysis.property[i]:
+            counts[tok.text] = counts.get(tok.text, 0) + 1
+    taken = {tok.text for tok in tokens if tok.kind == "word"} | _KEYWORDS | _GLOBALS
+    names = _short_names(taken)
+    mapping = {}
+    for name in sorted(counts, key=lambda n: (-counts[n], n)):
+        short = next(names)
+        if len(short) < len(name):
+            mapping[name] = short
+    return mapping
+
+
+def _ends_statement(tok):
+    if tok.kind == "word":
+        return tok.text not in _NON_TERMINAL_WORDS
+    if tok.kind == "punct":
+        return tok.text in (")", "]", "}", "++", "--")
+    return tok.kind != "template" or tok.text.endswith("`")
+
+
+def _starts_statement(tok):
+    if tok.kind == "punct":
+        return tok.text in ("{", "!", "~", "++", "--", "#", "@")
+    return tok.kind != "template" or tok.text.startswith("`")
+
+
+_WORD_CHAR = re.compile(r"[\w$\u0080-\uffff]")
+
+
+def _separator(prev, tok):
+    if tok.nl and (prev.kind == "word" and prev.text in _RESTRICTED
+                   or _ends_statement(prev) and _starts_statement(tok)):
+        return "\n"
+    a, b = prev.text[-1], tok.text[0]
+    if _WORD_CHAR.match(a) and _WORD_CHAR.match(b):
+        return " "
+    if prev.kind == "number" and b == ".":
+        return " "
+    if (a, b) in (("+", "+"), ("-", "-"), ("/", "/"), ("/", "*")):
+        return " "
+    if a == "<" and tok.text.startswith("!--") or prev.text.endswith("--") and b == ">":
+        return " "
+    return ""
+
+
+def minify_js(src, rename=True):
+    """Return ``src`` without comments and redundant whitespace.
+
+    With ``rename``, identifiers declared inside function bodies are
+    shortened as described in the module docstring.
+    """
+    tokens = _tokenize(src)
+    if not tokens:
+        return ""
+    mapping = {}
+    analysis = None
+    if rename:
+        analysis = _Analysis(tokens)
+        mapping = _rename_map(tokens, analysis)
+
+    out = []
+    prev = None
+    for i, tok in enumerate(tokens):
+        text = tok.text
+        if mapping and tok.kind == "word" and text in mapping and not analysis.property[i]:
+            text = mapping[text]
+            if analysis.shorthand[i]:
+                text = f"{tok.text}:{text}"
+        if prev is not None:
+            out.append(_separator(prev, tok))
+        out.append(text)
+        prev = tok
+    return "".join(out) + "\n"
+
+
+# -- CSS --------------------------------------------------------------------
+
+_CSS_TOKEN_RE = re.compile(r"""
+    (?P<comment>/\*.*?\*/)
+  | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+  | (?P<ws>\s+)
+  | (?P<other>[^"'\s/]+|/)
+""", re.VERBOSE | re.DOTALL)
+
+# Whitespace next to these never matters. ":" only counts on its right, since
+# "a :hover" and "a:hover" are different selectors.
+_CSS_TIGHT = "{};,>"
+
+
+def minify_css(src):
+    """Return ``src`` without comments and whitespace around punctuation."""
+    out = []
+    space = False
+    for m in _CSS_TOKEN_RE.finditer(src):
+        kind, text = m.lastgroup, m.group()
+        if kind == "comment":
+            continue
+        if kind == "ws":
+            space = bool(out)
+            continue
+        if space and out[-1][-1] not in _CSS_TIGHT + ":" and text[0] not in _CSS_TIGHT:
+            out.append(" ")
+        space = False
+        out.append(text)
+    return "".join(out).replace(";}", "}") + "\n"
+
+
+# -- HTML -------------------------------------------------------------------
+
+_HTML_BLOCK_TAGS = frozenset("""
+    html head body title meta link script style main header footer section
+    article aside nav div p h1 h2 h3 h4 h5 h6 ul ol li dl dt dd table thead
+    tbody tr td th form fieldset canvas figure figcaption hr br noscript
+    template pre
+""".split())
+
+_HTML_TOKEN_RE = re.compile(r"""
+    (?P<comment><!--.*?-->)
+  | (?P<raw><(pre|textarea|script|style)\b[^>]*>.*?</(?P=rawtag)\s*>)
+  | (?P<tag><[!/]?[A-Za-z][^>]*>)
+  | (?P<text>[^<]+|<)
+""".replace("(pre|", "(?P<rawtag>pre|"), re.VERBOSE | re.DOTALL | re.IGNORECASE)
+
+
+def _tag_name(tag):
+    """Lower-case element name of a tag; doctypes count as block-level."""
+    m = re.match(r"</?([A-Za-z][\w-]*)", tag)
+    return m.group(1).lower() if m else "html"
+
+
+def minify_html(src):
+    """Return ``src`` without comments and with whitespace collapsed."""
+    parts = [(m.lastgroup, m.group()) for m in _HTML_TOKEN_RE.finditer(src)
+             if m.lastgroup != "comment"]
+    out = []
+    for i, (kind, text) in enumerate(parts):
+        if kind != "text":
+            out.append(text)
+            continue
+        text = re.sub(r"\s+", " ", text)
+        if i == 0 or _tag_name(parts[i - 1][1]) in _HTML_BLOCK_TAGS:
+            text = text.lstrip()
+        if i + 1 == len(parts) or _tag_name(parts[i + 1][1]) in _HTML_BLOCK_TAGS:
+            text = text.rstrip()
+        out.append(text)
+    return "".join(out) + "\n"
+
+
+# -- pipeline stage ---------------------------------------------------------
+
+MINIFIERS = {".js": minify_js, ".css": minify_css, ".html": minify_html}
+
+
+def minify_files(files):
+    """Minify the text outputs in ``files`` in place.
+
+    Returns a size report: ``[(rel, bytes_before, bytes_after), ...]``.
+    """
+    report = []
+    for rel in sorted(files):
+        minify = MINIFIERS.get(os.path.splitext(rel)[1])
+        data = files[rel]
+        if minify is None or not isinstance(data, str):
+            continue
+        minified = minify(data)
+        before, after = len(data.encode("utf-8")), len(minified.encode("utf-8"))
+        if after < before:
+            files[rel] = minified
+        report.append((rel, before, min(before, after)))
+    return report
+
+
+def format_size_report(report):
+    """Lines like ``script.js  37,254 -> 17,418 bytes (-53%)`` for printing."""
+    width = max((len(rel) for rel, _, _ in report), default=0)
+    lines = []
+    for rel, before, after in report:
+        saved = 100 * (before - after) / before if before else 0
+        lines.append(f"{rel:<{width}}  {before:>7,} -> {after:>7,} bytes (-{saved:.0f}%)")
+    if len(report) > 1:
+        before, after = sum(r[1] for r in report), sum(r[2] for r in report)
+        saved = 100 * (before - after) / before if before else 0
+        lines.append(f"{'total':<{width}}  {before:>7,} -> {after:>7,} bytes (-{saved:.0f}%)")
+    return lines
@@ -0,0 +1,31 @@
+"""
+Build-time LCD overlay patterns.
+
+The engines darken every frame with a black scanline / sub-pixel grid that
+repeats every few pixels. Instead of painting it with thousands of
+``fillRect`` calls at startup, the build composites one period of it here and
+passes it in the runtime ``BUILD`` config as::
+
+    {"width": 2, "height": 2, "alpha": [31, 42, 13, 0]}
+
+``alpha`` is row-major, one 8-bit coverage value per pixel of the period; the
+runtime tiles it over the screen into a single overlay image.
+"""
+
+
+def lcd_pattern(width, height, fills):
+    """Composite black ``fills`` over one ``width`` x ``height`` period.
+
+    ``fills`` is a sequence of ``(x, y, w, h, alpha)`` rectangles inside the
+    period, painted in order with source-over like the canvas fills they
+    replace; every step is rounded to 8 bits, as a canvas stores it.
+    """
+    alpha = [0] * (width * height)
+    for x, y, w, h, a in fills:
+        if not (0 <= x and 0 <= y and x + w <= width and y + h <= height):
+            raise ValueError(f"fill {(x, y, w, h)} is outside the {width}x{height} period")
+        for py in range(y, y + h):
+            for px in range(x, x + w):
+                i = py * width + px
+                alpha[i] = round((a + alpha[i] / 255 * (1 - a)) * 255)
+    return {"width": width, "height": height, "alpha": alpha}
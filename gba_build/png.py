@@ -0,0 +1,215 @@
+"""
+Minimal PNG encoder and decoder (stdlib only).
+
+The encoder writes 8-bit RGBA, non-interlaced, with no ancillary chunks, so
+the same pixels always encode to the same bytes. The decoder reads any
+standard PNG into the same 8-bit RGBA.
+"""
+
+import struct
+import zlib
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def _chunk(kind, data):
+    body = kind + data
+    return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+
+
+def encode_png(width, height, rgba):
+    """Encode ``rgba`` (bytes-like, row-major, 4 bytes per pixel) as PNG."""
+    rgba = bytes(rgba)
+    stride = width * 4
+    if len(rgba) != stride * height:
+        raise ValueError(f"expected {stride * height} bytes of RGBA, got {len(rgba)}")
+    raw = b"".join(b"\x00" + rgba[y * stride:(y + 1) * stride] for y in range(height))
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return (PNG_SIGNATURE
+            + _chunk(b"IHDR", header)
+            + _chunk(b"IDAT", zlib.compress(raw, 9))
+            + _chunk(b"IEND", b""))
+
+
+def _paeth(a, b, c):
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    return b if pb <= pc else c
+
+
+# Bit depths allowed per color type, and samples per pixel
+_DEPTHS = {0: (1, 2, 4, 8, 16), 2: (8, 16), 3: (1, 2, 4, 8), 4: (8, 16), 6: (8, 16)}
+_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+# Adam7 passes: (x0, y0, dx, dy)
+_ADAM7 = ((0, 0, 8, 8), (4, 0, 8, 8), (0, 4, 4, 8), (2, 0, 4, 4),
+          (0, 2, 2, 4), (1, 0, 2, 2), (0, 1, 1, 2))
+
+
+def png_header(data):
+    """``(width, height, depth, color_type, interlace)`` of a PNG, checked.
+
+    Raises ``ValueError`` for anything ``decode_png`` cannot read.
+    """
+    if data[:8] != PNG_SIGNATURE or data[12:16] != b"IHDR":
+        raise ValueError("not a PNG file")
+    width, height, depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", data[16:29])
+    if depth not in _DEPTHS.get(color_type, ()) or interlace not in (0, 1):
+        raise ValueError(f"unsupported PNG (color type {color_type}, bit depth {depth}, "
+                         f"interlace {interlace})")
+    return width, height, depth, color_type, interlace
+
+
+def _unfilter(raw, pos, width, height, depth, channels):
+    """Reconstruct ``height`` filtered scanlines starting at ``raw[pos]``.
+
+    Returns the rows (each padded to whole bytes) and the position after them.
+    """
+    stride = (width * depth * channels + 7) // 8
+    bpp = max(1, depth * channels // 8)
+    pixels = bytearray(stride * height)
+    prev = bytearray(stride)
+    for y in range(height):
+        ftype = raw[pos]
+        line = bytearray(raw[pos + 1:pos + 1 + stride])
+        pos += 1 + stride
+        if ftype == 1:
+            for i in range(bpp, stride):
+                line[i] = (line[i] + line[i - bpp]) & 0xFF
+        elif ftype == 2:
+            for i in range(stride):
+                line[i] = (line[i] + prev[i]) & 0xFF
+        elif ftype == 3:
+            for i in range(stride):
+                left = line[i - bpp] if i >= bpp else 0
+                line[i] = (line[i] + ((left + prev[i]) >> 1)) & 0xFF
+        elif ftype == 4:
+            for i in range(stride):
+                left = line[i - bpp] if i >= bpp else 0
+                up_left = prev[i - bpp] if i >= bpp else 0
+                line[i] = (line[i] + _paeth(left, prev[i], up_left)) & 0xFF
+        pixels[y * stride:(y + 1) * stride] = line
+        prev = line
+    return pixels, pos
+
+
+def _samples(rows, width, height, depth, channels):
+    """Unfiltered rows as a flat list of sample values, one per channel."""
+    count = width * channels
+    if depth == 8:
+        return list(rows)
+    if depth == 16:
+        return list(struct.unpack(f">{len(rows) // 2}H", rows))
+    stride = (count * depth + 7) // 8
+    per_byte = 8 // depth
+    mask = (1 << depth) - 1
+    shifts = [8 - depth * (k + 1) for k in range(per_byte)]
+    out = []
+    for y in range(height):
+        row = []
+        for byte in rows[y * stride:(y + 1) * stride]:
+            row.extend((byte >> shift) & mask for shift in shifts)
+        out.extend(row[:count])
+    return out
+
+
+def decode_png(data):
+    """Decode a PNG into ``(width, height, rgba bytearray)``.
+
+    Handles every standard color type and bit depth: gray at 1/2/4/8/16
+    bits, palette at 1/2/4/8 bits (with tRNS), gray+alpha, RGB and RGBA at
+    8/16 bits, plain or Adam7-interlaced. 16-bit samples are scaled to 8
+    bits and sub-byte gray to the full 0-255 range; a gray or RGB tRNS key
+    color becomes transparent. Raises ``ValueError`` for anything else,
+    corrupt data included.
+    """
+    width, height, depth, color_type, interlace = png_header(data)
+    try:
+        return _decode(data, width, height, depth, color_type, interlace)
+    except (zlib.error, struct.error, IndexError, TypeError) as e:
+        raise ValueError(f"corrupt PNG ({e})") from None
+
+
+def _decode(data, width, height, depth, color_type, interlace):
+    pos = 8
+    idat = []
+    palette = None
+    trns = None
+    while pos < len(data):
+        length, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+        if kind == b"PLTE":
+            palette = body
+        elif kind == b"tRNS":
+            trns = body
+        elif kind == b"IDAT":
+            idat.append(body)
+        elif kind == b"IEND":
+            break
+    if color_type == 3 and palette is None:
+        raise ValueError("palette PNG without a PLTE chunk")
+
+    channels = _CHANNELS[color_type]
+    raw = zlib.decompress(b"".join(idat))
+    if not interlace:
+        rows, _ = _unfilter(raw, 0, width, height, depth, channels)
+        samples = _samples(rows, width, height, depth, channels)
+    else:
+        samples = [0] * (width * height * channels)
+        pos = 0
+        for x0, y0, dx, dy in _ADAM7:
+            pw, ph = -(-(width - x0) // dx), -(-(height - y0) // dy)
+            if pw <= 0 or ph <= 0:
+                continue
+            rows, pos = _unfilter(raw, pos, pw, ph, depth, channels)
+            sub = _samples(rows, pw, ph, depth, channels)
+            for py in range(ph):
+                for px in range(pw):
+                    at = ((y0 + py * dy) * width + x0 + px * dx) * channels
+                    src = (py * pw + px) * channels
+                    samples[at:at + channels] = sub[src:src + channels]
+
+    n = width * height
+    rgba = bytearray(n * 4)
+    if color_type == 3:
+        alpha = bytes(trns or b"") + b"\xff" * (256 - len(trns or b""))
+        palette = palette + bytes(768 - len(palette))
+        for i, index in enumerate(samples):
+            rgba[i * 4:i * 4 + 3] = palette[index * 3:index * 3 + 3]
+            rgba[i * 4 + 3] = alpha[index]
+        return width, height, rgba
+
+    key = None
+    if trns and color_type in (0, 2):
+        key = list(struct.unpack(f">{channels}H", trns[:channels * 2]))
+    if depth == 16:
+        pixels = bytes((v * 255 + 32767) // 65535 for v in samples)
+    elif depth < 8:
+        scale = 255 // ((1 << depth) - 1)
+        pixels = bytes(v * scale for v in samples)
+    else:
+        pixels = bytes(samples)
+
+    if color_type == 6:
+        rgba[:] = pixels
+    elif color_type == 2:
+        for c in range(3):
+            rgba[c::4] = pixels[c::3]
+        rgba[3::4] = b"\xff" * n
+    elif color_type == 0:
+        for c in range(3):
+            rgba[c::4] = pixels
+        rgba[3::4] = b"\xff" * n
+    else:
+        for c in range(3):
+            rgba[c::4] = pixels[0::2]
+        rgba[3::4] = pixels[1::2]
+    if key is not None:
+        for i in range(n):
+            if samples[i * channels:(i + 1) * channels] == key:
+                rgba[i * 4 + 3] = 0
+    return width, height, rgba
+
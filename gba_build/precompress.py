@@ -0,0 +1,77 @@
+"""
+Pre-encoded ``.gz`` siblings for static hosting.
+
+Every text output, and the raw binary world maps, gets a gzip sibling
+compressed at level 9 with each zlib strategy and memory level tried,
+keeping the smallest. The gzip header is fixed (no name, zero mtime), so
+equal inputs give byte-identical files. A ``precompressed.json`` manifest
+lists the size of each representation, so a host or the dev server can pick
+the smallest one without compressing at request time. Siblings that would
+not be smaller than the original are not written.
+"""
+
+import json
+import os
+import struct
+import zlib
+
+PRECOMPRESS_MANIFEST = "precompressed.json"
+
+# Text plus our raw binary formats; PNGs and zips are already deflated.
+COMPRESSIBLE_SUFFIXES = frozenset((
+    ".html", ".css", ".js", ".json", ".md", ".svg", ".txt", ".xml", ".bin"))
+
+_STRATEGIES = (
+    ("default", zlib.Z_DEFAULT_STRATEGY),
+    ("filtered", zlib.Z_FILTERED),
+    ("rle", zlib.Z_RLE),
+    ("fixed", zlib.Z_FIXED),
+    ("huffman", zlib.Z_HUFFMAN_ONLY),
+)
+_MEM_LEVELS = (9, 8)
+
+# ID1 ID2 CM FLG MTIME XFL(2 = max compression) OS(255 = unknown)
+_GZIP_HEADER = b"\x1f\x8b\x08\x00" + struct.pack("<I", 0) + b"\x02\xff"
+
+
+def _deflate(data, strategy, mem_level):
+    c = zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS, mem_level, strategy)
+    return c.compress(data) + c.flush()
+
+
+def gzip_best(data):
+    """Smallest gzip encoding of ``data``; returns ``(gz_bytes, method)``."""
+    best = None
+    for name, strategy in _STRATEGIES:
+        for mem_level in _MEM_LEVELS:
+            body = _deflate(data, strategy, mem_level)
+            if best is None or len(body) < len(best[0]):
+                best = (body, f"{name}/mem{mem_level}")
+    body, method = best
+    trailer = struct.pack("<II", zlib.crc32(data), len(data) & 0xFFFFFFFF)
+    return _GZIP_HEADER + body + trailer, method
+
+
+def precompress_files(files):
+    """Add ``<rel>.gz`` siblings and the size manifest to ``files`` in place.
+
+    Returns a size report: ``[(rel, bytes_identity, bytes_gzip), ...]`` for
+    the compressible outputs, with ``bytes_gzip`` equal to the identity size
+    where no sibling was written.
+    """
+    report = []
+    manifest = {}
+    for rel in sorted(files):
+        if os.path.splitext(rel)[1] not in COMPRESSIBLE_SUFFIXES:
+            continue
+        data = files[rel]
+        payload = data.encode("utf-8") if isinstance(data, str) else data
+        gz, _ = gzip_best(payload)
+        entry = {"identity": len(payload)}
+        if len(gz) < len(payload):
+            files[f"{rel}.gz"] = gz
+            entry["gzip"] = len(gz)
+        manifest[rel] = entry
+        report.append((rel, len(payload), entry.get("gzip", len(payload))))
+    files[PRECOMPRESS_MANIFEST] = json.dumps(manifest, indent=2, sort_keys=True) + "\n"
+    return report
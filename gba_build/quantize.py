@@ -0,0 +1,64 @@
+"""
+Build-time BGR555 quantization of image assets.
+
+The engines snap every frame to the GBA's 15-bit color space (5 bits per
+channel, optionally followed by a backlight gamma). Applying the same
+per-channel transfer to the PNG assets at build time lets the runtime skip
+its full-frame readback: sources are already on the GBA palette and only
+regions with runtime blending need re-snapping.
+"""
+
+import warnings
+
+from .cache import cached, input_hash
+from .png import decode_png, encode_png
+
+
+def transfer_lut(gamma=None):
+    """256-entry transfer table matching the engines' quantizeBGR555.
+
+    Values are snapped to multiples of 8; with ``gamma`` the snapped value is
+    then raised to that power, rounded half-to-even like a Uint8ClampedArray.
+    """
+    lut = bytearray(256)
+    for v in range(256):
+        q = (v // 8) * 8
+        if gamma is not None:
+            q = min(255, round((q / 255) ** gamma * 255))
+        lut[v] = q
+    return bytes(lut)
+
+
+def quantize_rgba(rgba, lut):
+    """Apply ``lut`` to the RGB channels of ``rgba`` in place; alpha is kept."""
+    for c in range(3):
+        rgba[c::4] = bytes(rgba[c::4]).translate(lut)
+    return rgba
+
+
+def quantize_png(data, lut):
+    """Return ``data`` (PNG bytes) re-encoded with its colors quantized by ``lut``."""
+    width, height, rgba = decode_png(data)
+    return encode_png(width, height, quantize_rgba(rgba, lut))
+
+
+def quantize_assets(files, lut):
+    """Quantize every ``assets/*.png`` in ``files`` in place.
+
+    Results are cached by input hash, so unchanged assets cost one lookup.
+    A PNG that cannot be decoded is left as is, with a warning. Returns the
+    sorted list of quantized paths.
+    """
+    done = []
+    for rel in sorted(files):
+        if not (rel.startswith("assets/") and rel.endswith(".png")):
+            continue
+        data = files[rel]
+        try:
+            files[rel] = cached("quantized", input_hash("bgr555", data, lut),
+                                lambda: quantize_png(data, lut))
+        except ValueError as e:
+            warnings.warn(f"{rel}: {e}; left unquantized", stacklevel=2)
+            continue
+        done.append(rel)
+    return done
@@ -0,0 +1,233 @@
+"""
+NumPy rasterizer for build-time baking of procedural art.
+
+Implements the subset of the Canvas 2D API the generated engines use to draw
+their procedural assets: solid and gradient paints, ``fillRect`` and path
+fills (lines, quadratic curves, arcs, ellipses), composited source-over in
+straight-alpha float RGBA. Path edges are antialiased by 4x4 supersampling
+at pixel centres, matching the canvas closely enough that a baked sheet can
+stand in for the runtime-generated one.
+"""
+
+import math
+import re
+
+try:
+    import numpy as np
+except ImportError:  # baking is optional; callers check HAVE_NUMPY
+    np = None
+
+HAVE_NUMPY = np is not None
+
+# Bump when the rasterization itself changes, to invalidate cached bakes.
+RASTER_VERSION = 1
+
+_SUPERSAMPLE = 4
+_CURVE_SEGMENTS = 16
+_ARC_SEGMENTS = 64
+
+
+def parse_color(value):
+    """Parse '#RRGGBB', 'rgb()/rgba()' or 'transparent' into an RGBA float tuple."""
+    value = value.strip()
+    if value == "transparent":
+        return (0.0, 0.0, 0.0, 0.0)
+    if value.startswith("#") and len(value) == 7:
+        return tuple(int(value[i:i + 2], 16) / 255 for i in (1, 3, 5)) + (1.0,)
+    m = re.fullmatch(r"rgba?\(([^)]*)\)", value)
+    if m:
+        parts = [float(p) for p in m.group(1).split(",")]
+        alpha = parts[3] if len(parts) == 4 else 1.0
+        return (parts[0] / 255, parts[1] / 255, parts[2] / 255, alpha)
+    raise ValueError(f"unsupported color {value!r}")
+
+
+class _Gradient:
+    def __init__(self):
+        self.stops = []
+
+    def add_color_stop(self, offset, color):
+        self.stops.append((offset, parse_color(color)))
+        self.stops.sort(key=lambda s: s[0])
+
+    def _param(self, xs, ys):
+        raise NotImplementedError
+
+    def sample(self, xs, ys):
+        """Colors at points (xs, ys), interpolated in premultiplied space like canvas."""
+        t = np.clip(self._param(xs, ys), 0.0, 1.0)
+        offsets = np.array([s[0] for s in self.stops])
+        colors = np.array([s[1] for s in self.stops])
+        premul = np.concatenate([colors[:, :3] * colors[:, 3:], colors[:, 3:]], axis=1)
+        out = np.stack([np.interp(t, offsets, premul[:, c]) for c in range(4)], axis=-1)
+        alpha = out[..., 3:]
+        rgb = np.divide(out[..., :3], alpha, out=np.zeros_like(out[..., :3]), where=alpha > 0)
+        return np.concatenate([rgb, alpha], axis=-1)
+
+
+class LinearGradient(_Gradient):
+    def __init__(self, x0, y0, x1, y1):
+        super().__init__()
+        self.p0 = (x0, y0)
+        self.d = (x1 - x0, y1 - y0)
+
+    def _param(self, xs, ys):
+        dx, dy = self.d
+        length2 = dx * dx + dy * dy or 1.0
+        return ((xs - self.p0[0]) * dx + (ys - self.p0[1]) * dy) / length2
+
+
+class RadialGradient(_Gradient):
+    """Concentric radial gradient (the only form the engines use)."""
+
+    def __init__(self, x0, y0, r0, x1, y1, r1):
+        super().__init__()
+        if (x0, y0) != (x1, y1):
+            raise ValueError("only concentric radial gradients are supported")
+        self.c = (x0, y0)
+        self.r0, self.r1 = r0, r1
+
+    def _param(self, xs, ys):
+        dist = np.hypot(xs - self.c[0], ys - self.c[1])
+        return (dist - self.r0) / ((self.r1 - self.r0) or 1.0)
+
+
+class Path:
+    """A canvas-style path, flattened to polygons as it is built."""
+
+    def __init__(self):
+        self.subpaths = []
+        self._cur = None
+
+    def move_to(self, x, y):
+        self._cur = [(x, y)]
+        self.subpaths.append(self._cur)
+        return self
+
+    def line_to(self, x, y):
+        if self._cur is None:
+            return self.move_to(x, y)
+        self._cur.append((x, y))
+        return self
+
+    def quadratic_curve_to(self, cx, cy, x, y):
+        x0, y0 = self._cur[-1]
+        for i in range(1, _CURVE_SEGMENTS + 1):
+            t = i / _CURVE_SEGMENTS
+            u = 1 - t
+            self._cur.append((u * u * x0 + 2 * u * t * cx + t * t * x,
+                              u * u * y0 + 2 * u * t * cy + t * t * y))
+        return self
+
+    def ellipse(self, cx, cy, rx, ry, start=0.0, end=2 * math.pi):
+        steps = max(2, int(_ARC_SEGMENTS * abs(end - start) / (2 * math.pi)))
+        for i in range(steps + 1):
+            a = start + (end - start) * i / steps
+            self.line_to(cx + rx * math.cos(a), cy + ry * math.sin(a))
+        return self
+
+    def arc(self, cx, cy, r, start=0.0, end=2 * math.pi):
+        return self.ellipse(cx, cy, r, r, start, end)
+
+    def close(self):
+        if self._cur:
+            self._cur.append(self._cur[0])
+        self._cur = None
+        return self
+
+
+class Canvas:
+    """Straight-alpha RGBA float canvas."""
+
+    def __init__(self, width, height):
+        if not HAVE_NUMPY:
+            raise ImportError("baking procedural art requires numpy")
+        self.width, self.height = width, height
+        self.px = np.zeros((height, width, 4), dtype=np.float64)
+
+    def view(self, x, y, w, h):
+        """Sub-canvas sharing pixels with this one, origin at (x, y).
+
+        Stands in for ``ctx.translate`` when drawing one tile of a sheet.
+        """
+        sub = Canvas.__new__(Canvas)
+        sub.width, sub.height = w, h
+        sub.px = self.px[y:y + h, x:x + w]
+        return sub
+
+    # -- painting ---------------------------------------------------------
+
+    def _composite(self, coverage, paint, x0, y0, x1, y1):
+        """Source-over ``paint`` into the box [x0, x1) x [y0, y1) with ``coverage``."""
+        dst = self.px[y0:y1, x0:x1]
+        if isinstance(paint, _Gradient):
+            ys, xs = np.mgrid[y0:y1, x0:x1] + 0.5
+            src = paint.sample(xs, ys)
+        else:
+            src = np.broadcast_to(np.array(paint, dtype=np.float64), dst.shape)
+        sa = src[..., 3] * coverage
+        da = dst[..., 3]
+        out_a = sa + da * (1 - sa)
+        safe = np.where(out_a > 0, out_a, 1.0)
+        for c in range(3):
+            dst[..., c] = np.where(
+                out_a > 0, (src[..., c] * sa + dst[..., c] * da * (1 - sa)) / safe, 0.0)
+        dst[..., 3] = out_a
+
+    def _clip_box(self, x, y, w, h):
+        x0 = max(0, int(math.floor(x)))
+        y0 = max(0, int(math.floor(y)))
+        x1 = min(self.width, int(math.ceil(x + w)))
+        y1 = min(self.height, int(math.ceil(y + h)))
+        return x0, y0, x1, y1
+
+    def fill_rect(self, x, y, w, h, paint):
+        if isinstance(paint, str):
+            paint = parse_color(paint)
+        x0, y0, x1, y1 = self._clip_box(x, y, w, h)
+        if x1 <= x0 or y1 <= y0:
+            return
+        # Fractional edges get partial coverage, as on a canvas.
+        xs = np.arange(x0, x1)
+        ys = np.arange(y0, y1)
+        cov_x = np.clip(np.minimum(xs + 1, x + w) - np.maximum(xs, x), 0, 1)
+        cov_y = np.clip(np.minimum(ys + 1, y + h) - np.maximum(ys, y), 0, 1)
+        self._composite(cov_y[:, None] * cov_x[None, :], paint, x0, y0, x1, y1)
+
+    def fill_path(self, path, paint):
+        """Fill ``path`` with the nonzero winding rule."""
+        if isinstance(paint, str):
+            paint = parse_color(paint)
+        points = [p for sub in path.subpaths for p in sub]
+        if not points:
+            return
+        px = [p[0] for p in points]
+        py = [p[1] for p in points]
+        x0, y0, x1, y1 = self._clip_box(min(px), min(py), max(px) - min(px), max(py) - min(py))
+        if x1 <= x0 or y1 <= y0:
+            return
+        n = _SUPERSAMPLE
+        offsets = (np.arange(n) + 0.5) / n
+        sx = (np.arange(x0, x1)[:, None] + offsets[None, :]).ravel()
+        sy = (np.arange(y0, y1)[:, None] + offsets[None, :]).ravel()
+        gx, gy = np.meshgrid(sx, sy)
+        winding = np.zeros(gx.shape, dtype=np.int32)
+        for sub in path.subpaths:
+            ring = sub if sub[0] == sub[-1] else sub + [sub[0]]
+            for (ax, ay), (bx, by) in zip(ring, ring[1:]):
+                if ay == by:
+                    continue
+                upward = (ay <= gy) & (by > gy)
+                downward = (by <= gy) & (ay > gy)
+                cross = (bx - ax) * (gy - ay) - (gx - ax) * (by - ay)
+                winding += (upward & (cross > 0)).astype(np.int32)
+                winding -= (downward & (cross < 0)).astype(np.int32)
+        inside = (winding != 0).astype(np.float64)
+        coverage = inside.reshape(y1 - y0, n, x1 - x0, n).mean(axis=(1, 3))
+        self._composite(coverage, paint, x0, y0, x1, y1)
+
+    # -- output -----------------------------------------------------------
+
+    def to_rgba8(self):
+        """Pixels as a (height, width, 4) uint8 array."""
+        return np.clip(np.rint(self.px * 255), 0, 255).astype(np.uint8)
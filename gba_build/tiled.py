@@ -0,0 +1,433 @@
+"""
+Tiled map import: a ``.tmx`` or ``.json``/``.tmj`` map compiled to the
+chunked runtime world of ``maps.py``.
+
+Tile layers are sorted into roles by name or by a boolean custom property:
+
+- ``collision`` (or a layer named "collision"): not drawn; every non-empty
+  cell is blocked.
+- ``over`` (or a layer named "over" or "overlay"): the overlay plane drawn
+  above the actors, for tree tops and the like. Only for generators whose
+  runtime has one.
+- anything else: the base plane, later layers painted over earlier ones.
+  Cells no layer paints are tile 0. Hidden base layers are skipped.
+
+Tile ids are the index within the tileset the drawn layers use (one; the
+runtime draws from a single sheet). A cell is blocked when its base tile is
+solid: the tileset's boolean ``solid`` tile property where set, otherwise the
+generator's own solid set. Flipped or rotated tiles are rejected.
+
+Object layers place the cast, in tiles: an object of type (class) ``player``
+or ``spawn`` is the player's start, and each ``npc`` object an NPC, with its
+``dialogue`` property split into lines. Rectangles and points use their
+top-left corner, tile objects the cell they stand on. A map without a player
+object starts the player on the free tile nearest ``DEFAULT_START``, the
+runtimes' own default; one placing the player on a blocked tile is an
+error. Infinite maps are cropped to the cells their layers cover.
+
+Compiled worlds are cached by a hash of the raw bytes of the map and its
+external tilesets, found by a scan rather than a parse, so importing an
+unchanged map again costs reading its files and one cache read.
+"""
+
+import base64
+import gzip
+import html
+import json
+import os
+import re
+import struct
+import xml.etree.ElementTree as ET
+import zlib
+
+from .cache import cached, input_hash
+from .maps import CHUNK_SIZE, EMPTY, WORLD_DIR, split_map
+
+IMPORTER_VERSION = 2
+
+FLIP_FLAGS = 0xF0000000
+COLLISION_NAMES = ("collision",)
+OVER_NAMES = ("over", "overlay")
+PLAYER_TYPES = ("player", "spawn")
+NPC_TYPES = ("npc",)
+DEFAULT_START = (5, 5)
+
+_LENGTH = struct.Struct("<I")
+_TMX_TILESET = re.compile(rb'<tileset\b[^>]*?\bsource="([^"]*)"')
+_JSON_TILESET = re.compile(rb'"source"\s*:\s*("(?:[^"\\]|\\.)*")')
+
+
+def import_tiled(files, path, tile, solid, overlay=False, chunk=CHUNK_SIZE, root=WORLD_DIR):
+    """Replace the world under ``root`` in ``files`` with the Tiled map at ``path``.
+
+    ``tile`` is the runtime's tile size in pixels, ``solid`` its solid tile
+    ids, and ``overlay`` whether it draws an overlay plane. Returns the
+    objects for the runtime: ``{"player": [x, y], "npcs": [{"x", "y"[,
+    "dialogue"]}, ...]}``.
+    """
+    sources = []
+    for source in source_files(path):
+        with open(source, "rb") as f:
+            sources.append(f.read())
+    key = input_hash("tiled", IMPORTER_VERSION, *sources, tile, sorted(solid), overlay, chunk)
+    parts = _unpack(cached("tiled", key, lambda: _pack(
+        compile_map(load_map(path), tile, solid, overlay, chunk))))
+    for rel in [rel for rel in files if rel.startswith(root + "/")]:
+        del files[rel]
+    files[f"{root}/index.bin"] = parts[1]
+    files.update((f"{root}/{number}.bin", data) for number, data in enumerate(parts[2:]))
+    return json.loads(parts[0])
+
+
+def compile_map(doc, tile, solid, overlay=False, chunk=CHUNK_SIZE):
+    """Compile a loaded map; returns ``[objects JSON, index, chunk, ...]`` as bytes."""
+    name = doc["path"]
+    if doc["orientation"] != "orthogonal":
+        raise ValueError(f"{name}: only orthogonal maps are supported")
+    if (doc["tilewidth"], doc["tileheight"]) != (tile, tile):
+        raise ValueError(f"{name}: tiles are {doc['tilewidth']}x{doc['tileheight']}, "
+                         f"the runtime's are {tile}x{tile}")
+    x0, y0, width, height = _bounds(doc)
+    size = width * height
+
+    base, over, blocked = bytearray(size), None, bytearray(size)
+    used = set()
+    for layer in doc["layers"]:
+        if layer["kind"] != "tiles":
+            continue
+        role = _role(layer)
+        if role != "collision" and not layer["visible"]:
+            continue
+        cells = _place(layer, x0, y0, width, height)
+        if role == "collision":
+            for i, gid in enumerate(cells):
+                if gid:
+                    blocked[i] = 1
+            continue
+        if role == "over":
+            if not overlay:
+                raise ValueError(f"{name}: layer {layer['name']!r} is an overlay, "
+                                 "which this runtime does not draw")
+            if over is None:
+                over = bytearray([EMPTY]) * size
+            plane = over
+        else:
+            plane = base
+        lut = {gid: _tile_id(doc, gid, used) for gid in set(cells) if gid}
+        for i, gid in enumerate(cells):
+            if gid:
+                plane[i] = lut[gid]
+
+    solid = set(solid)
+    if used:
+        for tid, props in _tileset_of(doc, next(iter(used)))["tiles"].items():
+            if "solid" in props:
+                (solid.add if props["solid"] else solid.discard)(tid)
+    table = bytes(1 if tid in solid else 0 for tid in range(256))
+    collision = bytes(a | b for a, b in zip(base.translate(table), blocked))
+
+    layers = [base] if not overlay else [base, over or bytearray([EMPTY]) * size]
+    index, chunks = split_map(width, height, layers, collision, chunk)
+    objects = _objects(doc, x0, y0, width, height)
+    objects["player"] = _start(doc, objects, collision, width, height)
+    return [json.dumps(objects, sort_keys=True).encode("utf-8"), index, *chunks]
+
+
+def source_files(path):
+    """The map file and the external tilesets it references, without parsing it."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data.lstrip()[:1] == b"<":
+        refs = [html.unescape(ref.decode("utf-8")) for ref in _TMX_TILESET.findall(data)]
+    else:
+        refs = [json.loads(ref) for ref in _JSON_TILESET.findall(data)]
+    return [path] + [os.path.join(os.path.dirname(path), ref) for ref in refs]
+
+
+def load_map(path):
+    """Parse a Tiled map into the format-independent form ``compile_map`` reads."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data.lstrip()[:1] == b"<":
+        return _load_tmx(path, ET.fromstring(data))
+    return _load_json(path, json.loads(data))
+
+
+# ---------------------------------------------------------------------------
+# JSON (.json / .tmj)
+
+def _load_json(path, raw):
+    tilesets = []
+    for ts in raw.get("tilesets", []):
+        if "source" in ts:
+            tiles = _external_tiles(path, ts["source"])
+        else:
+            tiles = _json_tiles(ts)
+        tilesets.append({"firstgid": ts["firstgid"], "tiles": tiles})
+    doc = _doc(path, raw.get("orientation", "orthogonal"), raw["width"], raw["height"],
+               raw["tilewidth"], raw["tileheight"], raw.get("infinite", False), tilesets)
+    _json_layers(path, raw.get("layers", []), doc["layers"])
+    return doc
+
+
+def _json_tiles(ts):
+    return {t["id"]: _json_props(t.get("properties")) for t in ts.get("tiles", [])}
+
+
+def _json_props(props):
+    if isinstance(props, dict):  # before Tiled 1.2
+        return props
+    return {p["name"]: p["value"] for p in props or []}
+
+
+def _json_layers(path, layers, out):
+    for layer in layers:
+        kind = layer["type"]
+        if kind == "group":
+            _json_layers(path, layer.get("layers", []), out)
+            continue
+        common = {"name": layer.get("name", ""), "visible": layer.get("visible", True),
+                  "props": _json_props(layer.get("properties"))}
+        if kind == "tilelayer":
+            encoding, compression = layer.get("encoding", "csv"), layer.get("compression", "")
+            runs = [(c["x"], c["y"], c["width"], c["height"],
+                     _json_data(path, c["data"], encoding, compression))
+                    for c in layer["chunks"]] if "chunks" in layer else [
+                (layer.get("x", 0), layer.get("y", 0), layer["width"], layer["height"],
+                 _json_data(path, layer["data"], encoding, compression))]
+            out.append({"kind": "tiles", "runs": runs, **common})
+        elif kind == "objectgroup":
+            out.append({"kind": "objects", "objects": [
+                {"type": obj.get("type") or obj.get("class", ""), "x": obj["x"], "y": obj["y"],
+                 "gid": obj.get("gid", 0), "props": _json_props(obj.get("properties"))}
+                for obj in layer.get("objects", [])], **common})
+
+
+def _json_data(path, data, encoding, compression):
+    if encoding == "base64":
+        return _gids(path, data, compression)
+    return data
+
+
+# ---------------------------------------------------------------------------
+# TMX (.tmx / .tsx)
+
+def _load_tmx(path, root):
+    tilesets = []
+    for ts in root.iter("tileset"):
+        if "source" in ts.attrib:
+            tiles = _external_tiles(path, ts.get("source"))
+        else:
+            tiles = _tmx_tiles(ts)
+        tilesets.append({"firstgid": int(ts.get("firstgid")), "tiles": tiles})
+    doc = _doc(path, root.get("orientation", "orthogonal"),
+               int(root.get("width")), int(root.get("height")),
+               int(root.get("tilewidth")), int(root.get("tileheight")),
+               root.get("infinite") == "1", tilesets)
+    _tmx_layers(path, root, doc["layers"])
+    return doc
+
+
+def _tmx_tiles(ts):
+    return {int(t.get("id")): _tmx_props(t) for t in ts.findall("tile")}
+
+
+def _tmx_props(element):
+    props = {}
+    for prop in element.findall("properties/property"):
+        value = prop.get("value", prop.text or "")
+        kind = prop.get("type", "string")
+        if kind == "bool":
+            value = value == "true"
+        elif kind in ("int", "object"):
+            value = int(value)
+        elif kind == "float":
+            value = float(value)
+        props[prop.get("name")] = value
+    return props
+
+
+def _tmx_layers(path, parent, out):
+    for layer in parent:
+        if layer.tag == "group":
+            _tmx_layers(path, layer, out)
+            continue
+        if layer.tag not in ("layer", "objectgroup"):
+            continue
+        common = {"name": layer.get("name", ""), "visible": layer.get("visible", "1") != "0",
+                  "props": _tmx_props(layer)}
+        if layer.tag == "layer":
+            data = layer.find("data")
+            encoding, compression = data.get("encoding", "xml"), data.get("compression", "")
+            chunks = data.findall("chunk")
+            runs = [(int(c.get("x")), int(c.get("y")), int(c.get("width")), int(c.get("height")),
+                     _tmx_data(path, c, encoding, compression)) for c in chunks] if chunks else [
+                (0, 0, int(layer.get("width")), int(layer.get("height")),
+                 _tmx_data(path, data, encoding, compression))]
+            out.append({"kind": "tiles", "runs": runs, **common})
+        else:
+            out.append({"kind": "objects", "objects": [
+                {"type": obj.get("type") or obj.get("class", ""),
+                 "x": float(obj.get("x", 0)), "y": float(obj.get("y", 0)),
+                 "gid": int(obj.get("gid", 0)), "props": _tmx_props(obj)}
+                for obj in layer.findall("object")], **common})
+
+
+def _tmx_data(path, element, encoding, compression):
+    if encoding == "csv":
+        return [int(n) for n in element.text.replace("\n", "").split(",") if n.strip()]
+    if encoding == "base64":
+        return _gids(path, element.text.strip(), compression)
+    return [int(t.get("gid", 0)) for t in element.findall("tile")]
+
+
+# ---------------------------------------------------------------------------
+# Shared
+
+def _doc(path, orientation, width, height, tilewidth, tileheight, infinite, tilesets):
+    return {"path": path, "orientation": orientation, "width": width, "height": height,
+            "tilewidth": tilewidth, "tileheight": tileheight, "infinite": infinite,
+            "tilesets": sorted(tilesets, key=lambda ts: ts["firstgid"]), "layers": []}
+
+
+def _external_tiles(path, source):
+    """Tile properties of an external tileset (``.tsx``, ``.tsj`` or ``.json``)."""
+    with open(os.path.join(os.path.dirname(path), source), "rb") as f:
+        data = f.read()
+    if data.lstrip()[:1] == b"<":
+        return _tmx_tiles(ET.fromstring(data))
+    return _json_tiles(json.loads(data))
+
+
+def _gids(path, text, compression):
+    data = base64.b64decode(text)
+    if compression == "zlib":
+        data = zlib.decompress(data)
+    elif compression == "gzip":
+        data = gzip.decompress(data)
+    elif compression:
+        raise ValueError(f"{path}: {compression} layer compression is not supported")
+    if len(data) % 4:
+        raise ValueError(f"{path}: layer data is not a whole number of 32-bit tile ids")
+    # Tiled stores gids as 32-bit little-endian, whatever the platform
+    return struct.unpack(f"<{len(data) // 4}I", data)
+
+
+def _bounds(doc):
+    """The cells the map covers: ``(x0, y0, width, height)``."""
+    if not doc["infinite"]:
+        return 0, 0, doc["width"], doc["height"]
+    runs = [run for layer in doc["layers"] if layer["kind"] == "tiles" for run in layer["runs"]]
+    if not runs:
+        raise ValueError(f"{doc['path']}: the infinite map has no tiles")
+    x0 = min(x for x, _, _, _, _ in runs)
+    y0 = min(y for _, y, _, _, _ in runs)
+    x1 = max(x + w for x, _, w, _, _ in runs)
+    y1 = max(y + h for _, y, _, h, _ in runs)
+    return x0, y0, x1 - x0, y1 - y0
+
+
+def _place(layer, x0, y0, width, height):
+    """A layer's gids as one ``width * height`` row-major list of the map's cells."""
+    runs = layer["runs"]
+    if len(runs) == 1 and runs[0][:4] == (x0, y0, width, height):
+        return runs[0][4]
+    cells = [0] * (width * height)
+    for x, y, w, h, gids in runs:
+        for row in range(h):
+            at = (y - y0 + row) * width + x - x0
+            cells[at:at + w] = gids[row * w:(row + 1) * w]
+    return cells
+
+
+def _role(layer):
+    name = layer["name"].lower()
+    if layer["props"].get("collision") or name in COLLISION_NAMES:
+        return "collision"
+    if layer["props"].get("over") or name in OVER_NAMES:
+        return "over"
+    return "base"
+
+
+def _tileset_of(doc, gid):
+    found = None
+    for ts in doc["tilesets"]:
+        if ts["firstgid"] > gid:
+            break
+        found = ts
+    if found is None:
+        raise ValueError(f"{doc['path']}: tile {gid} is in no tileset")
+    return found
+
+
+def _tile_id(doc, gid, used):
+    if gid & FLIP_FLAGS:
+        raise ValueError(f"{doc['path']}: flipped or rotated tiles are not supported")
+    ts = _tileset_of(doc, gid)
+    used.add(ts["firstgid"])
+    if len(used) > 1:
+        raise ValueError(f"{doc['path']}: drawn layers use more than one tileset")
+    tid = gid - ts["firstgid"]
+    if tid >= EMPTY:
+        raise ValueError(f"{doc['path']}: tile {tid} is past the runtime's {EMPTY} tiles")
+    return tid
+
+
+def _objects(doc, x0, y0, width, height):
+    found = {"npcs": []}
+    for layer in doc["layers"]:
+        if layer["kind"] != "objects":
+            continue
+        for obj in layer["objects"]:
+            kind = obj["type"].lower()
+            if kind not in PLAYER_TYPES + NPC_TYPES:
+                continue
+            tx = int(obj["x"] // doc["tilewidth"]) - x0
+            # Tile objects are anchored at their bottom-left corner
+            y = obj["y"] - 1 if obj["gid"] else obj["y"]
+            ty = int(y // doc["tileheight"]) - y0
+            if not (0 <= tx < width and 0 <= ty < height):
+                raise ValueError(f"{doc['path']}: {kind} object at ({tx}, {ty}) is off the map")
+            if kind in PLAYER_TYPES:
+                if "player" in found:
+                    raise ValueError(f"{doc['path']}: more than one player object")
+                found["player"] = [tx, ty]
+            else:
+                npc = {"x": tx, "y": ty}
+                if obj["props"].get("dialogue"):
+                    npc["dialogue"] = str(obj["props"]["dialogue"]).splitlines()
+                found["npcs"].append(npc)
+    return found
+
+
+def _start(doc, objects, collision, width, height):
+    """The player's start: its object's cell, or the free cell nearest ``DEFAULT_START``."""
+    if "player" in objects:
+        tx, ty = objects["player"]
+        if collision[ty * width + tx]:
+            raise ValueError(f"{doc['path']}: player object at ({tx}, {ty}) is on a blocked tile")
+        return [tx, ty]
+    taken = {(npc["x"], npc["y"]) for npc in objects["npcs"]}
+    cx, cy = min(DEFAULT_START[0], width - 1), min(DEFAULT_START[1], height - 1)
+    for r in range(max(width, height)):
+        ring = [(x, y) for y in range(max(0, cy - r), min(height, cy + r + 1))
+                for x in range(max(0, cx - r), min(width, cx + r + 1))
+                if max(abs(x - cx), abs(y - cy)) == r]
+        free = [(x, y) for x, y in ring if not collision[y * width + x] and (x, y) not in taken]
+        if free:
+            x, y = min(free, key=lambda c: ((c[0] - cx) ** 2 + (c[1] - cy) ** 2, c[1], c[0]))
+            return [x, y]
+    raise ValueError(f"{doc['path']}: no free tile to start the player on")
+
+
+def _pack(parts):
+    return b"".join(_LENGTH.pack(len(part)) + part for part in parts)
+
+
+def _unpack(data):
+    parts, at = [], 0
+    while at < len(data):
+        (size,), at = _LENGTH.unpack_from(data, at), at + _LENGTH.size
+        parts.append(bytes(data[at:at + size]))
+        at += size
+    return parts
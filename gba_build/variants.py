@@ -0,0 +1,58 @@
+"""
+Variant registry: the built-in packages and JSON variant files.
+"""
+
+import json
+import os
+
+from .core import Variant
+
+# name -> (generator module, output directory, archive file)
+BUILTIN = {
+    "gba_rpg": ("package_gba", "gba_rpg_package", "gba_rpg.zip"),
+    "gba_rpg_emerald": ("create_gba_emerald", "gba_rpg_emerald", "gba_rpg_emerald.zip"),
+}
+
+
+def builtin_variant(name, out_dir, tree=True, **options):
+    """Return the built-in variant ``name`` rooted under ``out_dir``."""
+    try:
+        generator, dirname, archive = BUILTIN[name]
+    except KeyError:
+        raise KeyError(f"unknown variant {name!r} (known: {', '.join(sorted(BUILTIN))})") from None
+    return Variant(
+        name=name,
+        generator=generator,
+        root=os.path.join(out_dir, dirname),
+        archive=os.path.join(out_dir, archive),
+        options=options,
+        tree=tree,
+    )
+
+
+def load_variants_file(path, out_dir):
+    """Load variants from a JSON file holding a list of variant objects.
+
+    Each object needs ``name`` and ``generator`` (a module name or a built-in
+    variant name); ``root`` defaults to ``<out_dir>/<name>``, ``archive`` to
+    ``<out_dir>/<name>.zip`` (``null`` disables the archive), ``tree: false``
+    builds the archive only, and ``prefix`` and ``options`` are passed through.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    variants = []
+    for entry in entries:
+        name = entry["name"]
+        generator = entry["generator"]
+        if generator in BUILTIN:
+            generator = BUILTIN[generator][0]
+        variants.append(Variant(
+            name=name,
+            generator=generator,
+            root=entry.get("root") or os.path.join(out_dir, name),
+            archive=entry.get("archive", os.path.join(out_dir, f"{name}.zip")),
+            prefix=entry.get("prefix"),
+            options=entry.get("options") or {},
+            tree=entry.get("tree", True),
+        ))
+    return variants
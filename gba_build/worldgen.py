@@ -0,0 +1,267 @@
+"""
+Seeded procedural worlds, generated with NumPy.
+
+Instead of their hand-authored demo map, the generators can ship a world
+grown from a seed (``options["world"]``). Every tile is a pure function of
+the seed and its coordinates:
+
+* elevation and moisture are fractal value noise; water fills the land
+  below ``water_level`` and tall grass the ground moister than
+  ``tall_level``;
+* paths join jittered waypoints on a ``path_spacing`` lattice with L-shaped
+  runs, carved through whatever they cross;
+* trees (denser where the forest noise is high), flowers and rocks are
+  scattered over plain grass by per-tile hashes, and every tree puts its
+  top into the overlay layer on the tile above;
+* the world edge is a ring of trees, and the ``clearing`` rectangle around
+  the spawn points is kept dry and free of obstacles.
+
+Engines number their tiles differently, so a generator maps roles to tile
+ids: ``grass``, ``path``, ``water`` and ``tall`` list variants (picked per
+tile by hash); ``tree``, ``flower`` and the optional ``tree_top`` and
+``rock`` are single ids. Without ``tree_top`` the world has one layer.
+
+As no tile depends on its neighbours' chunks, rows of chunks are generated
+in parallel worker processes, each encoding its own chunk maps, and the
+result is identical to a serial run.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from .maps import CHUNK_SIZE, EMPTY, encode_map, pack_chunks
+
+try:
+    import numpy as np
+except ImportError:  # only seeded worlds need it; callers check HAVE_NUMPY
+    np = None
+
+HAVE_NUMPY = np is not None
+
+# Tunables; a world's options may override any of them.
+DEFAULT_PARAMS = {
+    "terrain_scale": 48,    # tiles per cell of the coarsest noise octave
+    "octaves": 4,
+    "water_level": 0.3,
+    "tall_level": 0.66,
+    "forest_scale": 32,
+    "tree_density": 0.02,   # chance of a tree on plain grass,
+    "forest_density": 0.3,  # plus up to this much in the thickest forest
+    "flower_density": 0.03,
+    "rock_density": 0.005,
+    "path_spacing": 40,     # tiles between path waypoints
+    "path_links": 0.75,     # chance that neighbouring waypoints are joined
+}
+
+# Hash channels, so that the fields drawn from one seed are independent
+(_ELEVATION, _MOISTURE, _FOREST, _VARIANT, _TREE, _FLOWER, _ROCK,
+ _WAYPOINT_X, _WAYPOINT_Y, _LINK_RIGHT, _LINK_DOWN) = range(11)
+
+_MASK64 = (1 << 64) - 1
+
+
+def generate_world(width, height, tiles, solid, seed=0, clearing=None,
+                   chunk=CHUNK_SIZE, jobs=None, **params):
+    """Generate a seeded world; returns ``(index, chunks)`` like ``maps.split_map``.
+
+    ``tiles`` maps roles to tile ids (see the module docstring), ``solid``
+    is the set of blocked tile ids, ``clearing`` an ``(x0, y0, x1, y1)``
+    half-open tile rectangle kept clear, and ``params`` overrides
+    ``DEFAULT_PARAMS``. Rows of chunks are spread over ``jobs`` worker
+    processes (default: one per core).
+    """
+    if not HAVE_NUMPY:
+        raise ImportError("generating worlds requires numpy")
+    unknown = set(params) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError(f"unknown world parameters: {', '.join(sorted(unknown))}")
+    if not (0 < width <= 0xFFFF and 0 < height <= 0xFFFF):
+        raise ValueError(f"world size {width}x{height} does not fit the map format")
+    spec = {
+        "width": width, "height": height, "chunk": chunk, "seed": seed & _MASK64,
+        "tiles": tiles, "solid": sorted(solid), "clearing": clearing,
+        **DEFAULT_PARAMS, **params,
+    }
+    rows = range(-(-height // chunk))
+    workers = min(len(rows), jobs or os.cpu_count() or 1)
+    if workers <= 1:
+        bands = list(map(_chunk_row, repeat(spec), rows))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            bands = list(pool.map(_chunk_row, repeat(spec), rows,
+                                  chunksize=max(1, len(rows) // (workers * 4))))
+    layers = 2 if "tree_top" in tiles else 1
+    return pack_chunks(width, height, layers, chunk, [data for band in bands for data in band])
+
+
+def generate_rows(spec, y0, y1):
+    """Tile rows ``[y0, y1)`` of a world: ``(base, over, blocked)`` uint8 arrays.
+
+    ``over`` is ``None`` for worlds without tree tops.
+    """
+    width, height = spec["width"], spec["height"]
+    xs = np.arange(width)
+    # One row of lookahead: trees there put their tops on row y1 - 1
+    base, tree = _terrain(spec, xs, np.arange(y0, min(y1 + 1, height)))
+    over = None
+    if "tree_top" in spec["tiles"]:
+        over = np.full((y1 - y0, width), EMPTY, dtype=np.uint8)
+        over[np.nonzero(tree[1:])] = spec["tiles"]["tree_top"]
+    base = base[:y1 - y0]
+    blocked = np.isin(base, spec["solid"]).astype(np.uint8)
+    return base, over, blocked
+
+
+def _chunk_row(spec, cy):
+    """The encoded chunk maps of chunk row ``cy``, left to right."""
+    chunk, width = spec["chunk"], spec["width"]
+    y0 = cy * chunk
+    base, over, blocked = generate_rows(spec, y0, min(spec["height"], y0 + chunk))
+    maps = []
+    for x0 in range(0, width, chunk):
+        cut = np.s_[:, x0:x0 + chunk]
+        layers = [base[cut].tobytes()] + ([] if over is None else [over[cut].tobytes()])
+        maps.append(encode_map(min(chunk, width - x0), base.shape[0], layers,
+                               blocked[cut].tobytes()))
+    return maps
+
+
+def _terrain(spec, xs, ys):
+    """Base tile ids for the grid of columns ``xs`` by rows ``ys``, and the tree mask."""
+    tiles, seed = spec["tiles"], spec["seed"]
+    x, y = xs[None, :], ys[:, None]
+
+    elevation = _fractal(xs, ys, spec["terrain_scale"], spec["octaves"], seed, _ELEVATION)
+    moisture = _fractal(xs, ys, spec["terrain_scale"], spec["octaves"], seed, _MOISTURE)
+    variant = _hash(x, y, seed, _VARIANT)
+    clear = np.zeros(elevation.shape, dtype=bool)
+    if spec["clearing"]:
+        x0, y0, x1, y1 = spec["clearing"]
+        clear = (x >= x0) & (x < x1) & (y >= y0) & (y < y1)
+
+    water = (elevation < spec["water_level"]) & ~clear
+    tall = ~water & (moisture > spec["tall_level"])
+    path = _paths(spec, xs, ys)
+    base = _pick(tiles["grass"], variant)
+    base = np.where(tall, _pick(tiles["tall"], variant), base)
+    base = np.where(water, _pick(tiles["water"], variant), base)
+    base = np.where(path, _pick(tiles["path"], variant), base)
+
+    plain = ~(water | tall | path)
+    forest = _fractal(xs, ys, spec["forest_scale"], 2, seed, _FOREST)
+    chance = spec["tree_density"] + spec["forest_density"] * np.clip(forest * 2 - 1, 0, 1)
+    tree = plain & ~clear & (_hash(x, y, seed, _TREE) < chance)
+    rock = np.zeros(tree.shape, dtype=bool)
+    if "rock" in tiles:
+        rock = plain & ~clear & ~tree & (_hash(x, y, seed, _ROCK) < spec["rock_density"])
+    flower = plain & ~tree & ~rock & (_hash(x, y, seed, _FLOWER) < spec["flower_density"])
+    tree |= (x == 0) | (y == 0) | (x == spec["width"] - 1) | (y == spec["height"] - 1)
+
+    base[flower] = tiles["flower"]
+    base[rock] = tiles.get("rock", 0)
+    base[tree] = tiles["tree"]
+    return base, tree
+
+
+def _paths(spec, xs, ys):
+    """Mask of the path tiles in the grid of columns ``xs`` by rows ``ys``.
+
+    Waypoint (i, j) is joined to its right neighbour by a run along its own
+    row then down or up the neighbour's column, and to the one below by a
+    run down its own column then along the neighbour's row.
+    """
+    spacing, seed = spec["path_spacing"], spec["seed"]
+    mask = np.zeros((len(ys), len(xs)), dtype=bool)
+    cols = -(-spec["width"] // spacing)
+    rows = -(-spec["height"] // spacing)
+    # A run reaches at most one waypoint cell beyond its start; the grid in
+    # hand also holds the right and lower neighbours of its last cells
+    gx = np.arange(max(0, xs[0] // spacing - 1), min(cols, xs[-1] // spacing + 2))
+    gy = np.arange(max(0, ys[0] // spacing - 1), min(rows, ys[-1] // spacing + 2))
+    cell_x, cell_y = gx[None, :], gy[:, None]
+    wx = _waypoints(cell_x, spec["width"], spacing, _hash(cell_x, cell_y, seed, _WAYPOINT_X))
+    wy = _waypoints(cell_y, spec["height"], spacing, _hash(cell_x, cell_y, seed, _WAYPOINT_Y))
+    right = _hash(cell_x, cell_y, seed, _LINK_RIGHT) < spec["path_links"]
+    down = _hash(cell_x, cell_y, seed, _LINK_DOWN) < spec["path_links"]
+
+    def run(x0, y0, x1, y1):
+        """Mark the tiles from (x0, y0) to (x1, y1) along a row or column."""
+        r0, r1 = sorted((y0 - ys[0], y1 - ys[0]))
+        c0, c1 = sorted((x0 - xs[0], x1 - xs[0]))
+        if r1 >= 0 and c1 >= 0:
+            mask[max(0, r0):r1 + 1, max(0, c0):c1 + 1] = True
+
+    for j in range(len(gy)):
+        for i in range(len(gx)):
+            ax, ay = wx[j, i], wy[j, i]
+            if right[j, i] and i + 1 < len(gx):
+                bx, by = wx[j, i + 1], wy[j, i + 1]
+                run(ax, ay, bx, ay)
+                run(bx, ay, bx, by)
+            if down[j, i] and j + 1 < len(gy):
+                bx, by = wx[j + 1, i], wy[j + 1, i]
+                run(ax, ay, ax, by)
+                run(ax, by, bx, by)
+    return mask
+
+
+def _waypoints(cells, size, spacing, u):
+    """Waypoint coordinates along one axis: a jittered spot inside each cell."""
+    start = cells * spacing
+    span = np.minimum(spacing, size - start)
+    margin = np.minimum(2, span // 2)
+    pos = start + margin + (u * np.maximum(1, span - 2 * margin)).astype(np.int64)
+    return np.clip(pos, 1, size - 2)
+
+
+def _pick(ids, u):
+    """Per-tile choice from ``ids`` by the uniform values ``u``."""
+    return np.asarray(ids, dtype=np.uint8)[(u * len(ids)).astype(np.intp)]
+
+
+def _hash(x, y, seed, channel):
+    """Uniform floats in [0, 1) from non-negative integer arrays (splitmix64)."""
+    salt = (seed * 0x165667B19E3779F9 + channel * 0x27D4EB2F165667C5) & _MASK64
+    z = (x.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+         + y.astype(np.uint64) * np.uint64(0xC2B2AE3D27D4EB4F)
+         + np.uint64(salt))
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    z = z ^ (z >> np.uint64(31))
+    return (z >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
+
+
+def _value_noise(xs, ys, scale, seed, channel):
+    """Smooth noise in [0, 1) over the grid of columns ``xs`` by rows ``ys``.
+
+    Lattice values are hashed once per lattice point in the window, then
+    interpolated with a smoothstep.
+    """
+    fx, fy = xs / scale, ys / scale
+    ix, iy = np.floor(fx).astype(np.int64), np.floor(fy).astype(np.int64)
+    gx = np.arange(ix.min(), ix.max() + 2)
+    gy = np.arange(iy.min(), iy.max() + 2)
+    lattice = _hash(gx[None, :], gy[:, None], seed, channel)
+    # Along x on the few lattice rows first, then along y
+    cx = ix - gx[0]
+    left = lattice[:, cx]
+    rows = left + (lattice[:, cx + 1] - left) * _fade(fx - ix)
+    cy = iy - gy[0]
+    top = rows[cy]
+    return top + (rows[cy + 1] - top) * _fade(fy - iy)[:, None]
+
+
+def _fade(t):
+    return t * t * (3 - 2 * t)
+
+
+def _fractal(xs, ys, scale, octaves, seed, channel):
+    """Octaves of value noise, each at half the scale and weight of the last."""
+    total, norm, weight = 0.0, 0.0, 1.0
+    for octave in range(octaves):
+        total = total + weight * _value_noise(xs, ys, scale / 2 ** octave, seed,
+                                              64 + channel * 16 + octave)
+        norm += weight
+        weight /= 2
+    return total / norm
@@ -3,14 +3,19 @@
 Create a minimal GBA-style web RPG scaffold with HTML/CSS/JS and package it as a zip.
 """
 
+import argparse
 import os
-import zipfile
-import json
+import re
 
-# Create directory structure
-root = "/workspace/gba_rpg_package"
-assets_dir = os.path.join(root, "assets")
-os.makedirs(assets_dir, exist_ok=True)
+from gba_build import build_variant, builtin_variant
+from gba_build.maps import chunk_files, collision_plane, world_files
+from gba_build.worldgen import generate_world
+from gba_build.minify import format_size_report
+from gba_build.overlay import lcd_pattern
+
+# Bump whenever the generated output changes in a way the content hashes
+# alone would not capture (e.g. archive layout).
+GENERATOR_VERSION = "1.1.0"
 
 # HTML file
 index_html = """<!doctype html>
@@ -151,92 +156,421 @@ script_js = r"""/* Tiny GBA-style RPG (vanilla JS, Canvas)
    - Renders at 240×160 (GBA native) to an offscreen backbuffer
    - Upscales to visible canvas with nearest neighbor
    - BGR555 15-bit color quantization + LCD scanlines
+   - Frames composed in a BGR555 typed-array framebuffer (?renderer=canvas
+     falls back to drawImage)
+   - ?worker=1 renders in a Web Worker on an OffscreenCanvas; the page
+     only forwards input
    - Tileset + sprite sheet (uses procedural fallbacks if PNGs missing)
    - Player/NPC, collision, camera, interact & dialogue with typewriter
+   - Actors in a uniform-grid spatial index, culled to the view
+     (?crowd=N adds N wandering NPCs)
 */
 
-(() => {
+(async () => {
   // ========== GBA SP RENDER PIPELINE ==========
   const BASE_W = 240, BASE_H = 160; // GBA native resolution
   const SCALE = 3; // Integer scaling factor
   
+  // Build-time configuration injected by the generator
+  const BUILD = /*@BUILD@*/{};
+  
+  // ========== WORKER MODE ==========
+  // With ?worker=1 the page hands the screen canvas to a Web Worker running
+  // this same script and only forwards key events; everything below then
+  // runs in the worker, which gets the canvas, the URL query and the saved
+  // game in an 'init' message and writes saves back through the page. The
+  // page's unload and visibility events fire only on the page, so it asks
+  // the worker to save then.
+  const IN_WORKER = typeof document === 'undefined';
+  const GAME_KEYS = ['arrowup','arrowdown','arrowleft','arrowright','w','a','s','d','z','enter','p','r'];
+  const saveKey = 'gba-rpg-save-v3';
+  
+  if (!IN_WORKER && new URLSearchParams(location.search).get('worker') === '1') {
+    const canvas = document.getElementById('game');
+    if (canvas.transferControlToOffscreen && typeof Worker === 'function') {
+      startWorker(canvas);
+      return;
+    }
+  }
+  
+  function startWorker(canvas) {
+    const offscreen = canvas.transferControlToOffscreen();
+    const worker = new Worker(document.currentScript.src);
+    worker.postMessage({
+      type: 'init',
+      canvas: offscreen,
+      search: location.search,
+      storage: { [saveKey]: localStorage.getItem(saveKey) }
+    }, [offscreen]);
+    
+    worker.addEventListener('message', (e) => {
+      if (e.data.type !== 'storage') return;
+      if (e.data.value === null) localStorage.removeItem(e.data.key);
+      else localStorage.setItem(e.data.key, e.data.value);
+    });
+    
+    for (const type of ['keydown', 'keyup']) {
+      addEventListener(type, (e) => {
+        if (GAME_KEYS.includes(e.key.toLowerCase())) e.preventDefault();
+        worker.postMessage({ type: 'key', event: type, key: e.key });
+      });
+    }
+    
+    // The reply comes back as a 'storage' message. One sent on unload may
+    // not arrive; hiding the page comes first and leaves time for it.
+    onPageLeave(() => worker.postMessage({ type: 'save' }));
+  }
+  
+  // Run save on unload and whenever the page is hidden (tab switch, mobile
+  // backgrounding, where unload events are unreliable)
+  function onPageLeave(save) {
+    addEventListener('beforeunload', save);
+    document.addEventListener('visibilitychange', () => {
+      if (document.visibilityState === 'hidden') save();
+    });
+  }
+  
+  // In the worker: resolve with the 'init' message, and replay forwarded
+  // keys and save requests as events on the worker scope, where the input
+  // handlers and the game listen
+  function workerInit() {
+    return new Promise((resolve) => {
+      addEventListener('message', (e) => {
+        if (e.data.type === 'init') resolve(e.data);
+        else if (e.data.type === 'key') {
+          dispatchEvent(Object.assign(new Event(e.data.event), { key: e.data.key }));
+        } else if (e.data.type === 'save') {
+          dispatchEvent(new Event('save'));
+        }
+      });
+    });
+  }
+  
+  const host = IN_WORKER
+    ? await workerInit()
+    : { canvas: document.getElementById('game'), search: location.search };
+  const params = new URLSearchParams(host.search);
+  
+  function createCanvas() {
+    return IN_WORKER ? new OffscreenCanvas(1, 1) : document.createElement('canvas');
+  }
+  
+  // localStorage, or in the worker a copy of the save that writes through
+  const storage = IN_WORKER ? {
+    getItem: (key) => host.storage[key] ?? null,
+    setItem(key, value) {
+      host.storage[key] = String(value);
+      postMessage({ type: 'storage', key, value: String(value) });
+    },
+    removeItem(key) {
+      delete host.storage[key];
+      postMessage({ type: 'storage', key, value: null });
+    }
+  } : localStorage;
+  
+  // Not every worker has requestAnimationFrame; fall back to a 60 Hz timer
+  const requestFrame = typeof requestAnimationFrame === 'function'
+    ? (cb) => requestAnimationFrame(cb)
+    : (cb) => setTimeout(() => cb(performance.now()), 1000 / 60);
+  
   // Visible canvas
-  const screen = document.getElementById('game');
+  const screen = host.canvas;
   const sctx = screen.getContext('2d', { alpha: false });
   sctx.imageSmoothingEnabled = false;
 
   // Offscreen backbuffer (240×160)
-  const backbuf = document.createElement('canvas');
+  const backbuf = createCanvas();
   backbuf.width = BASE_W; 
   backbuf.height = BASE_H;
   const g = backbuf.getContext('2d', { alpha: false });
   g.imageSmoothingEnabled = false;
 
   // LCD scanline overlay
-  const scanlines = document.createElement('canvas');
+  const scanlines = createCanvas();
   scanlines.width = BASE_W; 
   scanlines.height = BASE_H;
   const scanCtx = scanlines.getContext('2d', { alpha: true });
   
-  // Create LCD effect
+  // Create LCD effect: the build rasterizes one period of the scanlines and
+  // sub-pixel grid (BUILD.lcd, black with per-pixel alpha), tiled here
   (function createLCDEffect() {
-    scanCtx.clearRect(0, 0, BASE_W, BASE_H);
-    // Horizontal scanlines
-    scanCtx.fillStyle = 'rgba(0,0,0,0.12)';
-    for (let y = 0; y < BASE_H; y += 2) {
-      scanCtx.fillRect(0, y, BASE_W, 1);
-    }
-    // Sub-pixel grid
-    for (let y = 0; y < BASE_H; y += 2) {
-      for (let x = 0; x < BASE_W; x += 2) {
-        scanCtx.fillStyle = 'rgba(0,0,0,0.05)';
-        scanCtx.fillRect(x + 1, y, 1, 1);
-        scanCtx.fillRect(x, y + 1, 1, 1);
-      }
+    const { width, height, alpha } = BUILD.lcd;
+    const overlay = new ImageData(BASE_W, BASE_H);
+    for (let y = 0, i = 3; y < BASE_H; y++) {
+      const row = (y % height) * width;
+      for (let x = 0; x < BASE_W; x++, i += 4) overlay.data[i] = alpha[row + x % width];
     }
+    scanCtx.putImageData(overlay, 0, 0);
   })();
 
-  // BGR555 color quantization (15-bit GBA palette)
-  function quantizeBGR555(imgData) {
+  // BGR555 color quantization (15-bit GBA palette) as a per-channel table
+  const QUANT = new Uint8ClampedArray(256);
+  for (let v = 0; v < 256; v++) {
+    // Quantize to 5 bits per channel
+    const q = Math.floor(v / 8) * 8;
+    // Slight gamma for backlight simulation
+    const gamma = 1.05;
+    QUANT[v] = Math.min(255, Math.pow(q / 255, gamma) * 255);
+  }
+  
+  // Same transfer, but values QUANT already produced map to themselves, so
+  // regions mixing quantized sources with runtime blending can be re-snapped
+  const SETTLE = QUANT.map((q, v) => QUANT.includes(v) ? v : q);
+  
+  // Assets the build already snapped to BGR555
+  const PREQUANTIZED = new Set(BUILD.quantized || []);
+  
+  function quantizeBGR555(imgData, lut = QUANT) {
     const d = imgData.data;
     for (let i = 0; i < d.length; i += 4) {
-      // Quantize to 5 bits per channel
-      d[i]     = Math.floor(d[i] / 8) * 8;     // R
-      d[i + 1] = Math.floor(d[i + 1] / 8) * 8; // G
-      d[i + 2] = Math.floor(d[i + 2] / 8) * 8; // B
-      
-      // Slight gamma for backlight simulation
-      const gamma = 1.05;
-      d[i]     = Math.min(255, Math.pow(d[i] / 255, gamma) * 255);
-      d[i + 1] = Math.min(255, Math.pow(d[i + 1] / 255, gamma) * 255);
-      d[i + 2] = Math.min(255, Math.pow(d[i + 2] / 255, gamma) * 255);
+      d[i]     = lut[d[i]];     // R
+      d[i + 1] = lut[d[i + 1]]; // G
+      d[i + 2] = lut[d[i + 2]]; // B
     }
     return imgData;
   }
+  
+  // 'frame': read back and quantize the whole backbuffer every frame.
+  // 'regions': all sources are quantized, so only rectangles with runtime
+  // blending (sprites, dialogue) are.
+  let quantizeMode = 'frame';
+  const blendRects = [];
+  
+  function markBlend(x, y, w, h) {
+    blendRects.push(x, y, w, h);
+  }
+  
+  function settleBlendRects() {
+    for (let i = 0; i < blendRects.length; i += 4) {
+      const x0 = Math.max(0, blendRects[i]);
+      const y0 = Math.max(0, blendRects[i + 1]);
+      const x1 = Math.min(BASE_W, blendRects[i] + blendRects[i + 2]);
+      const y1 = Math.min(BASE_H, blendRects[i + 1] + blendRects[i + 3]);
+      if (x1 <= x0 || y1 <= y0) continue;
+      const frame = g.getImageData(x0, y0, x1 - x0, y1 - y0);
+      g.putImageData(quantizeBGR555(frame, SETTLE), x0, y0);
+    }
+  }
+
+  // ========== FRAMEBUFFER BACKEND ==========
+  // 'framebuffer': the world is composed as 15-bit BGR555 words
+  // (r | g << 5 | b << 10) in a typed array, tiles and sprites are blitted as
+  // typed-array copies, and the frame is converted to RGBA once through
+  // RGBA_LUT for a single putImageData -- no per-frame readback.
+  // 'canvas': drawImage onto the backbuffer, quantized per quantizeMode.
+  let backend = 'canvas';
+  const fb = new Uint16Array(BASE_W * BASE_H);
+  const fbImage = new ImageData(BASE_W, BASE_H);
+  const fbOut = new Uint32Array(fbImage.data.buffer);
+  
+  // Channel byte -> 5-bit level; bytes QUANT produced map back to their
+  // level (as in SETTLE), anything else is truncated like QUANT does
+  const LEVEL = new Uint8Array(256);
+  for (let v = 0; v < 256; v++) LEVEL[v] = v >> 3;
+  for (let l = 0; l < 32; l++) LEVEL[QUANT[l << 3]] = l;
+  
+  // BGR555 word -> RGBA pixel (with the QUANT transfer applied)
+  const LITTLE_ENDIAN = new Uint8Array(new Uint32Array([1]).buffer)[0] === 1;
+  const RGBA_LUT = new Uint32Array(32768);
+  for (let c = 0; c < 32768; c++) {
+    const r = QUANT[(c & 31) << 3], gr = QUANT[((c >> 5) & 31) << 3], b = QUANT[(c >> 10) << 3];
+    RGBA_LUT[c] = LITTLE_ENDIAN
+      ? (0xff000000 | b << 16 | gr << 8 | r) >>> 0
+      : (r << 24 | gr << 16 | b << 8 | 0xff) >>> 0;
+  }
+  
+  // A (quantized, readable) canvas as BGR555 words plus alpha, for blit()
+  function toSurface(c) {
+    const d = c.getContext('2d').getImageData(0, 0, c.width, c.height).data;
+    const n = c.width * c.height;
+    const px = new Uint16Array(n);
+    const alpha = new Uint8Array(n);
+    let opaque = true;
+    for (let i = 0, j = 0; i < n; i++, j += 4) {
+      px[i] = LEVEL[d[j]] | LEVEL[d[j + 1]] << 5 | LEVEL[d[j + 2]] << 10;
+      alpha[i] = d[j + 3];
+      if (alpha[i] !== 255) opaque = false;
+    }
+    return { w: c.width, h: c.height, px, alpha, opaque };
+  }
+  
+  // Source-over of one BGR555 word onto another, per 5-bit channel
+  function mix555(dst, src, a) {
+    const ia = 255 - a;
+    const r = ((src & 31) * a + (dst & 31) * ia + 127) / 255 | 0;
+    const gr = ((src >> 5 & 31) * a + (dst >> 5 & 31) * ia + 127) / 255 | 0;
+    const b = ((src >> 10) * a + (dst >> 10) * ia + 127) / 255 | 0;
+    return r | gr << 5 | b << 10;
+  }
+  
+  // Copy a w×h rectangle of surface s at (sx, sy) to (dx, dy) in fb
+  function blit(s, sx, sy, w, h, dx, dy) {
+    if (dx < 0) { sx -= dx; w += dx; dx = 0; }
+    if (dy < 0) { sy -= dy; h += dy; dy = 0; }
+    if (dx + w > BASE_W) w = BASE_W - dx;
+    if (dy + h > BASE_H) h = BASE_H - dy;
+    if (w <= 0 || h <= 0) return;
+    for (let row = 0; row < h; row++) {
+      const src = (sy + row) * s.w + sx;
+      const dst = (dy + row) * BASE_W + dx;
+      if (s.opaque) {
+        fb.set(s.px.subarray(src, src + w), dst);
+        continue;
+      }
+      for (let i = 0; i < w; i++) {
+        const a = s.alpha[src + i];
+        if (a === 255) fb[dst + i] = s.px[src + i];
+        else if (a) fb[dst + i] = mix555(fb[dst + i], s.px[src + i], a);
+      }
+    }
+  }
+  
+  // Convert fb to RGBA and put it on the backbuffer in one call, or one
+  // call per dirty rect
+  function presentFramebuffer(full = true) {
+    if (full) {
+      for (let i = 0; i < fb.length; i++) fbOut[i] = RGBA_LUT[fb[i]];
+      g.putImageData(fbImage, 0, 0);
+      return;
+    }
+    for (const [x, y, w, h] of dirtyRects) {
+      for (let row = y; row < y + h; row++) {
+        for (let i = row * BASE_W + x, end = i + w; i < end; i++) fbOut[i] = RGBA_LUT[fb[i]];
+      }
+      g.putImageData(fbImage, 0, 0, x, y, w, h);
+    }
+  }
 
   // ========== ASSETS ==========
   const TILE = 16;
-  const assets = { tileset: null, player: null };
+  const assets = { 
+    tileset: null, 
+    player: null,
+    tiles: null // tileset flattened on black, highlight baked in
+  };
+  const sources = {}; // asset name -> file it was loaded from
+  const surfaces = {}; // framebuffer copies of assets.tiles / assets.player
+  let tileCols = 1; // tiles per row of assets.tiles
   
   function loadImage(src) {
     return new Promise((resolve, reject) => {
+      if (IN_WORKER) {
+        // No Image in workers: decode the fetched file to an ImageBitmap
+        fetch(src)
+          .then(res => res.ok ? res.blob() : Promise.reject(new Error(`${src}: ${res.status}`)))
+          .then(blob => createImageBitmap(blob))
+          .then(resolve, reject);
+        return;
+      }
       const img = new Image();
       img.onload = () => resolve(img);
       img.onerror = reject;
       img.src = src;
     });
   }
+  // Content-fingerprinted names the build gave the files the runtime loads
+  // (BUILD.assets, see gba_build/fingerprint.py); a directory maps as a
+  // whole, so 'assets/world/' resolves to where its chunk files went
+  const ASSET_URLS = BUILD.assets || {};
+  
+  function assetUrl(path) {
+    return ASSET_URLS[path] || path;
+  }
+  
+  // Sheets the build packed into atlas images (BUILD.atlas, see
+  // gba_build/atlas.py) are cut out of them by name; the atlas images load
+  // once, shared by every sprite
+  const ATLAS = BUILD.atlas || { sheets: [], sprites: {} };
+  let atlasSheets = null;
+  
+  async function loadSprite(name, src) {
+    const sprite = ATLAS.sprites[name];
+    if (!sprite) return loadImage(assetUrl(src));
+    atlasSheets = atlasSheets || Promise.all(ATLAS.sheets.map(path => loadImage(assetUrl(path))));
+    const sheet = (await atlasSheets)[sprite.sheet];
+    const c = createCanvas();
+    c.width = sprite.w;
+    c.height = sprite.h;
+    c.getContext('2d').drawImage(sheet, sprite.x, sprite.y, sprite.w, sprite.h, 0, 0, sprite.w, sprite.h);
+    return c;
+  }
+
   
   async function loadAssets() {
     try { 
-      assets.tileset = await loadImage('assets/tileset.png'); 
+      assets.tileset = await loadSprite('tileset', sources.tileset = 'assets/tileset.png'); 
     } catch { 
       assets.tileset = makeProceduralTileset(); 
+      delete sources.tileset;
     }
     try { 
-      assets.player = await loadImage('assets/player.png'); 
+      assets.player = await loadSprite('player', sources.player = 'assets/player.png'); 
     } catch { 
       assets.player = makeProceduralPlayer(); 
+      delete sources.player;
+    }
+    prepareSources();
+  }
+
+  function toCanvas(img, background) {
+    const c = createCanvas();
+    c.width = img.width;
+    c.height = img.height;
+    const ctx = c.getContext('2d');
+    if (background) {
+      ctx.fillStyle = background;
+      ctx.fillRect(0, 0, c.width, c.height);
+    }
+    ctx.drawImage(img, 0, 0);
+    return c;
+  }
+
+  // Static tile lighting (BUILD.lighting bands: pixel rows within every
+  // tile, color, alpha); the build bakes it into the sheets in BUILD.lit,
+  // so only the procedural tileset is lit here
+  const LIT = new Set(BUILD.lit || []);
+  
+  function bakeLighting(c) {
+    const ctx = c.getContext('2d');
+    for (const { rows: [top, bottom], color, alpha } of BUILD.lighting || []) {
+      ctx.globalAlpha = alpha;
+      ctx.fillStyle = color;
+      for (let y = 0; y < c.height; y += TILE) {
+        ctx.fillRect(0, y + top, c.width, bottom - top);
+      }
+    }
+    ctx.globalAlpha = 1;
+    return c;
+  }
+
+  // Quantize a canvas in place; false if it cannot be read back (tainted)
+  function snapCanvas(c, src) {
+    try {
+      const ctx = c.getContext('2d');
+      const frame = ctx.getImageData(0, 0, c.width, c.height);
+      ctx.putImageData(quantizeBGR555(frame, PREQUANTIZED.has(src) ? SETTLE : QUANT), 0, 0);
+      return true;
+    } catch {
+      return false;
+    }
+  }
+
+  // Snap every source to BGR555 once at load, so frames only need to
+  // re-quantize the regions where runtime blending happens
+  function prepareSources() {
+    assets.tiles = toCanvas(assets.tileset, '#000000');
+    if (!LIT.has(sources.tileset)) bakeLighting(assets.tiles);
+    assets.player = toCanvas(assets.player);
+    tileCols = Math.max(1, Math.floor(assets.tiles.width / TILE));
+    invalidateChunks(); // chunks hold copies of the previous sheet
+    if (snapCanvas(assets.tiles, sources.tileset) && snapCanvas(assets.player, sources.player)) {
+      quantizeMode = 'regions';
+      // Readable, quantized sources can be blitted; ?renderer=canvas opts out
+      if (params.get('renderer') !== 'canvas') {
+        surfaces.tiles = toSurface(assets.tiles);
+        surfaces.player = toSurface(assets.player);
+        backend = 'framebuffer';
+      }
     }
   }
 
@@ -244,7 +578,7 @@ script_js = r"""/* Tiny GBA-style RPG (vanilla JS, Canvas)
   function makeProceduralTileset() {
     const cols = 8, rows = 4;
     const w = cols * TILE, h = rows * TILE;
-    const c = document.createElement('canvas');
+    const c = createCanvas();
     c.width = w; 
     c.height = h;
     const ctx = c.getContext('2d');
@@ -330,15 +664,13 @@ script_js = r"""/* Tiny GBA-style RPG (vanilla JS, Canvas)
       }
     });
 
-    const img = new Image();
-    img.src = c.toDataURL();
-    return img;
+    return c;
   }
 
   // Procedural player sprite fallback
   function makeProceduralPlayer() {
     const fw = 16, fh = 24, cols = 3, rows = 4;
-    const c = document.createElement('canvas');
+    const c = createCanvas();
     c.width = fw * cols;
     c.height = fh * rows;
     const ctx = c.getContext('2d');
@@ -396,15 +728,13 @@ script_js = r"""/* Tiny GBA-style RPG (vanilla JS, Canvas)
       }
     }
 
-    const img = new Image();
-    img.src = c.toDataURL();
-    return img;
+    return c;
   }
 
   // ========== WORLD ==========
   const VIEW_W = Math.floor(BASE_W / TILE);
   const VIEW_H = Math.floor(BASE_H / TILE);
-  const W = 40, H = 30; // World size in tiles
+  let W = 40, H = 30; // World size in tiles; taken from the world index when it loads
 
   const TILES = { 
     GRASS: 0, PATH: 1, TREE: 2, 
@@ -412,26 +742,205 @@ script_js = r"""/* Tiny GBA-style RPG (vanilla JS, Canvas)
   };
   const SOLID = new Set([TILES.TREE, TILES.WATER]);
 
-  // Generate map
-  const map = new Array(H).fill(0).map((_, y) =>
-    new Array(W).fill(TILES.GRASS).map((t, x) => {
-      if (x === 0 || y === 0 || x === W - 1 || y === H - 1) return TILES.TREE;
-      if (x === 12 && y > 3 && y < H - 4) return TILES.WATER;
-      if (y === 10 && x > 3 && x < W - 3) return TILES.PATH;
-      if (x === 20 && y > 3 && y < H - 3) return TILES.PATH;
-      return t;
-    })
-  );
-
-  // Add decorations
-  [[6,6],[7,6],[8,6],[22,12],[23,12]].forEach(([x,y]) => {
-    if (map[y] && map[y][x] !== undefined) map[y][x] = TILES.FLOWERS;
-  });
+  // The world streams in as chunks (see gba_build/maps.py): the index gives
+  // its size and the file holding each chunk, and the chunks around the
+  // camera stay resident, at most RESIDENT_CHUNKS of them, the least
+  // recently wanted evicted first. A resident chunk holds its tile layer
+  // and collision plane (1 where the tile is SOLID) as flat row-major
+  // Uint8Arrays: tiles[y * w + x], blocked[y * w + x].
+  const RESIDENT_CHUNKS = 64;
+  const PREFETCH = 2; // extra chunks requested in the direction of travel
+  const world = {
+    size: 0,             // chunk edge in tiles
+    cols: 0, rows: 0,    // chunks across and down
+    files: null,         // chunk -> file number, from the index
+    chunks: [],          // chunk -> resident chunk
+    resident: new Map(), // chunk -> resident chunk, least recently wanted first
+    pending: new Map(),  // chunk -> fetch in flight
+    version: 0,          // bumped whenever a chunk arrives
+    lastX: 0, lastY: 0   // camera position at the previous streamWorld
+  };
+  
+  async function loadWorld() {
+    try {
+      const res = await fetch(assetUrl('assets/world/') + 'index.bin');
+      if (!res.ok) throw new Error(`world index: ${res.status}`);
+      const buf = await res.arrayBuffer();
+      const view = new DataView(buf);
+      const magic = String.fromCharCode(...new Uint8Array(buf, 0, 4));
+      if (magic !== 'GBAI' || view.getUint8(4) !== 1) throw new Error('unknown world index format');
+      W = view.getUint16(6, true);
+      H = view.getUint16(8, true);
+      setChunking(view.getUint16(10, true));
+      world.files = new Uint32Array(buf, 12, world.cols * world.rows);
+    } catch (e) {
+      generateWorld();
+    }
+    // The first frame waits for the chunks around the start position
+    focusCamera();
+    await Promise.all(streamWorld());
+  }
+  
+  function setChunking(size) {
+    world.size = size;
+    world.cols = Math.ceil(W / size);
+    world.rows = Math.ceil(H / size);
+    world.chunks = new Array(world.cols * world.rows);
+    world.resident.clear();
+    invalidateChunks();
+  }
+  
+  // One GBAM map: its tile layer plus the collision plane (derived from the
+  // tiles for version-1 maps)
+  function decodeMap(buf) {
+    const view = new DataView(buf);
+    const magic = String.fromCharCode(...new Uint8Array(buf, 0, 4));
+    const version = view.getUint8(4);
+    if (magic !== 'GBAM' || (version !== 1 && version !== 2)) throw new Error('unknown map format');
+    const w = view.getUint16(6, true);
+    const h = view.getUint16(8, true);
+    const tiles = new Uint8Array(buf, 10, w * h);
+    const blocked = version === 2
+      ? new Uint8Array(buf, 10 + view.getUint8(5) * w * h, w * h)
+      : computeCollision(tiles);
+    return { w, h, tiles, blocked };
+  }
+  
+  function computeCollision(tiles) {
+    return tiles.map(id => SOLID.has(id) ? 1 : 0);
+  }
   
-  for (let x = 28; x < 36 && x < W; x++) {
-    for (let y = 5; y < 10 && y < H; y++) {
-      if (map[y] && map[y][x] !== undefined) map[y][x] = TILES.TALL;
+  function installChunk(i, chunk) {
+    world.chunks[i] = chunk;
+    world.resident.set(i, chunk);
+    world.version++;
+  }
+  
+  async function fetchChunk(i) {
+    try {
+      const res = await fetch(`${assetUrl('assets/world/')}${world.files[i]}.bin`);
+      if (!res.ok) throw new Error(`world chunk ${i}: ${res.status}`);
+      installChunk(i, decodeMap(await res.arrayBuffer()));
+      world.pending.delete(i);
+    } catch (e) {
+      // Ask again once streamWorld next wants it, a second from now
+      setTimeout(() => world.pending.delete(i), 1000);
+    }
+  }
+  
+  // Keep the chunks in and around the view resident, looking PREFETCH
+  // chunks further ahead along the way the camera is moving, and evict the
+  // least recently wanted beyond RESIDENT_CHUNKS. Returns the fetches still
+  // in flight for wanted chunks.
+  function streamWorld() {
+    const span = world.size * TILE;
+    const dx = Math.sign(camera.x - world.lastX);
+    const dy = Math.sign(camera.y - world.lastY);
+    world.lastX = camera.x;
+    world.lastY = camera.y;
+    
+    let cx0 = Math.floor((camera.x - span / 2) / span);
+    let cy0 = Math.floor((camera.y - span / 2) / span);
+    let cx1 = Math.floor((camera.x + BASE_W + span / 2) / span);
+    let cy1 = Math.floor((camera.y + BASE_H + span / 2) / span);
+    if (dx < 0) cx0 -= PREFETCH; else if (dx > 0) cx1 += PREFETCH;
+    if (dy < 0) cy0 -= PREFETCH; else if (dy > 0) cy1 += PREFETCH;
+    
+    const waits = [];
+    for (let cy = Math.max(0, cy0); cy <= Math.min(world.rows - 1, cy1); cy++) {
+      for (let cx = Math.max(0, cx0); cx <= Math.min(world.cols - 1, cx1); cx++) {
+        const i = cy * world.cols + cx;
+        const chunk = world.chunks[i];
+        if (chunk) {
+          world.resident.delete(i);
+          world.resident.set(i, chunk);
+        } else if (world.files) {
+          if (!world.pending.has(i)) world.pending.set(i, fetchChunk(i));
+          waits.push(world.pending.get(i));
+        }
+      }
+    }
+    for (const i of world.resident.keys()) {
+      if (world.resident.size <= RESIDENT_CHUNKS) break;
+      evictChunk(i);
+    }
+    return waits;
+  }
+  
+  function evictChunk(i) {
+    world.resident.delete(i);
+    world.chunks[i] = undefined;
+    
+    // Map chunks drawn from it go too
+    const tx = (i % world.cols) * world.size;
+    const ty = Math.floor(i / world.cols) * world.size;
+    for (let cy = Math.floor(ty / CHUNK); cy <= Math.floor((ty + world.size - 1) / CHUNK); cy++) {
+      for (let cx = Math.floor(tx / CHUNK); cx <= Math.floor((tx + world.size - 1) / CHUNK); cx++) {
+        mapChunks.delete(`${cx},${cy}`);
+      }
+    }
+  }
+  
+  // Resident chunk holding in-bounds tile (tx, ty), if any
+  function chunkAt(tx, ty) {
+    return world.chunks[Math.floor(ty / world.size) * world.cols + Math.floor(tx / world.size)];
+  }
+  
+  // Tile id at in-bounds (tx, ty), or -1 while its chunk is not resident
+  function tileAt(tx, ty) {
+    const chunk = chunkAt(tx, ty);
+    return chunk ? chunk.tiles[(ty % world.size) * chunk.w + tx % world.size] : -1;
+  }
+  
+  // Every in-bounds tile of the rectangle (tx0, ty0)-(tx1, ty1) is resident
+  function isResident(tx0, ty0, tx1, ty1) {
+    tx0 = Math.max(0, tx0); ty0 = Math.max(0, ty0);
+    tx1 = Math.min(W - 1, tx1); ty1 = Math.min(H - 1, ty1);
+    if (tx1 < tx0 || ty1 < ty0) return true; // all off the map
+    for (let cy = Math.floor(ty0 / world.size); cy <= Math.floor(ty1 / world.size); cy++) {
+      for (let cx = Math.floor(tx0 / world.size); cx <= Math.floor(tx1 / world.size); cx++) {
+        if (!world.chunks[cy * world.cols + cx]) return false;
+      }
+    }
+    return true;
+  }
+  
+  // Off the map, SOLID, or not resident (yet)
+  function isBlocked(tx, ty) {
+    if (tx < 0 || ty < 0 || tx >= W || ty >= H) return true;
+    const chunk = chunkAt(tx, ty);
+    return !chunk || chunk.blocked[(ty % world.size) * chunk.w + tx % world.size] === 1;
+  }
+
+  // Fallback for file:// and friends; mirrors build_world in package_gba.py.
+  // The whole (small) world becomes a single resident chunk.
+  function generateWorld() {
+    W = 40; H = 30;
+    const map = new Uint8Array(W * H);
+    for (let y = 0; y < H; y++) {
+      for (let x = 0; x < W; x++) {
+        let id = TILES.GRASS;
+        if (x === 0 || y === 0 || x === W - 1 || y === H - 1) id = TILES.TREE;
+        else if (x === 12 && y > 3 && y < H - 4) id = TILES.WATER;
+        else if (y === 10 && x > 3 && x < W - 3) id = TILES.PATH;
+        else if (x === 20 && y > 3 && y < H - 3) id = TILES.PATH;
+        map[y * W + x] = id;
+      }
+    }
+
+    // Add decorations
+    [[6,6],[7,6],[8,6],[22,12],[23,12]].forEach(([x,y]) => {
+      if (x < W && y < H) map[y * W + x] = TILES.FLOWERS;
+    });
+    
+    for (let x = 28; x < 36 && x < W; x++) {
+      for (let y = 5; y < 10 && y < H; y++) {
+        map[y * W + x] = TILES.TALL;
+      }
     }
+    
+    setChunking(Math.max(W, H));
+    installChunk(0, { w: W, h: H, tiles: map, blocked: computeCollision(map) });
   }
 
   // ========== ENTITIES ==========
@@ -447,27 +956,177 @@ script_js = r"""/* Tiny GBA-style RPG (vanilla JS, Canvas)
       dir: DIRS.DOWN,
       frame: 1,
       animTimer: 0,
-      isMoving: false
+      isMoving: false,
+      prevX: Math.floor(x), // position at the previous simulation tick
+      prevY: Math.floor(y),
+      drawX: Math.floor(x), // interpolated position to draw at
+      drawY: Math.floor(y)
     };
   }
 
+  // The cast, in tiles: the demo's, or the one an imported Tiled map places
+  // (BUILD.objects, see gba_build/tiled.py)
+  const START = BUILD.objects?.player ?? [5, 5];
+  const NPCS = BUILD.objects?.npcs ?? [{
+    x: 12, y: 9,
+    dialogue: [
+      "Welcome to the world of POKéMON!",
+      "This is a tiny GBA-style demo.",
+      "Drop your own art into assets/ for a custom look!"
+    ]
+  }];
+
   // Player
-  const saveKey = 'gba-rpg-save-v3';
-  const saved = JSON.parse(localStorage.getItem(saveKey) || 'null');
+  const saved = JSON.parse(storage.getItem(saveKey) || 'null');
   const player = makeActor(
-    saved?.x ?? 5 * TILE,
-    saved?.y ?? 5 * TILE
+    saved?.x ?? START[0] * TILE,
+    saved?.y ?? START[1] * TILE
   );
   if (saved?.dir !== undefined) player.dir = saved.dir;
 
-  // NPC
-  const npc = makeActor(12 * TILE, 9 * TILE);
-  npc.speed = 0;
-  npc.dialogue = [
-    "Welcome to the world of POKéMON!",
-    "This is a tiny GBA-style demo.",
-    "Drop your own art into assets/ for a custom look!"
-  ];
+  // ========== SPATIAL INDEX ==========
+  // Actors are bucketed by the grid cell (CELL×CELL tiles) holding their
+  // position, so drawing and interaction only visit the cells around the
+  // camera or the player. Each bucket is kept in depth order (pixel row,
+  // then creation order); an actor is re-bucketed only when it changes cell
+  // or row, and a frame merges the already sorted buckets it can see.
+  const CELL = 4;
+  const cells = new Map(); // cx + cy * 65536 -> actors in depth order
+  const actors = [];
+  
+  function byDepth(a, b) {
+    return a.row - b.row || a.id - b.id;
+  }
+  
+  function placeActor(a) {
+    const span = CELL * TILE;
+    const cell = Math.floor(a.x / span) + Math.floor(a.y / span) * 65536;
+    const row = Math.floor(a.y);
+    if (cell === a.cell && row === a.row) return;
+    
+    let bucket, i;
+    if (cell === a.cell) {
+      // Same cell, new row: shift it along to its new place
+      bucket = cells.get(cell);
+      i = bucket.indexOf(a);
+    } else {
+      if (a.cell !== undefined) {
+        const old = cells.get(a.cell);
+        old.splice(old.indexOf(a), 1);
+        if (!old.length) cells.delete(a.cell);
+      }
+      bucket = cells.get(cell) || [];
+      cells.set(cell, bucket);
+      i = bucket.length;
+      bucket.push(a);
+    }
+    a.cell = cell;
+    a.row = row;
+    while (i > 0 && byDepth(a, bucket[i - 1]) < 0) {
+      bucket[i] = bucket[i - 1];
+      i--;
+    }
+    while (i < bucket.length - 1 && byDepth(bucket[i + 1], a) < 0) {
+      bucket[i] = bucket[i + 1];
+      i++;
+    }
+    bucket[i] = a;
+  }
+  
+  function addActor(a) {
+    a.id = actors.length;
+    actors.push(a);
+    placeActor(a);
+    return a;
+  }
+  
+  // Actors positioned in the cells a pixel rectangle overlaps, as runs in
+  // depth order
+  function actorsNear(x0, y0, x1, y1) {
+    const span = CELL * TILE;
+    const found = [];
+    for (let cy = Math.floor(y0 / span); cy <= Math.floor(y1 / span); cy++) {
+      for (let cx = Math.floor(x0 / span); cx <= Math.floor(x1 / span); cx++) {
+        const bucket = cells.get(cx + cy * 65536);
+        if (bucket) found.push(...bucket);
+      }
+    }
+    return found;
+  }
+  
+  // Actors whose 16×24 sprite overlaps the view, in depth order. Sprites
+  // are drawn at the interpolated position, at most a tick from the indexed
+  // one, hence the extra tile of margin.
+  function visibleActors() {
+    const near = actorsNear(camera.x - 16 - TILE, camera.y - 16 - TILE,
+                            camera.x + BASE_W + TILE, camera.y + BASE_H + 8 + TILE);
+    return near
+      .filter(a => a.drawX + 16 > camera.x && a.drawX < camera.x + BASE_W &&
+                   a.drawY + 16 > camera.y && a.drawY - 8 < camera.y + BASE_H)
+      .sort(byDepth); // merges the sorted runs
+  }
+  
+  for (const { x, y, dialogue } of NPCS) {
+    const npc = makeActor(x * TILE, y * TILE);
+    npc.speed = 0;
+    npc.dialogue = dialogue;
+    addActor(npc);
+  }
+  addActor(player);
+  
+  // ?crowd=N adds N wandering NPCs on walkable tiles, placed once the world
+  // has loaded (a stress test for large populations)
+  let seed = 0x2545f491;
+  function random() {
+    seed ^= seed << 13;
+    seed ^= seed >>> 17;
+    seed ^= seed << 5;
+    return (seed >>> 0) / 4294967296;
+  }
+  
+  // Placed within the resident chunks, so streamed worlds of any size work
+  function spawnCrowd(count) {
+    let x0 = world.cols, y0 = world.rows, x1 = 0, y1 = 0;
+    for (const i of world.resident.keys()) {
+      x0 = Math.min(x0, i % world.cols);
+      x1 = Math.max(x1, i % world.cols + 1);
+      y0 = Math.min(y0, Math.floor(i / world.cols));
+      y1 = Math.max(y1, Math.floor(i / world.cols) + 1);
+    }
+    const left = x0 * world.size, top = y0 * world.size;
+    const w = Math.min(W, x1 * world.size) - left;
+    const h = Math.min(H, y1 * world.size) - top;
+    for (let n = 0, tries = 0; n < count && tries < count * 20 && w > 0; tries++) {
+      const tx = left + Math.floor(random() * w);
+      const ty = top + Math.floor(random() * h);
+      if (isBlocked(tx, ty)) continue;
+      const a = makeActor(tx * TILE + 2, ty * TILE);
+      a.speed = 0.75;
+      a.wait = random() * 2000;
+      a.heading = -1;
+      addActor(a);
+      n++;
+    }
+  }
+  
+  // Crowd NPCs alternate between standing and walking a random direction
+  const HEADINGS = [[0, 1], [-1, 0], [1, 0], [0, -1]];
+  function wander(a, dt) {
+    a.wait -= dt;
+    if (a.wait <= 0) {
+      a.wait = 500 + random() * 2000;
+      a.heading = random() < 0.5 ? -1 : Math.floor(random() * 4);
+      a.frame = 0;
+    }
+    if (a.heading < 0) return;
+    const [dx, dy] = HEADINGS[a.heading];
+    moveActor(a, dx * a.speed, dy * a.speed);
+    a.animTimer += dt;
+    if (a.animTimer > 200) {
+      a.animTimer = 0;
+      a.frame = (a.frame % 2) + 1;
+    }
+  }
 
   // Camera
   const camera = { x: 0, y: 0 };
@@ -475,8 +1134,8 @@ script_js = r"""/* Tiny GBA-style RPG (vanilla JS, Canvas)
   function focusCamera() {
     const vw = VIEW_W * TILE;
     const vh = VIEW_H * TILE;
-    camera.x = Math.floor(player.x + player.w / 2 - vw / 2);
-    camera.y = Math.floor(player.y + player.h / 2 - vh / 2);
+    camera.x = Math.floor(player.drawX + player.w / 2 - vw / 2);
+    camera.y = Math.floor(player.drawY + player.h / 2 - vh / 2);
     camera.x = Math.max(0, Math.min(camera.x, W * TILE - vw));
     camera.y = Math.max(0, Math.min(camera.y, H * TILE - vh));
   }
@@ -487,7 +1146,7 @@ script_js = r"""/* Tiny GBA-style RPG (vanilla JS, Canvas)
   
   addEventListener('keydown', (e) => {
     const k = e.key.toLowerCase();
-    if (['arrowup','arrowdown','arrowleft','arrowright','w','a','s','d','z','enter','p','r'].includes(k)) {
+    if (GAME_KEYS.includes(k)) {
       e.preventDefault();
     }
     keys.add(k);
@@ -502,11 +1161,13 @@ script_js = r"""/* Tiny GBA-style RPG (vanilla JS, Canvas)
   }
 
   // ========== COLLISION ==========
-  function isSolidAt(px, py) {
-    const tx = Math.floor(px / TILE);
-    const ty = Math.floor(py / TILE);
-    if (tx < 0 || ty < 0 || tx >= W || ty >= H) return true;
-    return SOLID.has(map[ty][tx]);
+  // Any corner of the box on a blocked tile; the corners span at most 2×2
+  // tiles, looked up directly in the collision planes
+  function boxHitsSolid(x, y, w, h) {
+    const tx0 = Math.floor(x / TILE), tx1 = Math.floor((x + w) / TILE);
+    const ty0 = Math.floor(y / TILE), ty1 = Math.floor((y + h) / TILE);
+    return isBlocked(tx0, ty0) || isBlocked(tx1, ty0) ||
+           isBlocked(tx0, ty1) || isBlocked(tx1, ty1);
   }
   
   function moveActor(actor, dx, dy) {
@@ -517,31 +1178,14 @@ script_js = r"""/* Tiny GBA-style RPG (vanilla JS, Canvas)
       actor.dir = dy < 0 ? DIRS.UP : DIRS.DOWN;
     }
 
-    // Check X axis
-    let nx = actor.x + dx;
-    let ny = actor.y;
-    const cornersX = [
-      [nx, ny],
-      [nx + actor.w, ny],
-      [nx, ny + actor.h],
-      [nx + actor.w, ny + actor.h]
-    ];
-    if (!cornersX.some(([cx, cy]) => isSolidAt(cx, cy))) {
-      actor.x = nx;
+    // Check X axis, then Y axis
+    if (!boxHitsSolid(actor.x + dx, actor.y, actor.w, actor.h)) {
+      actor.x += dx;
     }
-
-    // Check Y axis
-    nx = actor.x;
-    ny = actor.y + dy;
-    const cornersY = [
-      [nx, ny],
-      [nx + actor.w, ny],
-      [nx, ny + actor.h],
-      [nx + actor.w, ny + actor.h]
-    ];
-    if (!cornersY.some(([cx, cy]) => isSolidAt(cx, cy))) {
-      actor.y = ny;
+    if (!boxHitsSolid(actor.x, actor.y + dy, actor.w, actor.h)) {
+      actor.y += dy;
     }
+    placeActor(actor);
   }
 
   // ========== DIALOGUE ==========
@@ -602,7 +1246,8 @@ script_js = r"""/* Tiny GBA-style RPG (vanilla JS, Canvas)
     }
   }
   
-  function isFacingNPC() {
+  // The actor with dialogue standing on the tile the player faces, if any
+  function facingActor() {
     const px = Math.floor((player.x + player.w / 2) / TILE);
     const py = Math.floor((player.y + player.h / 2) / TILE);
     let fx = px, fy = py;
@@ -612,54 +1257,140 @@ script_js = r"""/* Tiny GBA-style RPG (vanilla JS, Canvas)
     else if (player.dir === DIRS.LEFT) fx--;
     else if (player.dir === DIRS.RIGHT) fx++;
     
-    const nx = Math.floor((npc.x + npc.w / 2) / TILE);
-    const ny = Math.floor((npc.y + npc.h / 2) / TILE);
-    
-    return fx === nx && fy === ny;
+    // Actors are indexed by their top-left corner, up to a tile from the centre
+    for (const a of actorsNear((fx - 1) * TILE, (fy - 1) * TILE, (fx + 1) * TILE, (fy + 1) * TILE)) {
+      if (a.dialogue &&
+          Math.floor((a.x + a.w / 2) / TILE) === fx &&
+          Math.floor((a.y + a.h / 2) / TILE) === fy) {
+        return a;
+      }
+    }
+    return null;
   }
 
   // ========== RENDERING ==========
   function drawTile(id, sx, sy) {
-    const cols = Math.max(1, Math.floor(assets.tileset.width / TILE));
-    const tileX = (id % cols) * TILE;
-    const tileY = Math.floor(id / cols) * TILE;
+    const tileX = (id % tileCols) * TILE;
+    const tileY = Math.floor(id / tileCols) * TILE;
+    if (backend === 'framebuffer') {
+      blit(surfaces.tiles, tileX, tileY, TILE, TILE, sx, sy);
+      return;
+    }
     
     g.drawImage(
-      assets.tileset,
+      assets.tiles,
       tileX, tileY, TILE, TILE,
       sx, sy, TILE, TILE
     );
+  }
+  
+  // Tile id drawn at (tx, ty): grass off the map, -1 while streaming in
+  function mapTile(tx, ty) {
+    return (tx >= 0 && ty >= 0 && tx < W && ty < H) ? tileAt(tx, ty) : TILES.GRASS;
+  }
+  
+  // ---- Map chunk cache ----
+  // The map is cached as CHUNK×CHUNK-tile chunks (a canvas, or a surface in
+  // framebuffer mode), built the first time they come into view with the
+  // world chunks under them resident, and dropped with those. A frame
+  // blits the few visible chunks; one still streaming in is drawn tile by
+  // tile from what has arrived.
+  const CHUNK = 16;
+  const CHUNK_PX = CHUNK * TILE;
+  const mapChunks = new Map(); // "cx,cy" -> chunk
+  
+  function invalidateChunks() {
+    mapChunks.clear();
+  }
+  
+  function buildChunk(cx, cy) {
+    const chunk = {};
+    if (backend === 'framebuffer') {
+      const px = new Uint16Array(CHUNK_PX * CHUNK_PX);
+      chunk.surface = { w: CHUNK_PX, h: CHUNK_PX, px, opaque: true };
+    } else {
+      chunk.canvas = createCanvas();
+      chunk.canvas.width = chunk.canvas.height = CHUNK_PX;
+      chunk.ctx = chunk.canvas.getContext('2d');
+    }
     
-    // Subtle highlight
-    g.globalAlpha = 0.1;
-    g.fillStyle = '#ffffff';
-    g.fillRect(sx, sy, TILE, 2);
-    g.globalAlpha = 1;
+    for (let ty = 0; ty < CHUNK; ty++) {
+      for (let tx = 0; tx < CHUNK; tx++) {
+        const id = mapTile(cx * CHUNK + tx, cy * CHUNK + ty);
+        const tileX = (id % tileCols) * TILE;
+        const tileY = Math.floor(id / tileCols) * TILE;
+        if (chunk.surface) {
+          for (let row = 0; row < TILE; row++) {
+            const src = (tileY + row) * surfaces.tiles.w + tileX;
+            chunk.surface.px.set(surfaces.tiles.px.subarray(src, src + TILE),
+                                 (ty * TILE + row) * CHUNK_PX + tx * TILE);
+          }
+        } else {
+          chunk.ctx.drawImage(assets.tiles, tileX, tileY, TILE, TILE, tx * TILE, ty * TILE, TILE, TILE);
+        }
+      }
+    }
+    return chunk;
+  }
+  
+  // Cached chunk (cx, cy); null while part of it is still streaming in
+  function getChunk(cx, cy) {
+    const key = `${cx},${cy}`;
+    let chunk = mapChunks.get(key);
+    if (!chunk) {
+      const tx = cx * CHUNK, ty = cy * CHUNK;
+      if (!isResident(tx, ty, tx + CHUNK - 1, ty + CHUNK - 1)) return null;
+      chunk = buildChunk(cx, cy);
+      mapChunks.set(key, chunk);
+    }
+    return chunk;
   }
   
   function drawMap() {
-    const startTx = Math.floor(camera.x / TILE);
-    const startTy = Math.floor(camera.y / TILE);
-    
-    for (let ty = 0; ty <= VIEW_H; ty++) {
-      for (let tx = 0; tx <= VIEW_W; tx++) {
-        const mx = startTx + tx;
-        const my = startTy + ty;
-        const id = (mx >= 0 && my >= 0 && mx < W && my < H) 
-          ? map[my][mx] 
-          : TILES.GRASS;
-        
-        const sx = tx * TILE - (camera.x % TILE);
-        const sy = ty * TILE - (camera.y % TILE);
-        drawTile(id, sx, sy);
+    const cx0 = Math.floor(camera.x / CHUNK_PX);
+    const cy0 = Math.floor(camera.y / CHUNK_PX);
+    const cx1 = Math.floor((camera.x + BASE_W - 1) / CHUNK_PX);
+    const cy1 = Math.floor((camera.y + BASE_H - 1) / CHUNK_PX);
+    
+    for (let cy = cy0; cy <= cy1; cy++) {
+      for (let cx = cx0; cx <= cx1; cx++) {
+        const x = cx * CHUNK_PX - camera.x;
+        const y = cy * CHUNK_PX - camera.y;
+        const chunk = getChunk(cx, cy);
+        if (!chunk) {
+          drawPartialChunk(cx, cy, x, y);
+        } else if (backend === 'framebuffer') {
+          blit(chunk.surface, 0, 0, CHUNK_PX, CHUNK_PX, x, y);
+        } else {
+          g.drawImage(chunk.canvas, x, y);
+        }
+      }
+    }
+  }
+  
+  // The visible, resident tiles of chunk (cx, cy) drawn at (x, y)
+  function drawPartialChunk(cx, cy, x, y) {
+    const tx0 = Math.max(0, Math.floor(-x / TILE));
+    const ty0 = Math.max(0, Math.floor(-y / TILE));
+    const tx1 = Math.min(CHUNK - 1, Math.floor((BASE_W - 1 - x) / TILE));
+    const ty1 = Math.min(CHUNK - 1, Math.floor((BASE_H - 1 - y) / TILE));
+    for (let ty = ty0; ty <= ty1; ty++) {
+      for (let tx = tx0; tx <= tx1; tx++) {
+        const id = mapTile(cx * CHUNK + tx, cy * CHUNK + ty);
+        if (id >= 0) drawTile(id, x + tx * TILE, y + ty * TILE);
       }
     }
   }
   
   function drawActor(actor, sprite) {
     const fw = 16, fh = 24;
-    const sx = Math.floor(actor.x - camera.x);
-    const sy = Math.floor(actor.y - camera.y - 8);
+    const sx = Math.floor(actor.drawX - camera.x);
+    const sy = Math.floor(actor.drawY - camera.y - 8);
+    if (backend === 'framebuffer') {
+      blit(surfaces.player, actor.frame * fw, actor.dir * fh, fw, fh, sx, sy);
+      return;
+    }
+    markBlend(sx, sy, fw, fh);
     
     g.drawImage(
       sprite,
@@ -677,6 +1408,7 @@ script_js = r"""/* Tiny GBA-style RPG (vanilla JS, Canvas)
     const y = BASE_H - boxH - margin;
     const w = BASE_W - margin * 2;
     const h = boxH;
+    markBlend(x, y, w, h);
     
     // Draw box background
     g.fillStyle = '#F0F0E8';
@@ -734,10 +1466,33 @@ script_js = r"""/* Tiny GBA-style RPG (vanilla JS, Canvas)
   }
 
   // ========== GAME LOOP ==========
+  // Fixed timestep: the simulation advances in STEP ms ticks (speeds and
+  // timers are tuned for 60 per second), as many per display frame as the
+  // elapsed time covers, and actors are drawn interpolated between the last
+  // two ticks. Stalls longer than MAX_LAG are not caught up.
+  const STEP = 1000 / 60;
+  const MAX_LAG = 250;
   let lastTime = performance.now();
+  let lag = 0;
   let saveTimer = 0;
   let paused = false;
   
+  function snapshotActors() {
+    for (const a of actors) {
+      a.prevX = a.x;
+      a.prevY = a.y;
+    }
+  }
+  
+  // alpha: fraction of a tick elapsed since the last one
+  function interpolateActors(alpha) {
+    for (const a of actors) {
+      a.drawX = a.prevX + (a.x - a.prevX) * alpha;
+      a.drawY = a.prevY + (a.y - a.prevY) * alpha;
+    }
+    focusCamera();
+  }
+  
   function update(dt) {
     // Handle pause
     if (isKeyPressed('p')) {
@@ -783,64 +1538,167 @@ script_js = r"""/* Tiny GBA-style RPG (vanilla JS, Canvas)
       player.animTimer = 0;
     }
     
+    // Other actors
+    for (let i = 0; i < actors.length; i++) {
+      if (actors[i].wait !== undefined) wander(actors[i], dt);
+    }
+    
     // Interaction
     if (isKeyPressed('z') || isKeyPressed('enter')) {
-      if (isFacingNPC()) {
-        startDialogue(npc.dialogue);
+      const other = facingActor();
+      if (other) {
+        startDialogue(other.dialogue);
       }
     }
     
     // Reset
     if (isKeyPressed('r')) {
-      localStorage.removeItem(saveKey);
-      player.x = 5 * TILE;
-      player.y = 5 * TILE;
+      storage.removeItem(saveKey);
+      player.x = player.prevX = START[0] * TILE;
+      player.y = player.prevY = START[1] * TILE;
       player.dir = DIRS.DOWN;
+      placeActor(player);
     }
     
     // Auto-save
     saveTimer += dt;
     if (saveTimer > 2000) {
       saveTimer = 0;
-      localStorage.setItem(saveKey, JSON.stringify({
-        x: player.x,
-        y: player.y,
-        dir: player.dir
-      }));
+      saveGame();
     }
+  }
+  
+  function saveGame() {
+    storage.setItem(saveKey, JSON.stringify({
+      x: player.x,
+      y: player.y,
+      dir: player.dir
+    }));
+  }
+  
+  // ========== DIRTY RECTANGLES ==========
+  // The last presented frame as a key plus rectangle per item (visible
+  // actors, dialogue box). A frame whose keys all match is skipped; while
+  // the camera holds still, only the rectangles of changed items (old and
+  // new place, or where an actor left the view) are converted, scanlined
+  // and upscaled.
+  let shownView = null;
+  const dirtyRects = []; // disjoint [x, y, w, h] in backbuffer pixels
+  const DIALOGUE_RECT = [7, BASE_H - 65, BASE_W - 14, 58]; // box plus border
+  
+  // Add a rectangle, merged with every one it overlaps or touches
+  function markDirty(x, y, w, h) {
+    let x0 = Math.max(0, x), y0 = Math.max(0, y);
+    let x1 = Math.min(BASE_W, x + w), y1 = Math.min(BASE_H, y + h);
+    if (x1 <= x0 || y1 <= y0) return;
+    for (let i = 0; i < dirtyRects.length; i++) {
+      const [rx, ry, rw, rh] = dirtyRects[i];
+      if (rx <= x1 && x0 <= rx + rw && ry <= y1 && y0 <= ry + rh) {
+        x0 = Math.min(x0, rx);
+        y0 = Math.min(y0, ry);
+        x1 = Math.max(x1, rx + rw);
+        y1 = Math.max(y1, ry + rh);
+        dirtyRects.splice(i, 1);
+        i = -1; // the grown rectangle may reach earlier ones
+      }
+    }
+    dirtyRects.push([x0, y0, x1 - x0, y1 - y0]);
+  }
+  
+  function captureView() {
+    const shown = new Map(); // actor -> item
+    for (const a of visibleActors()) {
+      const x = Math.floor(a.drawX - camera.x);
+      const y = Math.floor(a.drawY - camera.y - 8);
+      // row: a change of depth order repaints where sprites overlap
+      shown.set(a, { key: `${x},${y},${a.frame},${a.dir},${a.row}`, rect: [x, y, 16, 24] });
+    }
+    const blink = dialogue.waiting && Math.floor(Date.now() / 400) % 2 === 0;
+    const items = [{
+      key: dialogue.open ? `${dialogue.currentLine},${dialogue.displayText.length},${blink}` : '',
+      rect: DIALOGUE_RECT
+    }];
+    return { camera: `${camera.x},${camera.y}`, world: world.version, paused, actors: shown, items };
+  }
+  
+  function markChanged(item, prev) {
+    if (prev && item.key === prev.key) return;
+    if (prev) markDirty(...prev.rect);
+    markDirty(...item.rect);
+  }
+  
+  // How to present the next frame: 'full', 'partial' (dirtyRects) or 'skip'
+  function planFrame() {
+    const view = captureView();
+    const prev = shownView;
+    shownView = view;
+    dirtyRects.length = 0;
+    if (!prev || view.camera !== prev.camera || view.world !== prev.world ||
+        view.paused !== prev.paused) return 'full';
     
-    focusCamera();
+    view.actors.forEach((item, a) => markChanged(item, prev.actors.get(a)));
+    prev.actors.forEach((item, a) => {
+      if (!view.actors.has(a)) markDirty(...item.rect);
+    });
+    view.items.forEach((item, i) => markChanged(item, prev.items[i]));
+    if (!dirtyRects.length) return 'skip';
+    if (paused) return 'full'; // the overlay is drawn over the whole screen
+    // drawDialogue repaints the whole box, so present all of it
+    if (dialogue.open) markDirty(...DIALOGUE_RECT);
+    return 'partial';
   }
   
-  function render() {
+  function render(full = true) {
     // Clear backbuffer
-    g.fillStyle = '#000000';
-    g.fillRect(0, 0, BASE_W, BASE_H);
+    if (backend === 'framebuffer') {
+      fb.fill(0);
+    } else {
+      g.fillStyle = '#000000';
+      g.fillRect(0, 0, BASE_W, BASE_H);
+    }
     
     // Draw world
     drawMap();
     
-    // Draw entities (sorted by Y for depth)
-    const entities = [npc, player].sort((a, b) => a.y - b.y);
-    entities.forEach(entity => {
-      drawActor(entity, assets.player);
-    });
+    // Draw the actors in view, in depth order
+    for (const actor of visibleActors()) {
+      drawActor(actor, assets.player);
+    }
+    
+    // The framebuffer holds the whole world; UI below is drawn on top of it
+    if (backend === 'framebuffer') presentFramebuffer(full);
     
     // Draw UI
     drawDialogue();
     
     // Post-process: BGR555 quantization
-    let frame = g.getImageData(0, 0, BASE_W, BASE_H);
-    frame = quantizeBGR555(frame);
-    g.putImageData(frame, 0, 0);
+    if (quantizeMode === 'frame') {
+      let frame = g.getImageData(0, 0, BASE_W, BASE_H);
+      frame = quantizeBGR555(frame);
+      g.putImageData(frame, 0, 0);
+    } else {
+      settleBlendRects();
+    }
+    blendRects.length = 0;
     
-    // Apply LCD scanlines
-    g.drawImage(scanlines, 0, 0);
+    // Apply LCD scanlines (a partial framebuffer frame replaced only the
+    // dirty rects; the canvas path redrew everything)
+    if (full || backend === 'canvas') {
+      g.drawImage(scanlines, 0, 0);
+    } else {
+      for (const [x, y, w, h] of dirtyRects) g.drawImage(scanlines, x, y, w, h, x, y, w, h);
+    }
     
     // Scale to display canvas
-    sctx.clearRect(0, 0, screen.width, screen.height);
     sctx.imageSmoothingEnabled = false;
-    sctx.drawImage(backbuf, 0, 0, screen.width, screen.height);
+    if (full) {
+      sctx.clearRect(0, 0, screen.width, screen.height);
+      sctx.drawImage(backbuf, 0, 0, screen.width, screen.height);
+    } else {
+      for (const [x, y, w, h] of dirtyRects) {
+        sctx.drawImage(backbuf, x, y, w, h, x * SCALE, y * SCALE, w * SCALE, h * SCALE);
+      }
+    }
     
     // Draw pause overlay
     if (paused) {
@@ -857,32 +1715,37 @@ script_js = r"""/* Tiny GBA-style RPG (vanilla JS, Canvas)
   }
   
   function gameLoop(currentTime) {
-    const dt = Math.min(32, currentTime - lastTime);
+    lag += Math.min(MAX_LAG, currentTime - lastTime);
     lastTime = currentTime;
     
-    update(dt);
-    render();
+    while (lag >= STEP) {
+      snapshotActors();
+      update(STEP);
+      
+      // Update input state
+      lastKeys.clear();
+      keys.forEach(k => lastKeys.add(k));
+      lag -= STEP;
+    }
+    interpolateActors(lag / STEP);
+    streamWorld();
     
-    // Update input state
-    lastKeys.clear();
-    keys.forEach(k => lastKeys.add(k));
+    const frame = planFrame();
+    if (frame !== 'skip') render(frame === 'full');
     
-    requestAnimationFrame(gameLoop);
+    requestFrame(gameLoop);
   }
 
   // ========== INITIALIZATION ==========
   (async () => {
-    await loadAssets();
-    requestAnimationFrame(gameLoop);
-    
-    // Save on page unload
-    addEventListener('beforeunload', () => {
-      localStorage.setItem(saveKey, JSON.stringify({
-        x: player.x,
-        y: player.y,
-        dir: player.dir
-      }));
-    });
+    await Promise.all([loadAssets(), loadWorld()]);
+    spawnCrowd(Number(params.get('crowd')) || 0);
+    requestFrame(gameLoop);
+    
+    // Save when the page unloads or is hidden; in the worker the page
+    // forwards those as 'save' events
+    if (IN_WORKER) addEventListener('save', saveGame);
+    else onPageLeave(saveGame);
   })();
 })();
 """
@@ -896,6 +1759,11 @@ A miniature tile-based RPG scaffold with authentic **Game Boy Advance SP** rende
 
 - **Native GBA Resolution**: Renders at 240×160 and upscales 3× with nearest-neighbor
 - **BGR555 Color Quantization**: Authentic 15-bit color depth (5 bits per channel)
+- **Framebuffer Renderer**: The world is composed in a 15-bit typed-array framebuffer and drawn with one `putImageData` per frame (add `?renderer=canvas` to the URL to use plain canvas drawing instead)
+- **Large Crowds**: Actors live in a grid spatial index; only those in view are depth-sorted and drawn (add `?crowd=5000` to the URL to spawn 5,000 wandering NPCs)
+- **Streaming World**: The map ships as 32×32-tile chunk files plus an index; only the chunks around the camera are fetched and kept in memory (a bounded LRU), with extra chunks prefetched in the walking direction, so world size does not affect load time
+- **Tiled Maps**: Build with `python -m gba_build --map town.tmx` to ship a [Tiled](https://www.mapeditor.org/) map (TMX or JSON) instead of the demo map: a `collision` layer and `solid` tile properties become the collision plane, and `npc`/`player` objects place the cast (without a `player` object the player starts on the free tile nearest (5, 5))
+- **Worker Rendering**: Add `?worker=1` to the URL to run the game loop and rendering in a Web Worker on an `OffscreenCanvas`; the page only forwards key presses and stores saves (ignored where `OffscreenCanvas` is unsupported)
 - **LCD Effects**: Subtle scanlines and sub-pixel grid for that authentic LCD feel
 - **Procedural Assets**: Auto-generates tileset and sprites if PNGs are missing
 - **Core RPG Mechanics**:
@@ -905,7 +1773,7 @@ A miniature tile-based RPG scaffold with authentic **Game Boy Advance SP** rende
   - Collision detection
   - Smooth camera following
   - Dialogue system with typewriter effect
-  - Auto-save via localStorage
+  - Auto-save via localStorage (every 2 seconds, and when the page is hidden or closed)
 
 ## Controls
 
@@ -927,6 +1795,8 @@ Simply open `index.html` in a modern browser.
    - Branch: `main` → `/ (root)`
 4. Visit `https://<username>.github.io/<repo-name>/`
 
+Scripts, styles and assets carry a content hash in their names (see `asset-manifest.json`), so a new build never serves stale code. Hosts that read `_headers` (Netlify, Cloudflare Pages) cache them for good, and returning players load them without revalidation requests. GitHub Pages ignores `_headers` and uses its own short cache lifetime, so there returning players still revalidate each file.
+
 ## Custom Art (Optional)
 
 Place your own pixel art in the `assets/` folder:
@@ -964,29 +1834,6 @@ This is a scaffold/template. Use it freely for your own projects.
 # .nojekyll file
 nojekyll = "# Ensures GitHub Pages serves files verbatim without Jekyll processing.\n"
 
-# Write all files
-print(f"Creating GBA RPG package in: {root}")
-
-with open(os.path.join(root, "index.html"), "w", encoding="utf-8") as f:
-    f.write(index_html)
-    print("✓ Created index.html")
-
-with open(os.path.join(root, "style.css"), "w", encoding="utf-8") as f:
-    f.write(style_css)
-    print("✓ Created style.css")
-
-with open(os.path.join(root, "script.js"), "w", encoding="utf-8") as f:
-    f.write(script_js)
-    print("✓ Created script.js")
-
-with open(os.path.join(root, "README.md"), "w", encoding="utf-8") as f:
-    f.write(readme_md)
-    print("✓ Created README.md")
-
-with open(os.path.join(root, ".nojekyll"), "w", encoding="utf-8") as f:
-    f.write(nojekyll)
-    print("✓ Created .nojekyll")
-
 # Create placeholder for assets
 assets_readme = """# Assets Directory
 
@@ -996,25 +1843,155 @@ Place your custom pixel art here:
 - `player.png` - Character sprite sheet (16×24 per frame, 3 columns × 4 rows)
 
 The game will use procedural graphics if these files are missing.
+Given to the build (`--assets DIR`), they are packed into one `atlas0.png` sheet, which the game loads instead.
+`world/` holds the compiled world map, written by the build: `index.bin` plus one file per chunk
+(one byte per tile, then a collision plane).
 """
 
-with open(os.path.join(assets_dir, "README.md"), "w", encoding="utf-8") as f:
-    f.write(assets_readme)
-    print("✓ Created assets/README.md")
-
-# Create ZIP file
-zip_path = "/workspace/gba_rpg.zip"
-with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as z:
-    for folder, _, files in os.walk(root):
-        for name in files:
-            full = os.path.join(folder, name)
-            rel = os.path.relpath(full, root)
-            z.write(full, arcname=os.path.join("gba_rpg", rel))
+
+
+# Per-channel transfer of quantizeBGR555 (5-bit snap, then backlight gamma),
+# applied to PNG assets at build time
+COLOR_TRANSFER = {"gamma": 1.05}
+
+# Sheets loadAssets loads by name, packed into an atlas by the build when present
+ATLAS_SPRITES = {"tileset": "assets/tileset.png", "player": "assets/player.png"}
+
+# Highlight along the top 2 rows of every tile, baked into a supplied
+# tileset.png by the build's lighting stage (and by bakeLighting into the
+# procedural one)
+TILE_LIGHTING = {
+    "tile": 16,
+    "bands": [{"rows": [0, 2], "color": "#ffffff", "alpha": 0.1}],
+}
+
+# One 2x2 period of the LCD overlay, as (x, y, w, h, alpha) black fills: the
+# scanline on even rows, then the sub-pixel grid
+LCD_FILLS = ((0, 0, 2, 1, 0.12), (1, 0, 1, 1, 0.05), (0, 1, 1, 1, 0.05))
+
+# Generator part of the runtime BUILD config
+BUILD_CONFIG = {
+    "lcd": lcd_pattern(2, 2, LCD_FILLS),
+    "lighting": TILE_LIGHTING["bands"],
+}
+
+
+# Tile ids, read from the TILES table in script_js so both sides agree.
+TILES = {name: int(tid) for name, tid in re.findall(
+    r"(\w+): (\d+)", script_js[script_js.index("const TILES = {"):script_js.index("};", script_js.index("const TILES = {"))])}
+
+# Solid tile ids, read from the SOLID set in script_js
+_solid_at = script_js.index("const SOLID = ")
+SOLID = frozenset(TILES[name] for name in re.findall(
+    r"TILES\.(\w+)", script_js[_solid_at:script_js.index(";", _solid_at)]))
+
+WORLD_W, WORLD_H = 40, 30
+
+# Tile roles for seeded worlds (gba_build/worldgen.py); this tileset has no
+# tree tops or rocks
+WORLDGEN_TILES = {
+    "grass": [TILES["GRASS"]],
+    "path": [TILES["PATH"]],
+    "water": [TILES["WATER"]],
+    "tall": [TILES["TALL"]],
+    "tree": TILES["TREE"],
+    "flower": TILES["FLOWERS"],
+}
+# Kept clear in seeded worlds: the player's start and the NPC
+WORLD_CLEARING = (1, 1, 17, 15)
+
+# Tiled maps (gba_build/tiled.py) compile to a single tile layer
+MAP_IMPORT = {"tile": TILE_LIGHTING["tile"], "solid": sorted(SOLID)}
+
+
+def build_world(world=None):
+    """Return the chunked assets/world/ files (a tile layer plus collision).
+
+    By default this is the demo map, mirroring generateWorld in script_js.
+    ``world`` (a variant's ``options["world"]``) asks for a seeded world
+    instead: ``width``, ``height``, ``seed`` and any worldgen parameters.
+    """
+    if world:
+        world = dict(world)
+        return chunk_files(*generate_world(
+            world.pop("width", WORLD_W), world.pop("height", WORLD_H), WORLDGEN_TILES, SOLID,
+            clearing=WORLD_CLEARING, **world))
+    w, h = WORLD_W, WORLD_H
+    tiles = bytearray(w * h)
+    for y in range(h):
+        for x in range(w):
+            tid = TILES["GRASS"]
+            if x in (0, w - 1) or y in (0, h - 1):
+                tid = TILES["TREE"]
+            elif x == 12 and 3 < y < h - 4:
+                tid = TILES["WATER"]
+            elif y == 10 and 3 < x < w - 3:
+                tid = TILES["PATH"]
+            elif x == 20 and 3 < y < h - 3:
+                tid = TILES["PATH"]
+            tiles[y * w + x] = tid
+
+    for x, y in [(6, 6), (7, 6), (8, 6), (22, 12), (23, 12)]:
+        if x < w and y < h:
+            tiles[y * w + x] = TILES["FLOWERS"]
+
+    for x in range(28, min(36, w)):
+        for y in range(5, min(10, h)):
+            tiles[y * w + x] = TILES["TALL"]
+
+    return world_files(w, h, [tiles], collision_plane(tiles, SOLID))
+
+
+def render(variant):
+    """Return the package contents for ``variant`` (relative path -> text/bytes)."""
+    return {
+        "index.html": index_html,
+        "style.css": style_css,
+        "script.js": script_js,
+        "README.md": readme_md,
+        ".nojekyll": nojekyll,
+        "assets/README.md": assets_readme,
+        **build_world(variant.options.get("world")),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--out", default="/workspace",
+                        help="directory for the package folder and zip (default: /workspace)")
+    parser.add_argument("--archive-only", action="store_true",
+                        help="write only the zip, streamed from memory, without the package folder")
+    parser.add_argument("--no-minify", action="store_true",
+                        help="ship script.js, style.css and index.html unminified")
+    args = parser.parse_args(argv)
+
+    options = {"minify": False} if args.no_minify else {}
+    variant = builtin_variant("gba_rpg", args.out, tree=not args.archive_only, **options)
+    print(f"Creating GBA RPG package in: {variant.root}")
+
+    # Only outputs whose content changed since the last build are written,
+    # and the zip is rebuilt (straight from memory) only when some member changed.
+    result = build_variant(variant)
+    if variant.tree:
+        for rel, changed in result.results:
+            print(f"✓ Created {rel}" if changed else f"· Unchanged {rel}")
+    if result.report.get("minified") and not result.up_to_date:
+        print("\nMinified:")
+        for line in format_size_report(result.report["minified"]):
+            print(f"  {line}")
+
+    if result.up_to_date:
+        print(f"\n✅ Package up to date: {variant.archive}")
+    else:
+        for rel in result.archived or []:
             print(f"  Added to zip: {rel}")
+        print(f"\n✅ Package created successfully: {variant.archive}")
+    print(f"   Size: {os.path.getsize(variant.archive):,} bytes")
+    print("\nTo use:")
+    print("1. Extract the ZIP file")
+    print("2. Open index.html in a browser")
+    print("3. Or deploy to GitHub Pages")
+
 
-print(f"\n✅ Package created successfully: {zip_path}")
-print(f"   Size: {os.path.getsize(zip_path):,} bytes")
-print("\nTo use:")
-print("1. Extract the ZIP file")
-print("2. Open index.html in a browser")
-print("3. Or deploy to GitHub Pages")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import os
+import zipfile
+
+from gba_build.archive import (ARCHIVE_TAG, ZIP_EPOCH, archive_current, build_archive,
+                               files_digest, write_archive)
+from gba_build.core import Variant, build_variant
+
+FILES = {"index.html": "<p>hi</p>", "assets/b.png": b"\x89PNG fake", "assets/a.bin": b"\x00" * 64}
+
+
+def test_same_outputs_give_byte_identical_zips(tmp_path):
+    first, second = tmp_path / "first.zip", tmp_path / "second.zip"
+    digest = files_digest(FILES, "1")
+    write_archive(FILES, str(first), "pkg", digest)
+    write_archive(dict(reversed(list(FILES.items()))), str(second), "pkg", digest)
+    assert first.read_bytes() == second.read_bytes()
+
+
+def test_members_are_sorted_with_fixed_metadata(tmp_path):
+    path = tmp_path / "pkg.zip"
+    members = write_archive(FILES, str(path), "pkg", files_digest(FILES, "1"))
+    assert members == sorted(FILES)
+    with zipfile.ZipFile(path) as z:
+        infos = z.infolist()
+        assert [info.filename for info in infos] == [f"pkg/{rel}" for rel in sorted(FILES)]
+        assert {info.date_time for info in infos} == {ZIP_EPOCH}
+        assert {info.external_attr >> 16 for info in infos} == {0o644}
+        assert z.read("pkg/index.html") == b"<p>hi</p>"
+        assert z.comment == ARCHIVE_TAG + files_digest(FILES, "1").encode("ascii")
+
+
+def test_digest_depends_on_content_names_and_version():
+    digest = files_digest(FILES, "1")
+    assert files_digest(dict(reversed(list(FILES.items()))), "1") == digest
+    assert files_digest({**FILES, "index.html": "<p>bye</p>"}, "1") != digest
+    assert files_digest({"renamed.html" if k == "index.html" else k: v
+                         for k, v in FILES.items()}, "1") != digest
+    assert files_digest(FILES, "2") != digest
+
+
+def test_current_archive_is_not_rewritten(tmp_path):
+    path = tmp_path / "out" / "pkg.zip"
+    assert build_archive(FILES, str(path), "pkg", "1") == sorted(FILES)
+    before = os.stat(path)
+    assert archive_current(str(path), files_digest(FILES, "1"))
+    assert build_archive(FILES, str(path), "pkg", "1") is None
+    after = os.stat(path)
+    assert (after.st_ino, after.st_mtime_ns) == (before.st_ino, before.st_mtime_ns)
+
+
+def test_changed_outputs_or_version_rewrite_the_archive(tmp_path):
+    path = str(tmp_path / "pkg.zip")
+    build_archive(FILES, path, "pkg", "1")
+    assert build_archive({**FILES, "index.html": "<p>bye</p>"}, path, "pkg", "1") is not None
+    assert build_archive({**FILES, "index.html": "<p>bye</p>"}, path, "pkg", "2") is not None
+    assert not archive_current(path, files_digest(FILES, "1"))
+
+
+def test_missing_or_foreign_zip_is_not_current(tmp_path):
+    path = tmp_path / "pkg.zip"
+    assert not archive_current(str(path), "0" * 64)
+    path.write_bytes(b"not a zip")
+    assert not archive_current(str(path), "0" * 64)
+    with zipfile.ZipFile(path, "w") as z:
+        z.writestr("x", "y")
+    assert not archive_current(str(path), "0" * 64)
+    assert build_archive(FILES, str(path), "pkg", "1") == sorted(FILES)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_built_variant_archives_are_reproducible(tmp_path, monkeypatch):
+    monkeypatch.setenv("GBA_BUILD_CACHE", str(tmp_path / "cache"))
+    zips = []
+    for run in ("a", "b"):
+        variant = Variant("toy", "tests.toy_generator", str(tmp_path / run / "toy"),
+                          archive=str(tmp_path / run / "toy.zip"), options={"files": FILES})
+        build_variant(variant)
+        zips.append((tmp_path / run / "toy.zip").read_bytes())
+    assert zips[0] == zips[1]
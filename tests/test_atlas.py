@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from gba_build.atlas import MAX_SIZE, pack_atlas, pack_rects
+from gba_build.png import decode_png, encode_png
+
+
+@pytest.fixture(autouse=True)
+def private_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("GBA_BUILD_CACHE", str(tmp_path / "cache"))
+
+
+def solid(w, h, color):
+    return encode_png(w, h, bytes(color) * (w * h))
+
+
+def is_pot(n):
+    return n > 0 and n & (n - 1) == 0
+
+
+def check_packing(sizes, sheets, places, max_size):
+    assert len(places) == len(sizes)
+    for width, height in sheets:
+        assert is_pot(width) and is_pot(height)
+        assert width <= max_size and height <= max_size
+    rects = []
+    for (w, h), (sheet, x, y) in zip(sizes, places):
+        width, height = sheets[sheet]
+        assert 0 <= x and x + w <= width and 0 <= y and y + h <= height
+        rects.append((sheet, x, y, w, h))
+    for i, (s1, x1, y1, w1, h1) in enumerate(rects):
+        for s2, x2, y2, w2, h2 in rects[i + 1:]:
+            overlap = s1 == s2 and x1 < x2 + w2 and x2 < x1 + w1 and y1 < y2 + h2 and y2 < y1 + h1
+            assert not overlap, (rects[i], (s2, x2, y2, w2, h2))
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_packed_rects_are_disjoint_on_power_of_two_sheets(seed):
+    rng = random.Random(seed)
+    sizes = [(rng.randint(1, 200), rng.randint(1, 200)) for _ in range(rng.randint(1, 40))]
+    sheets, places = pack_rects(sizes, max_size=256)
+    check_packing(sizes, sheets, places, 256)
+
+
+def test_single_sheet_is_the_smallest_that_fits():
+    assert pack_rects([(256, 32)]) == ([(256, 32)], [(0, 0, 0)])
+    sheets, places = pack_rects([(16, 16)] * 4)
+    assert sheets == [(32, 32)]
+    check_packing([(16, 16)] * 4, sheets, places, MAX_SIZE)
+
+
+def test_overflow_spills_into_more_sheets():
+    sizes = [(MAX_SIZE, MAX_SIZE // 2)] * 3
+    sheets, places = pack_rects(sizes)
+    assert len(sheets) == 2
+    check_packing(sizes, sheets, places, MAX_SIZE)
+
+
+@pytest.mark.parametrize("size", [(MAX_SIZE + 1, 8), (8, MAX_SIZE + 1)])
+def test_sprite_larger_than_an_atlas_is_an_error(size):
+    with pytest.raises(ValueError, match=f"does not fit a {MAX_SIZE}x{MAX_SIZE} atlas"):
+        pack_rects([(16, 16), size])
+
+
+def test_pack_atlas_replaces_sprites_with_sheets():
+    files = {"assets/a.png": solid(8, 4, (255, 0, 0, 255)),
+             "assets/b.png": solid(4, 4, (0, 0, 255, 128)),
+             "index.html": "x"}
+    sprites = {"a": "assets/a.png", "b": "assets/b.png", "missing": "assets/c.png"}
+    manifest = pack_atlas(files, sprites)
+
+    assert sorted(files) == ["assets/atlas0.png", "index.html"]
+    assert manifest["sheets"] == ["assets/atlas0.png"]
+    assert sorted(manifest["sprites"]) == ["a", "b"]
+    width, height, rgba = decode_png(files["assets/atlas0.png"])
+    assert is_pot(width) and is_pot(height)
+    for name, color in (("a", (255, 0, 0, 255)), ("b", (0, 0, 255, 128))):
+        s = manifest["sprites"][name]
+        assert s["src"] == sprites[name] and s["sheet"] == 0
+        for y in range(s["y"], s["y"] + s["h"]):
+            at = (y * width + s["x"]) * 4
+            assert rgba[at:at + s["w"] * 4] == bytes(color) * s["w"]
+
+
+def test_pack_atlas_without_sprites_present():
+    files = {"index.html": "x"}
+    assert pack_atlas(files, {"a": "assets/a.png"}) is None
+    assert files == {"index.html": "x"}
+
+
+def test_pack_atlas_leaves_undecodable_sprites_with_a_warning():
+    files = {"assets/a.png": solid(4, 4, (1, 2, 3, 255)), "assets/b.png": b"not a png"}
+    with pytest.warns(UserWarning, match="assets/b.png"):
+        manifest = pack_atlas(files, {"a": "assets/a.png", "b": "assets/b.png"})
+    assert sorted(manifest["sprites"]) == ["a"]
+    assert files["assets/b.png"] == b"not a png"
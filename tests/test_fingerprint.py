@@ -0,0 +1,146 @@
+import json
+import posixpath
+import re
+
+import pytest
+
+from gba_build import BUILTIN, builtin_variant
+from gba_build.core import Variant, render_variant
+from gba_build.fingerprint import (ASSET_MANIFEST, HEADERS_FILE, IMMUTABLE, REVALIDATE,
+                                   fingerprint_assets, fingerprinted_name, logical_path)
+from gba_build.precompress import PRECOMPRESS_MANIFEST
+
+PAGE = """<!doctype html>
+<link rel="stylesheet" href="style.css" />
+<a href="https://example.com/">home</a>
+<img src='assets/logo.png'>
+<script src="script.js"></script>
+"""
+FILES = {
+    "index.html": PAGE,
+    "about/index.html": '<script src="../script.js"></script><a href="../index.html">up</a>',
+    "script.js": "var BUILD = /*@BUILD@*/{};\nload(BUILD.assets['assets/hero.png']);\n",
+    "style.css": "body { margin: 0; }\n",
+    "assets/hero.png": b"hero",
+    "assets/logo.png": b"logo",
+    "assets/world/index.bin": b"index",
+    "assets/world/0.bin": b"chunk",
+    "assets/notes.txt": "not fetched by path",
+}
+HASHED = re.compile(r"\.[0-9a-f]{10}(\.\w+|/)$")
+
+
+@pytest.fixture(autouse=True)
+def private_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("GBA_BUILD_CACHE", str(tmp_path / "cache"))
+
+
+def render(tmp_path, **options):
+    variant = Variant("toy", "tests.toy_generator", str(tmp_path / "out"),
+                      options={"files": FILES, "minify": False, **options})
+    _, files, report = render_variant(variant)
+    return files, report
+
+
+def build_config(files):
+    script = next(data for rel, data in files.items() if rel.startswith("script."))
+    return json.loads(re.search(r"var BUILD = (\{.*?\});\n", script).group(1))
+
+
+def headers(files):
+    """``_headers`` as ``{path: Cache-Control value}``."""
+    rules = re.findall(r"^(\S+)\n  Cache-Control: (.+)$", files[HEADERS_FILE], re.M)
+    return dict(rules)
+
+
+def test_assets_get_hashed_names_and_the_world_moves_as_a_unit():
+    files = dict(FILES)
+    mapping = fingerprint_assets(files)
+    assert mapping["assets/hero.png"] == fingerprinted_name("assets/hero.png", b"hero")
+    assert HASHED.search(mapping["assets/world/"])
+    assert sorted(mapping) == ["assets/hero.png", "assets/logo.png", "assets/world/"]
+    world = mapping["assets/world/"]
+    assert files[world + "0.bin"] == b"chunk" and files[world + "index.bin"] == b"index"
+    assert not any(rel.startswith("assets/world/") for rel in files)
+    assert files["assets/notes.txt"] == FILES["assets/notes.txt"]
+
+
+def test_world_hash_follows_any_chunk():
+    first, second = dict(FILES), dict(FILES, **{"assets/world/0.bin": b"changed"})
+    assert (fingerprint_assets(first)["assets/world/"]
+            != fingerprint_assets(second)["assets/world/"])
+
+
+def test_pages_reference_the_hashed_scripts_styles_and_assets(tmp_path):
+    files, report = render(tmp_path)
+    mapping = report["fingerprinted"]
+    assert {"script.js", "style.css", "assets/hero.png", "assets/world/"} <= set(mapping)
+    for page in ("index.html", "about/index.html"):
+        base = posixpath.dirname(page)
+        refs = re.findall(r'(?:src|href)=["\']([^"\']+)', files[page])
+        local = [ref for ref in refs if "://" not in ref]
+        assert local
+        for ref in local:
+            rel = posixpath.normpath(posixpath.join(base, ref))
+            assert rel in files, (page, ref)
+            assert rel.endswith(".html") or HASHED.search(rel), (page, ref)
+    assert 'href="https://example.com/"' in files["index.html"]
+    assert '<a href="../index.html">' in files["about/index.html"]
+
+
+def test_scripts_resolve_assets_through_build_assets(tmp_path):
+    files, report = render(tmp_path)
+    assets = build_config(files)["assets"]
+    mapping = report["fingerprinted"]
+    assert assets == {rel: mapping[rel] for rel in mapping if rel.startswith("assets/")}
+    for logical, target in assets.items():
+        if target.endswith("/"):
+            assert any(rel.startswith(target) for rel in files)
+        else:
+            assert files[target] == FILES[logical]
+
+
+def test_asset_manifest_agrees_with_logical_path(tmp_path):
+    files, report = render(tmp_path, gzip=True)
+    manifest = json.loads(files[ASSET_MANIFEST])
+    assert manifest == report["fingerprinted"]
+    assert report["precompressed"]
+    names = {rel: logical_path(manifest, rel) for rel in files}
+    assert {name for name in names.values() if not name.endswith(".gz")} == (
+        set(FILES) | {ASSET_MANIFEST, HEADERS_FILE, PRECOMPRESS_MANIFEST})
+    for rel, name in names.items():
+        if name.endswith(".gz"):
+            assert names[rel[:-3]] == name[:-3]
+        elif name.startswith("assets/"):
+            assert files[rel] == FILES[name]
+
+
+def test_headers_mark_hashed_paths_immutable_and_pages_revalidated(tmp_path):
+    files, report = render(tmp_path)
+    rules = headers(files)
+    for target in report["fingerprinted"].values():
+        path = "/" + target + ("*" if target.endswith("/") else "")
+        assert rules.pop(path) == IMMUTABLE
+    assert rules == {"/index.html": REVALIDATE, "/about/index.html": REVALIDATE,
+                     "/": REVALIDATE}
+
+
+def test_fingerprinting_can_be_turned_off(tmp_path):
+    files, report = render(tmp_path, fingerprint=False)
+    assert "fingerprinted" not in report
+    assert ASSET_MANIFEST not in files and HEADERS_FILE not in files
+    assert files["index.html"] == PAGE
+
+
+@pytest.mark.parametrize("name", sorted(BUILTIN))
+def test_builtin_pages_and_assets_resolve(name, tmp_path):
+    variant = builtin_variant(name, str(tmp_path), tree=False, minify=False, gzip=False)
+    _, files, report = render_variant(variant)
+    mapping = report["fingerprinted"]
+    refs = re.findall(r'(?:src|href)=["\']([^"\':]+)["\']', files["index.html"])
+    assert refs
+    for ref in refs:
+        assert ref in files and HASHED.search(ref), ref
+    for target in mapping.values():
+        assert any(rel == target or rel.startswith(target) for rel in files), target
+    assert json.loads(files[ASSET_MANIFEST]) == mapping
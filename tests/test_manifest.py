@@ -0,0 +1,102 @@
+import json
+import os
+
+import pytest
+
+from gba_build.core import Variant, build_variant
+from gba_build.manifest import MANIFEST_NAME, BuildManifest, write_outputs
+
+FILES = {"index.txt": "hello", "data/level.bin": b"\x00\x01\x02", "data/notes.txt": "notes"}
+
+
+@pytest.fixture(autouse=True)
+def private_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("GBA_BUILD_CACHE", str(tmp_path / "cache"))
+
+
+def build(tmp_path, files):
+    variant = Variant("toy", "tests.toy_generator", str(tmp_path / "out" / "toy"),
+                      options={"files": files, "fingerprint": False, "minify": False})
+    return build_variant(variant)
+
+
+def inode(tmp_path, rel=""):
+    return os.stat(tmp_path / "out" / "toy" / rel).st_ino
+
+
+def test_first_build_writes_every_output_and_the_manifest(tmp_path):
+    result = build(tmp_path, FILES)
+    assert sorted(result.changed) == sorted(FILES)
+    root = tmp_path / "out" / "toy"
+    assert (root / "data" / "level.bin").read_bytes() == b"\x00\x01\x02"
+    manifest = json.loads((root / MANIFEST_NAME).read_text())
+    assert manifest["generator"] == "tests.toy_generator"
+    assert sorted(manifest["outputs"]) == sorted(FILES)
+
+
+def test_unchanged_rebuild_writes_nothing(tmp_path):
+    build(tmp_path, FILES)
+    root_before, file_before = inode(tmp_path), os.stat(tmp_path / "out" / "toy" / "index.txt")
+    result = build(tmp_path, FILES)
+    assert result.changed == []
+    assert result.up_to_date
+    assert inode(tmp_path) == root_before  # the tree was not swapped
+    after = os.stat(tmp_path / "out" / "toy" / "index.txt")
+    assert (after.st_ino, after.st_mtime_ns) == (file_before.st_ino, file_before.st_mtime_ns)
+
+
+def test_changing_one_source_rewrites_only_that_output(tmp_path):
+    build(tmp_path, FILES)
+    kept = {rel: inode(tmp_path, rel) for rel in ("index.txt", "data/level.bin")}
+    result = build(tmp_path, {**FILES, "data/notes.txt": "edited"})
+    assert result.changed == ["data/notes.txt"]
+    root = tmp_path / "out" / "toy"
+    assert (root / "data" / "notes.txt").read_text() == "edited"
+    # Unchanged outputs are hard-linked from the previous tree, not rewritten
+    assert {rel: inode(tmp_path, rel) for rel in kept} == kept
+
+
+def test_dropped_output_disappears_and_no_staging_dirs_remain(tmp_path):
+    build(tmp_path, FILES)
+    files = dict(FILES)
+    del files["data/notes.txt"]
+    result = build(tmp_path, files)
+    assert result.changed == []
+    assert not (tmp_path / "out" / "toy" / "data" / "notes.txt").exists()
+    assert os.listdir(tmp_path / "out") == ["toy"]
+
+
+@pytest.mark.parametrize("damage", [
+    lambda data: "{not json",
+    lambda data: json.dumps({**data, "version": "0"}),
+    lambda data: json.dumps({**data, "generator": "other"}),
+    lambda data: json.dumps({**data, "format": 1}),
+])
+def test_stale_or_corrupt_manifest_forces_a_full_rebuild(tmp_path, damage):
+    build(tmp_path, FILES)
+    path = tmp_path / "out" / "toy" / MANIFEST_NAME
+    path.write_text(damage(json.loads(path.read_text())))
+    result = build(tmp_path, FILES)
+    assert sorted(result.changed) == sorted(FILES)
+    assert BuildManifest.load(str(path.parent), "tests.toy_generator", "1").up_to_date(
+        str(path.parent), FILES)
+
+
+def test_output_resized_on_disk_is_rewritten(tmp_path):
+    build(tmp_path, FILES)
+    (tmp_path / "out" / "toy" / "index.txt").write_text("truncated!")
+    result = build(tmp_path, FILES)
+    assert result.changed == ["index.txt"]
+    assert (tmp_path / "out" / "toy" / "index.txt").read_text() == "hello"
+
+
+def test_write_outputs_in_place_skips_unchanged_files(tmp_path):
+    root = str(tmp_path / "tree")
+    _, results = write_outputs(root, FILES, "gen", "1")
+    assert all(changed for _, changed in results)
+    _, results = write_outputs(root, {**FILES, "index.txt": "bye"}, "gen", "1")
+    assert [rel for rel, changed in results if changed] == ["index.txt"]
+    _, results = write_outputs(root, {"index.txt": "bye"}, "gen", "1")
+    assert not any(changed for _, changed in results)
+    assert sorted(os.listdir(root)) == sorted([MANIFEST_NAME, "data", "index.txt"])
+    assert os.listdir(os.path.join(root, "data")) == []
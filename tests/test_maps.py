@@ -0,0 +1,128 @@
+import importlib
+import json
+import random
+import re
+import shutil
+import struct
+import subprocess
+
+import pytest
+
+from gba_build.maps import (BLOCKED, CHUNK_SIZE, EMPTY, HEADER_SIZE, WALKABLE, WORLD_DIR,
+                            collision_plane, decode_index, decode_map, encode_map, pack_chunks,
+                            split_map, world_files)
+
+
+def random_world(width, height, seed=1):
+    rng = random.Random(seed)
+    base = bytes(rng.randrange(8) for _ in range(width * height))
+    over = bytes(rng.choice((EMPTY, EMPTY, 9)) for _ in range(width * height))
+    return [base, over], collision_plane(base, {2, 4})
+
+
+def reassemble(index, chunks):
+    """The full-size planes described by a GBAI index and its chunk maps."""
+    width, height, layers, chunk, numbers = decode_index(index)
+    planes = [bytearray(width * height) for _ in range(layers + 1)]
+    cols = -(-width // chunk)
+    for i, number in enumerate(numbers):
+        w, h, cut, collision = decode_map(chunks[number])
+        x0, y0 = (i % cols) * chunk, (i // cols) * chunk
+        assert (w, h) == (min(chunk, width - x0), min(chunk, height - y0))
+        for plane, part in zip(planes, cut + [collision]):
+            for y in range(h):
+                plane[(y0 + y) * width + x0:(y0 + y) * width + x0 + w] = part[y * w:(y + 1) * w]
+    return width, height, [bytes(p) for p in planes[:-1]], bytes(planes[-1])
+
+
+def test_map_round_trip_and_layout():
+    layers, collision = random_world(5, 3)
+    data = encode_map(5, 3, layers, collision)
+    assert data[:HEADER_SIZE] == b"GBAM" + bytes([2, 2]) + struct.pack("<HH", 5, 3)
+    assert len(data) == HEADER_SIZE + 3 * 15
+    assert data[HEADER_SIZE:HEADER_SIZE + 15] == layers[0]
+    assert data[-15:] == collision
+    assert decode_map(data) == (5, 3, layers, collision)
+
+
+def test_version_1_maps_decode_without_collision():
+    data = b"GBAM" + bytes([1, 1]) + struct.pack("<HH", 2, 2) + bytes([0, 1, 2, 3])
+    assert decode_map(data) == (2, 2, [bytes([0, 1, 2, 3])], None)
+
+
+def test_collision_plane_marks_solid_tiles():
+    assert collision_plane(bytes([0, 2, 4, 3]), {2, 4}) == bytes(
+        [WALKABLE, BLOCKED, BLOCKED, WALKABLE])
+
+
+@pytest.mark.parametrize("args,message", [
+    ((2, 2, [bytes(3)], bytes(4)), "layer has 3 cells"),
+    ((2, 2, [bytes(4)], bytes(3)), "collision plane has 3 cells"),
+    ((2, 2, [[0, 0, 0, 256]], bytes(4)), "one byte"),
+    ((2, 2, [bytes(4)], bytes([0, 0, 0, 2])), "WALKABLE or BLOCKED"),
+])
+def test_encode_map_rejects_bad_planes(args, message):
+    with pytest.raises(ValueError, match=message):
+        encode_map(*args)
+
+
+def test_decode_rejects_other_formats():
+    with pytest.raises(ValueError):
+        decode_map(b"GBAM" + bytes([3, 0]) + bytes(4))
+    with pytest.raises(ValueError):
+        decode_index(b"GBAX" + bytes(10))
+
+
+@pytest.mark.parametrize("width,height,chunk", [(64, 64, 32), (70, 45, 32), (5, 3, 32), (9, 9, 4)])
+def test_split_map_round_trip_with_edge_chunks(width, height, chunk):
+    layers, collision = random_world(width, height)
+    index, chunks = split_map(width, height, layers, collision, chunk)
+    assert decode_index(index)[:4] == (width, height, 2, chunk)
+    assert reassemble(index, chunks) == (width, height, layers, collision)
+
+
+def test_identical_chunks_share_a_file():
+    width, height = 3 * CHUNK_SIZE, 2 * CHUNK_SIZE + 5
+    base = bytes(width * height)
+    index, chunks = split_map(width, height, [base], collision_plane(base, set()))
+    numbers = decode_index(index)[4]
+    # Six full chunks, then three 32x5 chunks along the bottom edge
+    assert len(numbers) == 9
+    assert len(chunks) == 2
+    assert numbers == [0] * 6 + [1] * 3
+    assert reassemble(index, chunks)[2] == [base]
+
+
+def test_pack_chunks_checks_its_inputs():
+    chunk = encode_map(2, 2, [bytes(4)], bytes(4))
+    with pytest.raises(ValueError, match="expected 4"):
+        pack_chunks(4, 4, 1, 2, [chunk])
+    with pytest.raises(ValueError, match="chunk size"):
+        pack_chunks(4, 4, 1, 0, [])
+
+
+def test_world_files_layout():
+    layers, collision = random_world(40, 10)
+    files = world_files(40, 10, layers, collision)
+    index, chunks = split_map(40, 10, layers, collision)
+    assert files == {f"{WORLD_DIR}/index.bin": index, f"{WORLD_DIR}/0.bin": chunks[0],
+                     f"{WORLD_DIR}/1.bin": chunks[1]}
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+@pytest.mark.parametrize("generator", ["package_gba", "create_gba_emerald"])
+def test_runtime_decode_map_reads_encoded_chunks(generator):
+    source = importlib.import_module(generator).script_js
+    decode = re.search(r"\n  function decodeMap\(buf\) \{.*?\n  \}\n", source, re.DOTALL).group(0)
+    layers, collision = random_world(7, 5)
+    data = encode_map(7, 5, layers[:1], collision)
+    script = f"""
+const EMPTY = {EMPTY};
+{decode}
+const bytes = Uint8Array.from({json.dumps(list(data))});
+const map = decodeMap(bytes.buffer);
+console.log(JSON.stringify([map.w, map.h, Array.from(map.tiles || map.base),
+                            Array.from(map.blocked)]));
+"""
+    out = subprocess.run(["node", "-e", script], capture_output=True, text=True, check=True)
+    assert json.loads(out.stdout) == [7, 5, list(layers[0]), list(collision)]
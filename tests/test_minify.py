@@ -0,0 +1,108 @@
+import shutil
+import subprocess
+
+import pytest
+
+from gba_build import BUILTIN, builtin_variant, render_variant
+from gba_build.minify import minify_js
+
+NODE = shutil.which("node")
+needs_node = pytest.mark.skipif(NODE is None, reason="node is not installed")
+
+
+def run_js(src):
+    """What ``src`` prints through ``console.log`` under node."""
+    result = subprocess.run([NODE, "-e", src], capture_output=True, text=True, check=True)
+    return result.stdout
+
+
+def test_division_is_not_a_regex():
+    assert minify_js("var a = b / c / d;") == "var a=b/c/d;\n"
+
+
+def test_regex_after_operator_and_keyword():
+    src = "var r = /ab+c/g.test(s);\nif (x) /re/.test(y);\nfunction f() { return /a\\/b/; }"
+    assert minify_js(src) == (
+        "var r=/ab+c/g.test(s);if(x)/re/.test(y);function f(){return/a\\/b/;}\n")
+
+
+def test_regex_with_slash_in_class_and_comment_like_body():
+    src = "var r = /[/]+/g; var s = a // not a regex\n/ 2;"
+    assert minify_js(src) == "var r=/[/]+/g;var s=a/2;\n"
+
+
+@needs_node
+def test_template_literal_substitutions_are_renamed():
+    src = """
+function greet(count) {
+    var label = "n";
+    return `${label}=${count + 1} {not ${"a}"}} $ \\${count}`;
+}
+console.log(greet(4));
+"""
+    out = minify_js(src)
+    assert "count" not in out.replace("\\${count}", "")
+    assert run_js(out) == run_js(src) == "n=5 {not a}} $ ${count}\n"
+
+
+@needs_node
+def test_object_shorthand_keeps_property_names_after_renaming():
+    src = """
+function pack(alpha, beta) {
+    var gamma = alpha + beta;
+    return {alpha, beta, gamma, delta: gamma};
+}
+console.log(JSON.stringify(pack(1, 2)));
+"""
+    out = minify_js(src)
+    assert "{alpha:" in out
+    assert run_js(out) == run_js(src) == '{"alpha":1,"beta":2,"gamma":3,"delta":3}\n'
+
+
+@needs_node
+def test_local_var_shadowing_a_global():
+    src = """
+var console_ = console;
+function f() {
+    var Math = {max: function () { return "local"; }};
+    return Math.max(1, 2);
+}
+function g() { return Math.max(1, 2); }
+console_.log(f(), g());
+"""
+    out = minify_js(src)
+    assert "function g(){return Math.max(1,2);}" in out
+    assert run_js(out) == run_js(src) == "local 2\n"
+
+
+@needs_node
+def test_asi_after_return_and_around_newlines():
+    src = """
+function f(value) {
+    return
+    value
+}
+var a = 1
+var b = a
+++b
+console.log(f(3), a, b)
+"""
+    out = minify_js(src)
+    assert "return\n" in out
+    assert run_js(out) == run_js(src) == "undefined 1 2\n"
+
+
+@needs_node
+@pytest.mark.parametrize("name", sorted(BUILTIN))
+def test_minified_builds_parse(name, tmp_path, monkeypatch):
+    monkeypatch.setenv("GBA_BUILD_CACHE", str(tmp_path / "cache"))
+    variant = builtin_variant(name, str(tmp_path), tree=False, minify=True, gzip=False)
+    _, files, _ = render_variant(variant)
+    scripts = sorted(rel for rel in files if rel.endswith(".js"))
+    assert scripts
+    for rel in scripts:
+        path = tmp_path / rel.replace("/", "_")
+        data = files[rel]
+        path.write_bytes(data if isinstance(data, bytes) else data.encode("utf-8"))
+        result = subprocess.run([NODE, "--check", str(path)], capture_output=True, text=True)
+        assert result.returncode == 0, f"{rel}: {result.stderr}"
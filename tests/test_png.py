@@ -0,0 +1,169 @@
+import random
+import struct
+import zlib
+
+import pytest
+
+from gba_build.png import decode_png, encode_png, png_header
+from gba_build.quantize import quantize_assets, transfer_lut
+
+CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+FORMATS = [(0, 1), (0, 2), (0, 4), (0, 8), (0, 16), (2, 8), (2, 16), (3, 1), (3, 2), (3, 4),
+           (3, 8), (4, 8), (4, 16), (6, 8), (6, 16)]
+ADAM7 = ((0, 0, 8, 8), (4, 0, 8, 8), (0, 4, 4, 8), (2, 0, 4, 4),
+         (0, 2, 2, 4), (1, 0, 2, 2), (0, 1, 1, 2))
+
+
+def chunk(kind, body):
+    return (struct.pack(">I", len(body)) + kind + body
+            + struct.pack(">I", zlib.crc32(kind + body) & 0xFFFFFFFF))
+
+
+def pack_row(values, depth):
+    if depth == 16:
+        return struct.pack(f">{len(values)}H", *values)
+    if depth == 8:
+        return bytes(values)
+    out = bytearray()
+    per_byte = 8 // depth
+    for i in range(0, len(values), per_byte):
+        byte = 0
+        for k, v in enumerate(values[i:i + per_byte]):
+            byte |= v << (8 - depth * (k + 1))
+        out.append(byte)
+    return bytes(out)
+
+
+def filter_row(ftype, line, prev, bpp):
+    out = bytearray([ftype])
+    for i, x in enumerate(line):
+        a = line[i - bpp] if i >= bpp else 0
+        b = prev[i]
+        c = prev[i - bpp] if i >= bpp else 0
+        if ftype == 0:
+            pred = 0
+        elif ftype == 1:
+            pred = a
+        elif ftype == 2:
+            pred = b
+        elif ftype == 3:
+            pred = (a + b) >> 1
+        else:
+            p = a + b - c
+            pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+            pred = a if pa <= pb and pa <= pc else (b if pb <= pc else c)
+        out.append((x - pred) & 0xFF)
+    return bytes(out)
+
+
+def encode_rows(grid, depth, channels):
+    """Filtered scanlines of ``grid`` (rows of per-pixel sample tuples), cycling filters."""
+    bpp = max(1, depth * channels // 8)
+    data = b""
+    prev = None
+    for y, row in enumerate(grid):
+        line = pack_row([v for pixel in row for v in pixel], depth)
+        prev = prev or bytes(len(line))
+        data += filter_row(y % 5, line, prev, bpp)
+        prev = line
+    return data
+
+
+def make_png(grid, color_type, depth, interlace=False, palette=None, trns=None):
+    height, width = len(grid), len(grid[0])
+    channels = CHANNELS[color_type]
+    if interlace:
+        raw = b""
+        for x0, y0, dx, dy in ADAM7:
+            sub = [row[x0::dx] for row in grid[y0::dy]]
+            if sub and sub[0]:
+                raw += encode_rows(sub, depth, channels)
+    else:
+        raw = encode_rows(grid, depth, channels)
+    out = b"\x89PNG\r\n\x1a\n" + chunk(
+        b"IHDR", struct.pack(">IIBBBBB", width, height, depth, color_type, 0, 0, int(interlace)))
+    if palette is not None:
+        out += chunk(b"PLTE", palette)
+    if trns is not None:
+        out += chunk(b"tRNS", trns)
+    return out + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b"")
+
+
+def to8(v, depth):
+    if depth == 16:
+        return int(v * 255 / 65535 + 0.5)
+    return v * 255 // ((1 << depth) - 1)
+
+
+@pytest.mark.parametrize("interlace", [False, True])
+@pytest.mark.parametrize("color_type,depth", FORMATS)
+def test_decodes_every_color_type_and_depth(color_type, depth, interlace):
+    rng = random.Random(color_type * 100 + depth)
+    width, height = 11, 7  # partial Adam7 passes and padded sub-byte rows
+    channels = CHANNELS[color_type]
+    top = (1 << depth) - 1
+    grid = [[tuple(rng.randint(0, top) for _ in range(channels)) for _ in range(width)]
+            for _ in range(height)]
+    palette = trns = None
+    if color_type == 3:
+        palette = bytes(rng.randrange(256) for _ in range(3 * (top + 1)))
+        trns = bytes(rng.randrange(256) for _ in range(top // 2 + 1))
+    data = make_png(grid, color_type, depth, interlace, palette, trns)
+
+    w, h, rgba = decode_png(data)
+    assert (w, h) == (width, height)
+    expected = bytearray()
+    for row in grid:
+        for pixel in row:
+            if color_type == 3:
+                index = pixel[0]
+                alpha = trns[index] if index < len(trns) else 255
+                expected += palette[index * 3:index * 3 + 3] + bytes([alpha])
+            elif color_type in (0, 4):
+                gray = to8(pixel[0], depth)
+                alpha = to8(pixel[1], depth) if color_type == 4 else 255
+                expected += bytes([gray, gray, gray, alpha])
+            else:
+                rgb = [to8(v, depth) for v in pixel[:3]]
+                alpha = to8(pixel[3], depth) if color_type == 6 else 255
+                expected += bytes(rgb + [alpha])
+    assert rgba == expected
+
+
+@pytest.mark.parametrize("depth", [4, 16])
+def test_gray_trns_key_is_transparent(depth):
+    grid = [[(0,), (3,)], [(3,), (1,)]]
+    data = make_png(grid, 0, depth, trns=struct.pack(">H", 3))
+    _, _, rgba = decode_png(data)
+    assert list(rgba[3::4]) == [255, 0, 0, 255]
+
+
+def test_rgb_trns_key_is_transparent():
+    grid = [[(1, 2, 3), (1, 2, 4)]]
+    data = make_png(grid, 2, 8, trns=struct.pack(">3H", 1, 2, 3))
+    _, _, rgba = decode_png(data)
+    assert list(rgba[3::4]) == [0, 255]
+
+
+def test_round_trips_encode_png():
+    rgba = bytes(range(256)) * 3
+    assert decode_png(encode_png(8, 24, rgba)) == (8, 24, bytearray(rgba))
+
+
+def test_rejects_invalid_combinations_and_corrupt_data():
+    with pytest.raises(ValueError, match="bit depth 16"):
+        png_header(make_png([[(1,)]], 3, 8).replace(b"\x08\x03", b"\x10\x03", 1))
+    good = make_png([[(1, 2, 3)] * 4] * 4, 2, 8)
+    corrupt = good.replace(b"IDAT", b"IDAT\xff\xff", 1)
+    with pytest.raises(ValueError, match="corrupt PNG"):
+        decode_png(corrupt)
+
+
+def test_quantize_leaves_undecodable_assets_with_a_warning(tmp_path, monkeypatch):
+    monkeypatch.setenv("GBA_BUILD_CACHE", str(tmp_path))
+    broken = b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", 1, 1, 16, 3, 0, 0, 0))
+    files = {"assets/a.png": encode_png(1, 1, b"\x0f\x0f\x0f\xff"), "assets/b.png": broken}
+    with pytest.warns(UserWarning, match="assets/b.png"):
+        done = quantize_assets(files, transfer_lut())
+    assert done == ["assets/a.png"]
+    assert files["assets/b.png"] == broken
@@ -0,0 +1,141 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from gba_build import tiled
+from gba_build.maps import EMPTY, decode_index, decode_map
+from gba_build.tiled import import_tiled, source_files
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "tiled")
+SOLID = {4}  # the tileset overrides it: tile 3 is solid, tile 4 is not
+
+BASE = ([3] * 8 + [3, 0, 0, 0, 1, 0, 0, 3] + [3, 0, 2, 0, 1, 0, 4, 3]
+        + [3, 0, 0, 0, 1, 0, 0, 3] * 2 + [3] * 8)
+OVER = [EMPTY] * 48
+OVER[1 * 8 + 2] = 7
+COLLISION = [1 if tid == 3 else 0 for tid in BASE]
+COLLISION[3 * 8 + 5] = 1  # from the hidden collision layer
+OBJECTS = {"player": [1, 1], "npcs": [{"x": 6, "y": 3, "dialogue": ["Hi!", "Bye."]}]}
+
+
+@pytest.fixture(autouse=True)
+def private_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("GBA_BUILD_CACHE", str(tmp_path / "cache"))
+
+
+def fixture(name):
+    return os.path.join(FIXTURES, name)
+
+
+def world(files):
+    """The single chunk of an imported fixture: ``(width, height, layers, collision)``."""
+    assert decode_index(files["assets/world/index.bin"])[4] == [0]
+    return decode_map(files["assets/world/0.bin"])
+
+
+@pytest.mark.parametrize("name", ["town.tmx", "town.json"])
+def test_import_compiles_layers_collision_and_objects(name):
+    files = {"assets/world/index.bin": b"old", "assets/world/7.bin": b"old", "index.html": "x"}
+    objects = import_tiled(files, fixture(name), 16, SOLID, overlay=True)
+    assert objects == OBJECTS
+    assert sorted(files) == ["assets/world/0.bin", "assets/world/index.bin", "index.html"]
+    width, height, layers, collision = world(files)
+    assert (width, height) == (8, 6)
+    assert layers == [bytes(BASE), bytes(OVER)]
+    assert collision == bytes(COLLISION)
+
+
+def test_tmx_and_json_maps_give_identical_worlds():
+    tmx, json_ = {}, {}
+    import_tiled(tmx, fixture("town.tmx"), 16, SOLID, overlay=True)
+    import_tiled(json_, fixture("town.json"), 16, SOLID, overlay=True)
+    assert tmx == json_
+
+
+def test_overlay_layer_needs_a_runtime_that_draws_it():
+    with pytest.raises(ValueError, match="'Over' is an overlay"):
+        import_tiled({}, fixture("town.tmx"), 16, SOLID)
+
+
+def test_tile_size_must_match_the_runtime():
+    with pytest.raises(ValueError, match="tiles are 16x16"):
+        import_tiled({}, fixture("town.json"), 8, SOLID, overlay=True)
+
+
+def test_source_files_lists_external_tilesets():
+    assert source_files(fixture("town.tmx")) == [fixture("town.tmx"), fixture("tiles.tsx")]
+    assert source_files(fixture("town.json")) == [fixture("town.json"), fixture("tiles.tsj")]
+
+
+def test_cache_is_keyed_on_the_map_and_tileset_bytes(tmp_path, monkeypatch):
+    for name in ("town.json", "tiles.tsj"):
+        shutil.copy(fixture(name), tmp_path / name)
+    path = str(tmp_path / "town.json")
+    first = {}
+    import_tiled(first, path, 16, SOLID, overlay=True)
+
+    def no_parse(path):
+        raise AssertionError("parsed on a cache hit")
+
+    monkeypatch.setattr(tiled, "load_map", no_parse)
+    again = {}
+    import_tiled(again, path, 16, SOLID, overlay=True)
+    assert again == first
+
+    tileset = json.loads((tmp_path / "tiles.tsj").read_text())
+    tileset["tiles"][1]["properties"][0]["value"] = True  # tile 4 becomes solid
+    (tmp_path / "tiles.tsj").write_text(json.dumps(tileset))
+    with pytest.raises(AssertionError, match="parsed"):
+        import_tiled({}, path, 16, SOLID, overlay=True)
+    monkeypatch.undo()
+    changed = {}
+    import_tiled(changed, path, 16, SOLID, overlay=True)
+    assert world(changed)[3][2 * 8 + 6] == 1
+
+
+def test_without_a_player_object_the_start_is_the_nearest_free_tile():
+    objects = import_tiled({}, fixture("nospawn.json"), 16, SOLID, overlay=True)
+    # (5, 5) is on the tree border; (5, 4) is the closest free tile
+    assert objects["player"] == [5, 4]
+    assert objects["npcs"] == OBJECTS["npcs"]
+
+
+def edited_map(tmp_path, edit):
+    for name in ("town.json", "tiles.tsj"):
+        shutil.copy(fixture(name), tmp_path / name)
+    doc = json.loads((tmp_path / "town.json").read_text())
+    edit(doc)
+    (tmp_path / "town.json").write_text(json.dumps(doc))
+    return str(tmp_path / "town.json")
+
+
+def test_player_object_on_a_blocked_tile_is_an_error(tmp_path):
+    def move_player(doc):
+        doc["layers"][-1]["objects"][0].update(x=0, y=0)
+
+    with pytest.raises(ValueError, match=r"player object at \(0, 0\) is on a blocked tile"):
+        import_tiled({}, edited_map(tmp_path, move_player), 16, SOLID, overlay=True)
+
+
+def test_map_without_free_tiles_is_an_error(tmp_path):
+    def wall_in(doc):
+        doc["layers"][2]["data"] = [1] * 48
+        doc["layers"][-1]["objects"] = []
+
+    with pytest.raises(ValueError, match="no free tile"):
+        import_tiled({}, edited_map(tmp_path, wall_in), 16, SOLID, overlay=True)
+
+
+def test_objects_off_the_map_and_second_players_are_errors(tmp_path):
+    def off_map(doc):
+        doc["layers"][-1]["objects"][1].update(x=400)
+
+    def two_players(doc):
+        doc["layers"][-1]["objects"].append({"id": 9, "type": "spawn", "x": 32, "y": 16})
+
+    with pytest.raises(ValueError, match="npc object at .* is off the map"):
+        import_tiled({}, edited_map(tmp_path, off_map), 16, SOLID, overlay=True)
+    with pytest.raises(ValueError, match="more than one player"):
+        import_tiled({}, edited_map(tmp_path, two_players), 16, SOLID, overlay=True)
@@ -0,0 +1,79 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from gba_build.maps import BLOCKED, EMPTY, decode_index, decode_map  # noqa: E402
+from gba_build.worldgen import generate_world  # noqa: E402
+
+TILES = {"grass": [0, 1], "path": [2], "water": [3, 4], "tall": [5], "tree": 6,
+         "tree_top": 7, "flower": 8, "rock": 9}
+SOLID = {3, 4, 6, 9}
+CLEARING = (1, 1, 9, 7)
+
+
+def world(seed=7, width=90, height=70, **kwargs):
+    return generate_world(width, height, TILES, SOLID, seed=seed, clearing=CLEARING,
+                          chunk=16, **kwargs)
+
+
+def planes(index, chunks):
+    """``(width, base, over, blocked)`` of a whole generated world, row-major."""
+    width, height, layers, chunk, numbers = decode_index(index)
+    out = [bytearray(width * height) for _ in range(layers + 1)]
+    cols = -(-width // chunk)
+    for i, number in enumerate(numbers):
+        w, h, cut, collision = decode_map(chunks[number])
+        x0, y0 = (i % cols) * chunk, (i // cols) * chunk
+        for plane, part in zip(out, cut + [collision]):
+            for y in range(h):
+                plane[(y0 + y) * width + x0:(y0 + y) * width + x0 + w] = part[y * w:(y + 1) * w]
+    return (width, *out)
+
+
+def test_same_seed_gives_the_same_world_serial_or_parallel():
+    serial = world(jobs=1)
+    assert world(jobs=1) == serial
+    assert world(jobs=2) == serial
+    assert world(jobs=3) == serial
+
+
+def test_seed_and_parameters_change_the_world():
+    assert world(seed=8, jobs=1) != world(jobs=1)
+    assert world(jobs=1, water_level=0.6) != world(jobs=1)
+
+
+def test_world_invariants():
+    width, base, over, blocked = planes(*world(jobs=1))
+    height = len(base) // width
+    roles = {0, 1, 2, 3, 4, 5, 6, 8, 9}
+    assert set(base) <= roles
+    assert set(over) <= {EMPTY, TILES["tree_top"]}
+    assert bytes(blocked) == bytes(BLOCKED if t in SOLID else 0 for t in base)
+    for x in range(width):
+        assert base[x] == base[(height - 1) * width + x] == TILES["tree"]
+    for y in range(height):
+        assert base[y * width] == base[y * width + width - 1] == TILES["tree"]
+    x0, y0, x1, y1 = CLEARING
+    assert not any(blocked[y * width + x] for y in range(y0, y1) for x in range(x0, x1))
+    # Every tree top sits right above a tree
+    for i, tile in enumerate(over):
+        if tile != EMPTY:
+            assert base[i + width] == TILES["tree"]
+
+
+def test_single_layer_without_tree_tops():
+    tiles = {k: v for k, v in TILES.items() if k != "tree_top"}
+    index, _ = generate_world(40, 20, tiles, SOLID, seed=1, jobs=1)
+    assert decode_index(index)[2] == 1
+
+
+@pytest.mark.parametrize("kwargs,message", [
+    ({"width": 0}, "does not fit"),
+    ({"height": 0x10000}, "does not fit"),
+    ({"bogus": 1, "octave": 2}, "unknown world parameters: bogus, octave"),
+])
+def test_parameter_validation(kwargs, message):
+    args = {"width": 40, "height": 20, **kwargs}
+    width, height = args.pop("width"), args.pop("height")
+    with pytest.raises(ValueError, match=message):
+        generate_world(width, height, TILES, SOLID, **args)
@@ -0,0 +1,7 @@
+"""A minimal generator for the build tests: renders ``options["files"]`` as is."""
+
+GENERATOR_VERSION = "1"
+
+
+def render(variant):
+    return dict(variant.options["files"])